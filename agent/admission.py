@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_WAIT_SECONDS = metrics.histogram(
+    "deep_search_admission_wait_seconds", "실행 슬롯을 얻기까지 대기한 시간"
+)
+ADMISSION_QUEUE_DEPTH = metrics.gauge(
+    "deep_search_admission_queue_depth", "실행 대기 중인 task 수"
+)
+ADMISSION_RUNNING = metrics.gauge(
+    "deep_search_admission_running", "실행 슬롯을 점유 중인 task 수"
+)
+ADMISSION_REJECTIONS = metrics.counter(
+    "deep_search_admission_rejections", "거절된 task 수", ["reason"]
+)
+
+
+class AdmissionRejected(Exception):
+    """실행 대기열이 가득 찼거나 tenant 한도를 넘어 요청을 거절함"""
+
+    def __init__(self, reason: str, retry_after: int, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("tenant", "granted", "position_changed")
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+        self.granted: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.position_changed = asyncio.Event()
+
+
+class AdmissionController:
+    """리서치 task 실행 승인 관리
+
+    - 동시에 실행되는 task 는 max_concurrent 개까지
+    - 나머지는 max_queue 개까지 FIFO 로 대기하며, 순번이 바뀔 때마다 on_queued 로 알린다
+    - 대기열이 가득 차거나 tenant(app_name) 한도를 넘으면 즉시 AdmissionRejected
+    한도는 프로세스(worker) 단위로 적용된다.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_queue: int = 32,
+        tenant_max_tasks: int = 0,
+        tenant_quotas: Optional[Dict[str, int]] = None,
+        queue_timeout: float = 0,
+        default_retry_after: int = 60,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.tenant_max_tasks = tenant_max_tasks
+        self.tenant_quotas = tenant_quotas or {}
+        self.queue_timeout = queue_timeout
+        self.default_retry_after = default_retry_after
+        self._running = 0
+        self._queue: deque[_Waiter] = deque()
+        self._tenant_counts: Dict[str, int] = {}
+        # 최근 task 실행 시간의 지수 이동 평균 (재시도 권장 시간 추정용)
+        self._avg_run_seconds: Optional[float] = None
+
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _tenant_limit(self, tenant: str) -> int:
+        return self.tenant_quotas.get(tenant, self.tenant_max_tasks)
+
+    def _retry_after(self) -> int:
+        if self._avg_run_seconds is None:
+            return self.default_retry_after
+        estimate = self._avg_run_seconds * (len(self._queue) + 1) / max(self.max_concurrent, 1)
+        return max(1, int(estimate))
+
+    def _reject(self, reason: str, message: str):
+        ADMISSION_REJECTIONS.labels(reason=reason).inc()
+        raise AdmissionRejected(reason, self._retry_after(), message)
+
+    def _update_gauges(self):
+        ADMISSION_QUEUE_DEPTH.set(len(self._queue))
+        ADMISSION_RUNNING.set(self._running)
+
+    def _grant_next(self):
+        while self._queue and self._running < self.max_concurrent:
+            waiter = self._queue.popleft()
+            if waiter.granted.done():
+                continue
+            self._running += 1
+            waiter.granted.set_result(True)
+        for waiter in self._queue:
+            waiter.position_changed.set()
+        self._update_gauges()
+
+    def _release(self, tenant: str, run_seconds: Optional[float]):
+        self._running -= 1
+        self._tenant_counts[tenant] -= 1
+        if not self._tenant_counts[tenant]:
+            del self._tenant_counts[tenant]
+        if run_seconds is not None:
+            if self._avg_run_seconds is None:
+                self._avg_run_seconds = run_seconds
+            else:
+                self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * run_seconds
+        self._grant_next()
+
+    async def _wait_for_slot(
+        self, waiter: _Waiter, on_queued: Optional[Callable[[int], Awaitable[None]]]
+    ):
+        deadline = time.monotonic() + self.queue_timeout if self.queue_timeout > 0 else None
+        last_position = None
+        while not waiter.granted.done():
+            waiter.position_changed.clear()
+            position = self._queue.index(waiter) + 1
+            if on_queued and position != last_position:
+                await on_queued(position)
+            last_position = position
+
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    self._reject("queue_timeout", "대기 시간이 초과되었습니다.")
+            changed = asyncio.ensure_future(waiter.position_changed.wait())
+            try:
+                await asyncio.wait(
+                    {waiter.granted, changed},
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                changed.cancel()
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        tenant: str,
+        on_queued: Optional[Callable[[int], Awaitable[None]]] = None,
+    ):
+        """실행 슬롯 획득 (with 블록이 끝나면 반환)"""
+        limit = self._tenant_limit(tenant)
+        if limit and self._tenant_counts.get(tenant, 0) >= limit:
+            self._reject("tenant_quota", f"'{tenant}' 의 동시 요청 한도({limit})를 초과했습니다.")
+
+        queued_at = time.monotonic()
+        if self._running < self.max_concurrent and not self._queue:
+            self._running += 1
+            self._tenant_counts[tenant] = self._tenant_counts.get(tenant, 0) + 1
+            self._update_gauges()
+        else:
+            if len(self._queue) >= self.max_queue:
+                self._reject("queue_full", "요청이 많아 지금은 처리할 수 없습니다.")
+            waiter = _Waiter(tenant)
+            self._queue.append(waiter)
+            self._tenant_counts[tenant] = self._tenant_counts.get(tenant, 0) + 1
+            self._update_gauges()
+            try:
+                await self._wait_for_slot(waiter, on_queued)
+            except BaseException:
+                # 대기 중 취소/시간 초과: 이미 슬롯을 받았다면 반환
+                if waiter.granted.done() and not waiter.granted.cancelled():
+                    self._release(tenant, None)
+                else:
+                    waiter.granted.cancel()
+                    if waiter in self._queue:
+                        self._queue.remove(waiter)
+                    self._tenant_counts[tenant] -= 1
+                    if not self._tenant_counts[tenant]:
+                        del self._tenant_counts[tenant]
+                    self._grant_next()
+                raise
+
+        started_at = time.monotonic()
+        ADMISSION_WAIT_SECONDS.observe(started_at - queued_at)
+        try:
+            yield
+        finally:
+            self._release(tenant, time.monotonic() - started_at)
+
+
+def _load_tenant_quotas() -> Dict[str, int]:
+    raw = os.getenv("TENANT_TASK_QUOTAS", "")
+    if not raw:
+        return {}
+    try:
+        return {str(k): int(v) for k, v in json.loads(raw).items()}
+    except Exception as e:
+        logger.warning(f"TENANT_TASK_QUOTAS 파싱 실패: {e}")
+        return {}
+
+
+# 글로벌 인스턴스
+admission_controller = AdmissionController(
+    max_concurrent=int(os.getenv("MAX_CONCURRENT_TASKS", "8")),
+    max_queue=int(os.getenv("MAX_QUEUED_TASKS", "32")),
+    tenant_max_tasks=int(os.getenv("TENANT_MAX_TASKS", "0")),
+    tenant_quotas=_load_tenant_quotas(),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "0")),
+    default_retry_after=int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "60")),
+)
@@ -6,12 +6,14 @@ import datetime
 import os
 import aiohttp
 import asyncio
-from agent.agent_tools import perplexity_deep_research_tool
+from agent.agent_tools import perplexity_deep_research_tool, research_options
+from agent.context_cache import GEMINI_CONTEXT_CACHE, gemini_context_cache
 from agent.cost_calculator import PerplexityCostCalculator
+from agent.direct_research import accumulate_usage, build_final_response
+from agent.tool_results import after_tool_callback, assemble_answer, report_handles
 from dotenv import load_dotenv
 from google.adk.agents import LlmAgent
-from google.adk.sessions import InMemorySessionService
-from google.adk.tools.google_search_tool import google_search
+from google.adk.sessions import BaseSessionService, InMemorySessionService
 from google.adk import Runner
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.agents.run_config import RunConfig, StreamingMode
@@ -27,10 +29,34 @@ from a2a.utils import new_text_artifact
 from datetime import datetime
 
 from prompts.prompt import get_system_instruction
+from shared.cassette import cassette
+from shared.metrics import AGENT_PHASE_SECONDS
+from shared.tracing import start_span
 
 logger = logging.getLogger(__name__)
 MAX_RETRY = 1
 
+_session_service: BaseSessionService | None = None
+
+
+def get_session_service() -> BaseSessionService:
+    """프로세스 공용 ADK 세션 서비스
+
+    SESSION_DB_URL 이 설정되면 DB(sqlite/mysql 등)에 세션을 저장하므로
+    여러 worker/노드가 같은 세션 이력을 공유한다. 없으면 메모리에 보관한다.
+    """
+    global _session_service
+    if _session_service is None:
+        db_url = os.getenv("SESSION_DB_URL")
+        if db_url:
+            from google.adk.sessions import DatabaseSessionService
+
+            _session_service = DatabaseSessionService(db_url=db_url)
+            logger.info("[DeepSearchAgent] DatabaseSessionService 사용")
+        else:
+            _session_service = InMemorySessionService()
+    return _session_service
+
 
 def extract_json_from_llm_output(text):
     """
@@ -46,6 +72,24 @@ def extract_json_from_llm_output(text):
     return text
 
 
+def _accumulate_tool_usage(total_usage: dict, event_dict: dict):
+    """도구(Perplexity) 함수 응답에 포함된 usage 를 누적"""
+    content = event_dict.get("content") or {}
+    for part in content.get("parts") or []:
+        function_response = part.get("function_response") or {}
+        accumulate_usage(total_usage, function_response.get("response") or {})
+
+
+def _tool_freshness(event_dict: dict):
+    """캐시/사전 조사 결과를 사용한 경우 그 조사 시각 정보"""
+    content = event_dict.get("content") or {}
+    for part in content.get("parts") or []:
+        response = (part.get("function_response") or {}).get("response") or {}
+        if response.get("freshness"):
+            return response["freshness"]
+    return None
+
+
 class DeepSearchAgent:
     """단일 날짜 일일 작업 조회 전담 서브 에이전트"""
 
@@ -61,7 +105,7 @@ class DeepSearchAgent:
         self.runner = Runner(
             app_name=app_name,
             agent=self.agent,
-            session_service=InMemorySessionService(),
+            session_service=get_session_service(),
         )
 
     # ------------------------------------------------------------------
@@ -102,12 +146,22 @@ class DeepSearchAgent:
             print(f"[DeepSearchAgent] 외부 프롬프트 함수 실패: {e}, 내부 프롬프트 사용")
             # instruction = self._build_instruction()
 
+        # cassette 가 먼저 원래 요청을 기록/재생하고, 이후 고정 prefix 를 context cache 로 대체
+        callbacks = cassette.model_callbacks()
+        before_model_callbacks = [callbacks["before_model_callback"]] if callbacks else []
+        if GEMINI_CONTEXT_CACHE:
+            before_model_callbacks.append(gemini_context_cache.model_callback(self.app_name))
+
         agent = LlmAgent(
             model="gemini-2.5-flash",
             name="deep_search_agent",
             description="딥 서치 에이전트",
             instruction=instruction,
             tools=[perplexity_deep_research_tool],
+            before_model_callback=before_model_callbacks or None,
+            after_model_callback=callbacks.get("after_model_callback"),
+            # 압축 모드에서는 리서치 결과 대신 digest 와 handle 만 Gemini 에 전달
+            after_tool_callback=after_tool_callback,
         )
         return agent
 
@@ -120,6 +174,21 @@ class DeepSearchAgent:
         app_name: str = "default-app",
     ):
         """서브 에이전트 실행"""
+        with start_span(
+            "deep_search_agent.invoke",
+            {"app_name": app_name, "session_id": session_id, "task_id": task_id},
+        ):
+            async for item in self._invoke(query, session_id, task_id, user_id, app_name):
+                yield item
+
+    async def _invoke(
+        self,
+        query: str,
+        session_id: str,
+        task_id: str,
+        user_id: str,
+        app_name: str = "default-app",
+    ):
         logger.info(
             "[DeepSearchAgent] invoke 시작 | query=%s, session_id=%s, task_id=%s, user_id=%s",
             query,
@@ -129,17 +198,20 @@ class DeepSearchAgent:
         )
 
         # 최신 정보 반영
-        await self._refresh_agent()
+        with AGENT_PHASE_SECONDS.labels(phase="refresh_agent").time(), start_span(
+            "deep_search_agent.refresh_agent"
+        ):
+            await self._refresh_agent()
 
         if self.runner is None:
             self.runner = Runner(
                 app_name=app_name,
                 agent=self.agent,
-                session_service=InMemorySessionService(),
+                session_service=get_session_service(),
             )
 
-        # 사용료 계산기 초기화
-        cost_calculator = PerplexityCostCalculator("sonar-deep-research")
+        # 사용료 계산기 초기화 (축소 단계/budget 으로 바뀐 모델 단가로 계산)
+        cost_calculator = PerplexityCostCalculator(research_options.get().model)
         total_usage = {
             "input_tokens": 0,
             "output_tokens": 0,
@@ -148,20 +220,26 @@ class DeepSearchAgent:
             "reasoning_tokens": 0,
         }
 
+        freshness = None
+
         try:
             # 세션 처리
-            session = await self.runner.session_service.get_session(
-                app_name=app_name,
-                user_id=user_id,
-                session_id=session_id,
-            )
-            if session is None:
-                session = await self.runner.session_service.create_session(
+            session_start = time.perf_counter()
+            with start_span("deep_search_agent.session"):
+                session = await self.runner.session_service.get_session(
                     app_name=app_name,
                     user_id=user_id,
                     session_id=session_id,
-                    state={},
                 )
+                if session is None:
+                    session = await self.runner.session_service.create_session(
+                        app_name=app_name,
+                        user_id=user_id,
+                        session_id=session_id,
+                        state={},
+                    )
+
+            AGENT_PHASE_SECONDS.labels(phase="session").observe(time.perf_counter() - session_start)
 
             # 오늘 날짜 정보 추가
             today_str = datetime.now().strftime("%Y-%m-%d")
@@ -170,6 +248,7 @@ class DeepSearchAgent:
                 role="user", parts=[types.Part.from_text(text=augmented_query)]
             )
 
+            run_start = time.perf_counter()
             async for event in self.runner.run_async(
                 user_id=user_id,
                 session_id=session_id,
@@ -186,6 +265,20 @@ class DeepSearchAgent:
                         if key in usage:
                             total_usage[key] += usage[key]
                     logger.info(f"Usage accumulated: {total_usage}")
+                _accumulate_tool_usage(total_usage, event_dict)
+                freshness = _tool_freshness(event_dict) or freshness
+
+                # 압축된 도구 결과는 요약 단계 없이 보관된 전체 리포트로 최종 answer 를 조립
+                handles = report_handles(event_dict)
+                if handles and event.is_final_response():
+                    answer = assemble_answer(handles)
+                    if answer is not None:
+                        final_response = build_final_response(answer, cost_calculator, total_usage, freshness)
+                        AGENT_PHASE_SECONDS.labels(phase="run").observe(time.perf_counter() - run_start)
+                        # 호출 측이 도구 실행 결과(status)를 확인할 수 있도록 함수 응답 이벤트도 전달
+                        yield event
+                        yield json.dumps(final_response, ensure_ascii=False)
+                        break
 
                 # 함수 응답 처리 (Google ADK의 자동 함수 호출 결과)
                 # if 'function_responses' in event_dict and event_dict['function_responses']:
@@ -214,34 +307,20 @@ class DeepSearchAgent:
                         if isinstance(answer, dict):
                             answer = json.dumps(answer, ensure_ascii=False)
 
-                        # 사용료 계산 및 추가
-                        cost_info = cost_calculator.calculate_cost(total_usage)
-                        cost_summary = cost_calculator.format_cost_summary(cost_info)
-
                         # 응답에 사용료 정보 추가
-                        final_response = {
-                            "answer": answer,
-                            "cost_info": cost_info,
-                            "cost_summary": cost_summary,
-                        }
+                        final_response = build_final_response(answer, cost_calculator, total_usage, freshness)
+                        AGENT_PHASE_SECONDS.labels(phase="run").observe(time.perf_counter() - run_start)
 
                         yield json.dumps(final_response, ensure_ascii=False)
                         break
                     except json.JSONDecodeError:
                         # 2. 일반 텍스트로 처리
                         if len(text.strip()) > 10:
-                            # 사용료 계산 및 추가
-                            cost_info = cost_calculator.calculate_cost(total_usage)
-                            cost_summary = cost_calculator.format_cost_summary(
-                                cost_info
-                            )
-
                             # 응답에 사용료 정보 추가
-                            final_response = {
-                                "answer": text.strip(),
-                                "cost_info": cost_info,
-                                "cost_summary": cost_summary,
-                            }
+                            final_response = build_final_response(
+                                text.strip(), cost_calculator, total_usage, freshness
+                            )
+                            AGENT_PHASE_SECONDS.labels(phase="run").observe(time.perf_counter() - run_start)
 
                             yield json.dumps(final_response, ensure_ascii=False)
                             break
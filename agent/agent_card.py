@@ -2,85 +2,65 @@ from __future__ import annotations
 
 import os
 import json
-import pymysql
 from pathlib import Path
 
 from a2a.types import AgentSkill, AgentCard, AgentCapabilities
 
-
-def _get_db_connection():
-    return pymysql.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=int(os.getenv("DB_PORT", 3306)),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASSWORD", ""),
-        db=os.getenv("DB_NAME", "agent_house"),
-        charset="utf8mb4",
-        cursorclass=pymysql.cursors.DictCursor,
-        autocommit=True,
-    )
+from shared.database.connection import db_manager
+from shared.database.queries import DatabaseQueries
 
 
-def _load_agent_record_by_folder() -> dict | None:
+def _agent_names() -> tuple[str, str]:
     folder_name = Path(__file__).resolve().parent.parent.name
-    conn = _get_db_connection()
-    try:
-        with conn.cursor() as cursor:
+    title_name = " ".join(word.capitalize() for word in folder_name.split("_"))
+    return folder_name, title_name
 
-            def _snake_to_title(s: str) -> str:
-                return " ".join(word.capitalize() for word in s.split("_"))
 
-            title_name = _snake_to_title(folder_name)
-            cursor.execute(
-                "SELECT * FROM agents WHERE name IN (%s, %s) LIMIT 1",
-                (folder_name, title_name),
+async def warm_up_agent_record() -> dict | None:
+    """agents 테이블의 에이전트 메타데이터를 비동기로 조회 (결과는 refresh_agent_card 가 snapshot 으로 보관)"""
+    rows = await db_manager.execute_async_query(
+        DatabaseQueries.GET_AGENT_CARD, _agent_names(), as_dict=True
+    )
+    return rows[0] if rows else None
+
+
+def _build_fallback_card(host: str, port: int) -> AgentCard:
+    return AgentCard(
+        name="Deep Search Agent",
+        description="Perplexity Deep Research 기반으로 심층 리서치 보고서를 제공하는 에이전트입니다.",
+        url=f"http://{host}:{port}/",
+        version="1.0.0",
+        defaultInputModes=["text"],
+        defaultOutputModes=["text"],
+        capabilities=AgentCapabilities(streaming=True, pushNotifications=True),
+        skills=[
+            AgentSkill(
+                id="deep_search_agent",
+                name="Deep Search Agent",
+                description="Perplexity Deep Research 기반으로 심층 리서치 보고서를 제공하는 에이전트입니다.",
+                tags=["search"],
             )
-            return cursor.fetchone()
-    finally:
-        conn.close()
+        ],
+    )
 
 
-def build_agent_card(host: str, port: int) -> AgentCard:
-    record = _load_agent_record_by_folder()
-    if record:
-        print(f"[AgentCard] DB record loaded for geocode_agent: {record['name']}")
-    else:
-        print("[AgentCard] Using static fallback AgentCard for geocode_agent")
+def _sanitize_cap(cap: dict) -> dict:
+    safe = {}
+    for k, v in cap.items():
+        if k == "streaming":
+            safe[k] = bool(v)
+        else:
+            if isinstance(v, list):
+                safe[k] = v
+            elif v:
+                safe[k] = []
+    return safe
 
-    if not record:
-        return AgentCard(
-            name="Geocode Agent",
-            description="도시명 기반으로 위경도 추출 결과를 제공하는 에이전트입니다.",
-            url=f"http://{host}:{port}/",
-            version="1.0.0",
-            defaultInputModes=["text"],
-            defaultOutputModes=["text"],
-            capabilities=AgentCapabilities(streaming=True),
-            skills=[
-                AgentSkill(
-                    id="geocode_agent",
-                    name="Geocode Agent",
-                    description="도시명 기반으로 위경도 추출 결과를 제공하는 에이전트입니다.",
-                    tags=["search"],
-                )
-            ],
-        )
-
-    raw_cap = json.loads(record["capabilities"])
-
-    def _sanitize_cap(cap: dict) -> dict:
-        safe = {}
-        for k, v in cap.items():
-            if k == "streaming":
-                safe[k] = bool(v)
-            else:
-                if isinstance(v, list):
-                    safe[k] = v
-                elif v:
-                    safe[k] = []
-        return safe
-
-    capabilities_dict = _sanitize_cap(raw_cap)
+
+def _record_to_agent_card(record: dict) -> AgentCard:
+    capabilities_dict = _sanitize_cap(json.loads(record["capabilities"]))
+    # 백그라운드 job 의 push notification 은 서버가 항상 지원한다
+    capabilities_dict["pushNotifications"] = True
     skills_list = json.loads(record["skills"])
     default_input_modes = json.loads(record["default_input_modes"])
     default_output_modes = json.loads(record["default_output_modes"])
@@ -95,3 +75,56 @@ def build_agent_card(host: str, port: int) -> AgentCard:
         capabilities=AgentCapabilities(**capabilities_dict),
         skills=[AgentSkill(**skill) for skill in skills_list],
     )
+
+
+# ---------------------------------------------------------------------------
+# Snapshot (DB 없이 즉시 기동하기 위한 로컬 캐시)
+
+AGENT_CARD_SNAPSHOT_PATH = Path(
+    os.getenv(
+        "AGENT_CARD_SNAPSHOT_PATH",
+        str(Path(__file__).resolve().parent.parent / ".cache" / "agent_card.json"),
+    )
+)
+
+
+def load_agent_card_snapshot() -> AgentCard | None:
+    """마지막으로 DB 에서 읽은 agent card snapshot 로드"""
+    try:
+        return AgentCard.model_validate_json(AGENT_CARD_SNAPSHOT_PATH.read_text("utf-8"))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[AgentCard] snapshot 로드 실패: {e}")
+        return None
+
+
+def save_agent_card_snapshot(card: AgentCard):
+    """agent card snapshot 저장 (임시 파일 교체 방식으로 원자적 기록)"""
+    try:
+        AGENT_CARD_SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = AGENT_CARD_SNAPSHOT_PATH.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(card.model_dump_json(exclude_none=True), "utf-8")
+        os.replace(tmp_path, AGENT_CARD_SNAPSHOT_PATH)
+    except Exception as e:
+        print(f"[AgentCard] snapshot 저장 실패: {e}")
+
+
+def get_startup_agent_card(host: str, port: int) -> AgentCard:
+    """기동 시 사용할 agent card (snapshot 우선, DB 접근 없음)"""
+    card = load_agent_card_snapshot()
+    if card:
+        print(f"[AgentCard] snapshot loaded for deep_search_agent: {card.name}")
+        return card
+    print("[AgentCard] snapshot 없음, static fallback AgentCard 사용")
+    return _build_fallback_card(host, port)
+
+
+async def refresh_agent_card() -> AgentCard | None:
+    """DB 에서 agent card 를 비동기로 다시 읽고 snapshot 갱신 (레코드가 없으면 None)"""
+    record = await warm_up_agent_record()
+    if not record:
+        return None
+    card = _record_to_agent_card(record)
+    save_agent_card_snapshot(card)
+    return card
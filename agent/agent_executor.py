@@ -5,23 +5,81 @@ from a2a.utils.errors import ServerError
 from a2a.types import TaskArtifactUpdateEvent, TaskStatusUpdateEvent, TaskStatus, TaskState, TextPart, UnsupportedOperationError, Message
 from a2a.utils import new_agent_text_message, new_task, new_text_artifact
 
-from agent.agent import DeepSearchAgent
-from a2a.types import AgentCard
 import logging
 import traceback
 import json
 import time
 import os
 import datetime
+import asyncio
+import uuid
+import re
 import aiohttp
 from pprint import pformat
+from opentelemetry import trace
+
+from agent.admission import AdmissionRejected, admission_controller
+from agent.agent_tools import TOOL_RESULT_COMPACTION, ResearchOptions, perplexity_quick_search, research_options
+from agent.cost_calculator import PerplexityCostCalculator, add_preliminary_cost
+from agent.degradation import DEFAULT_PRIORITY, degradation_controller
+from agent.direct_research import direct_research, research_prompt, use_direct_research
+from agent.tool_results import tool_statuses
+from agent.usage_ledger import apply_budget_decision, usage_ledger
+from shared.compression import log_preview
+from shared.database.cache_manager import cache_manager
+from shared.metrics import STEP_MEMO_LOOKUPS, TASKS, TASKS_IN_PROGRESS, TASK_PATHS, TASK_PHASE_SECONDS
+from shared.tracing import current_trace_id, extract_context, start_span
 
 logger = logging.getLogger("deep_search_agent.agent_executor")
 
+# 빠른 검색 요약을 먼저 보내고 최종 리포트로 대체 (metadata progressive 로 요청별 지정 가능)
+PROGRESSIVE_DELIVERY = os.getenv("PROGRESSIVE_DELIVERY", "0") == "1"
+# 같은 original_target 의 같은 plan 단계 결과를 재사용할 시간 (초, 0 이면 사용 안 함)
+STEP_MEMO_TTL = int(os.getenv("STEP_MEMO_TTL", "3600"))
+
+
+def build_enhanced_query(query: str, metadata: dict) -> str:
+    """plan 단계 요청이면 계획/현재 단계/이전 단계 결과를 질의에 덧붙인다"""
+    plan = metadata.get("plan", "")
+    next_steps = metadata.get("next_steps", [])
+    if not (plan or next_steps):
+        return query
+    current_step = metadata.get("current_step", "")
+    step_index = metadata.get("step_index", 0)
+    total_steps = metadata.get("total_steps", 0)
+    accumulated_results = metadata.get("accumulated_results", [])
+    step_info = f" (단계 {step_index + 1}/{total_steps})" if total_steps > 0 else ""
+    return f"""
+                                    원본 요청: {query}
+
+                                    전체 계획: {plan}
+                                    현재 단계: {current_step}{step_info}
+
+                                    이전 단계 결과:
+                                    {chr(10).join([f"- {result}" for result in accumulated_results]) if accumulated_results else "없음"}
+
+                                    위 계획에 따라 {current_step} 작업을 수행해주세요.
+                                    """
+
+
+def step_memo_key(metadata: dict):
+    """(app_name, original_target, 정규화한 current_step) 기준 memo 키 (plan 단계 요청이 아니면 None)"""
+    original_target = str(metadata.get("original_target") or "").strip()
+    current_step = str(metadata.get("current_step") or "")
+    # 재계획 시 대소문자, 공백, 번호/문장부호만 달라지는 경우를 같은 단계로 본다
+    step = re.sub(r"[^\w\s]", " ", current_step.lower())
+    step = " ".join(re.sub(r"^\s*\d+\s", " ", step).split())
+    if STEP_MEMO_TTL <= 0 or not original_target or not step:
+        return None
+    app_name = metadata.get('app_name', 'default-app')
+    return f"step_memo:{app_name}:{' '.join(original_target.split())}:{step}"
+
+
 class DeepSearchAgentExecutor(AgentExecutor):
 
     def __init__(self):
-        self.agent = None
+        # app_name 별 DeepSearchAgent (동시에 여러 app 의 요청이 와도 서로 교체하지 않도록 분리)
+        self._agents = {}
         # 캐싱 관련 변수들
         self._cached_cards = None
         self._cached_hash = None
@@ -33,6 +91,146 @@ class DeepSearchAgentExecutor(AgentExecutor):
         context:RequestContext, 
         event_queue:EventQueue
     ) -> None:
+        metadata = context._params.message.metadata or {}
+        # 호출자가 metadata 로 넘긴 traceparent 를 상위 context 로 사용
+        with start_span(
+            "deep_search.execute",
+            {
+                "app_name": metadata.get('app_name', 'default-app'),
+                "session_id": metadata.get("session_id"),
+                "user_id": metadata.get("user_id"),
+                "step_index": metadata.get("step_index"),
+            },
+            parent=extract_context(metadata),
+        ):
+            await self._admit_and_execute(context, event_queue)
+
+    async def _admit_and_execute(
+        self, 
+        context:RequestContext, 
+        event_queue:EventQueue
+    ) -> None:
+        metadata = context._params.message.metadata or {}
+        app_name = metadata.get('app_name', 'default-app')
+
+        task = context.current_task
+        if not task:
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+
+        async def on_queued(position: int):
+            # 대기 순번이 바뀔 때마다 상태 전달
+            await event_queue.enqueue_event(
+                TaskStatusUpdateEvent(
+                    taskId=task.id,
+                    contextId=task.contextId,
+                    status=TaskStatus(
+                        state=TaskState.submitted,
+                        message=new_agent_text_message(
+                            f"요청이 대기열에 있습니다. (대기 순번 {position})",
+                            task.id,
+                            task.contextId,
+                        ),
+                    ),
+                    final=False,
+                    metadata={"queue_position": position},
+                )
+            )
+
+        start = time.perf_counter()
+        status = "failed"
+        try:
+            # 재계획으로 같은 단계가 다시 오면 대기열/budget 확인 없이 이전 결과를 바로 반환
+            if await self._replay_step_memo(metadata, event_queue, task):
+                status = "memoized"
+                return
+
+            # 실행 전 budget 확인 (메모리 조회만 하므로 요청 경로 지연이 거의 없다)
+            user_id = metadata.get("user_id", "default-user")
+            decision = usage_ledger.check_budget(app_name, user_id)
+            trace.get_current_span().set_attribute("budget.action", decision.action)
+            if decision.action == "refuse":
+                status = "rejected"
+                logger.warning(
+                    f"요청 거절 (budget_exceeded): app_name={app_name}, user_id={user_id}, "
+                    f"spent={decision.spent:.4f}/{decision.budget:.4f}"
+                )
+                await self._reject(
+                    event_queue,
+                    task,
+                    "budget_exceeded",
+                    decision.retry_after,
+                    f"오늘 사용 한도(${decision.budget:.2f})를 초과했습니다. 한도는 자정에 초기화됩니다.",
+                )
+                return
+
+            # 반복 리포트는 metadata 의 entity(종목 코드 등) 기준으로 저장하고, incremental 이면 변경분만 조사
+            options = ResearchOptions(
+                app_name=app_name,
+                user_id=user_id,
+                report_entity=str(metadata.get("entity") or metadata.get("ticker") or ""),
+                incremental=bool(metadata.get("incremental", False)),
+                compact_tool_results=bool(metadata.get("compact_tool_results", TOOL_RESULT_COMPACTION)),
+            )
+            if decision.action == "downgrade":
+                logger.info(
+                    f"budget 한도 근접, 축소 설정으로 실행: app_name={app_name}, user_id={user_id}"
+                )
+            options = apply_budget_decision(options, decision)
+            research_options.set(options)
+
+            async with admission_controller.admit(app_name, on_queued):
+                queue_seconds = time.perf_counter() - start
+                TASK_PHASE_SECONDS.labels(phase="queue").observe(queue_seconds)
+                trace.get_current_span().add_event("admitted", {"queue_seconds": queue_seconds})
+                # 대기열/지연이 SLO 를 넘으면 낮은 우선순위 요청부터 축소 설정으로 실행
+                degradation_controller.observe_queue_wait(queue_seconds)
+                options = degradation_controller.apply(
+                    options,
+                    str(metadata.get("priority", DEFAULT_PRIORITY)),
+                    admission_controller.queue_depth,
+                )
+                research_options.set(options)
+                trace.get_current_span().set_attribute("degradation.level", options.degradation_level)
+                with TASKS_IN_PROGRESS.track_inprogress():
+                    await self._execute(context, event_queue, task)
+                status = "completed"
+                degradation_controller.observe_latency(time.perf_counter() - start)
+        except AdmissionRejected as e:
+            status = "rejected"
+            logger.warning(f"요청 거절 ({e.reason}): app_name={app_name}")
+            await self._reject(
+                event_queue, task, e.reason, e.retry_after, f"{e} {e.retry_after}초 후 다시 시도해주세요."
+            )
+        finally:
+            TASK_PHASE_SECONDS.labels(phase="total").observe(time.perf_counter() - start)
+            TASKS.labels(status=status).inc()
+
+    async def _reject(self, event_queue: EventQueue, task, reason: str, retry_after: int, text: str):
+        """거절 상태를 최종 이벤트로 전달"""
+        await event_queue.enqueue_event(
+            TaskStatusUpdateEvent(
+                taskId=task.id,
+                contextId=task.contextId,
+                status=TaskStatus(
+                    state=TaskState.rejected,
+                    message=new_agent_text_message(text, task.id, task.contextId),
+                ),
+                final=True,
+                metadata={
+                    "reason": reason,
+                    "retry_after": retry_after,
+                    "trace_id": current_trace_id(),
+                },
+            )
+        )
+
+    async def _execute(
+        self, 
+        context:RequestContext, 
+        event_queue:EventQueue,
+        task,
+    ) -> None:
         
         metadata = context._params.message.metadata or {}
         session_id = metadata.get("session_id", "default-session")
@@ -41,101 +239,116 @@ class DeepSearchAgentExecutor(AgentExecutor):
 
         print(f"app_name: {app_name}")
         
-        # plan과 next_steps 정보 추출
-        plan = metadata.get("plan", "")
-        next_steps = metadata.get("next_steps", [])
-        current_step = metadata.get("current_step", "")
         step_index = metadata.get("step_index", 0)
-        total_steps = metadata.get("total_steps", 0)
-        accumulated_results = metadata.get("accumulated_results", [])
-        original_target = metadata.get("original_target", "")
         
         query = context.get_user_input()
-        task = context.current_task
 
         # WebSocket 서버로 메시지 push
-        try:
-            async with aiohttp.ClientSession() as session:
-                push_message = {
-                    "type": "agent_status",
-                    "message": "보고서 작성을 위한 검색 중입니다.",
-                    "agent": "deep_search_agent",
-                    "session_id": session_id,
-                    "user_id": user_id,
-                    "timestamp": datetime.datetime.now().isoformat()
-                }
+        push_start = time.perf_counter()
+        with start_span("deep_search.push"):
+            try:
+                async with aiohttp.ClientSession() as session:
+                    push_message = {
+                        "type": "agent_status",
+                        "message": "보고서 작성을 위한 검색 중입니다.",
+                        "agent": "deep_search_agent",
+                        "session_id": session_id,
+                        "user_id": user_id,
+                        "timestamp": datetime.datetime.now().isoformat()
+                    }
                 
-                async with session.post(
-                    "http://localhost:4000/push",
-                    json=push_message,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status == 200:
-                        logger.info("WebSocket 메시지 push 성공")
-                    else:
-                        logger.warning(f"WebSocket 메시지 push 실패: {response.status}")
-        except Exception as e:
-            logger.error(f"WebSocket 메시지 push 오류: {e}")
-
-        if self.agent is None or getattr(self.agent, 'app_name', None) != app_name:
-                self.agent = DeepSearchAgent(app_name)
+                    async with session.post(
+                        "http://localhost:4000/push",
+                        json=push_message,
+                        headers={"Content-Type": "application/json"}
+                    ) as response:
+                        if response.status == 200:
+                            logger.info("WebSocket 메시지 push 성공")
+                        else:
+                            logger.warning(f"WebSocket 메시지 push 실패: {response.status}")
+            except Exception as e:
+                logger.error(f"WebSocket 메시지 push 오류: {e}")
+        TASK_PHASE_SECONDS.labels(phase="push").observe(time.perf_counter() - push_start)
+
+        # plan 단계 요청 등은 Gemini 왕복 없이 리서치 도구를 바로 호출
+        direct = use_direct_research(query, metadata)
+        path = "direct" if direct else "agent"
+        TASK_PATHS.labels(path=path).inc()
+        trace.get_current_span().set_attribute("research.path", path)
+        agent = None
+        if not direct:
+            agent = self._agents.get(app_name)
+            if agent is None:
+                # google.adk 는 import 비용이 커서 첫 요청 시점에 로드한다
+                from agent.agent import DeepSearchAgent
+                agent = self._agents[app_name] = DeepSearchAgent(app_name)
 
         try :
-            if not task :
-                task = new_task(context.message)
-                await event_queue.enqueue_event(new_task(context.message))
-            
             # 메타데이터를 포함한 컨텍스트 정보를 쿼리에 추가
-            enhanced_query = query
-            if plan or next_steps:
-                step_info = f" (단계 {step_index + 1}/{total_steps})" if total_steps > 0 else ""
-                enhanced_query = f"""
-                                    원본 요청: {query}
-
-                                    전체 계획: {plan}
-                                    현재 단계: {current_step}{step_info}
-
-                                    이전 단계 결과:
-                                    {chr(10).join([f"- {result}" for result in accumulated_results]) if accumulated_results else "없음"}
-
-                                    위 계획에 따라 {current_step} 작업을 수행해주세요.
-                                    """
-            else:
-                pass
+            enhanced_query = build_enhanced_query(query, metadata)
             # 텍스트 chunk를 누적하여 최종 결과 생성
-            accumulated_text = ""
-            async for text_chunk in self.agent.invoke(enhanced_query, session_id, task.id, user_id, app_name):
-                logger.info(f"[DeepSearchAgent] text_chunk: {text_chunk}")
-                if isinstance(text_chunk, str):
-                    accumulated_text += text_chunk
-                    
-                    # 진행 상황을 실시간으로 전달
-                    await event_queue.enqueue_event(
-                        TaskStatusUpdateEvent(
-                            taskId=task.id,
-                            contextId=task.contextId,
-                            status=TaskStatus(
-                                state=TaskState.working,
-                                message=new_agent_text_message(
-                                    f"뉴스 검색 중... {len(accumulated_text)}자",
-                                    task.id,
-                                    task.contextId,
-                                ),
-                            ),
-                            final=False,
-                        )
-                    )
+            # 긴 리포트를 += 로 이어붙이면 매번 복사되므로 조각을 모아 마지막에 join
+            text_chunks = []
+            # 에이전트 경로에서 관찰한 리서치 도구 status (직접 조사는 실패하면 예외가 발생한다)
+            statuses = []
+            # 예비 요약과 최종 리포트는 같은 artifact id 를 사용해 최종 리포트가 예비 요약을 대체한다
+            result_artifact_id = str(uuid.uuid4())
+            progressive = str(metadata.get("progressive", PROGRESSIVE_DELIVERY)).lower() in ("1", "true")
+            preliminary = None
+            preliminary_cost = None
+            if progressive:
+                preliminary = asyncio.create_task(
+                    self._deliver_preliminary(event_queue, task, result_artifact_id, enhanced_query)
+                )
+            with start_span("deep_search.invoke"):
+                invoke_start = time.perf_counter()
+                chunks = (
+                    self._direct_chunks(enhanced_query, session_id, user_id, app_name)
+                    if direct
+                    else agent.invoke(enhanced_query, session_id, task.id, user_id, app_name)
+                )
+                try:
+                    await self._stream_chunks(chunks, event_queue, task, text_chunks, statuses)
+                finally:
+                    # 최종 리포트가 먼저 끝나면 예비 요약은 보내지 않는다
+                    if preliminary is not None:
+                        preliminary.cancel()
+                        (preliminary_cost,) = await asyncio.gather(preliminary, return_exceptions=True)
             
+            TASK_PHASE_SECONDS.labels(phase="invoke").observe(time.perf_counter() - invoke_start)
+
             # 최종 결과를 이벤트로 생성
+            result_text = "".join(text_chunks)
+            if isinstance(preliminary_cost, dict):
+                result_text = self._with_preliminary_cost(result_text, preliminary_cost)
+            artifact = new_text_artifact(
+                name='deep_search_agent_result',
+                description='딥 서치 에이전트 결과',
+                text=result_text,
+            )
+            artifact.artifactId = result_artifact_id
+            options = research_options.get()
+            degradation_level = options.degradation_level
+            memo_key = step_memo_key(metadata)
+            # 리서치 도구가 성공한 결과만 memo 한다 (도구 오류를 전하는 답변이나 도구 없이 만든 답변 제외)
+            research_succeeded = bool(result_text) and (
+                direct or (bool(statuses) and all(s == "success" for s in statuses))
+            )
+            # 부하나 budget 으로 축소된 결과는 이후 단계 재요청에 재사용하지 않는다
+            if memo_key and research_succeeded and degradation_level == 0 and not options.budget_downgraded:
+                cache_manager.set(
+                    memo_key,
+                    {"result": result_text, "stored_at": time.time(), "step_index": step_index},
+                    STEP_MEMO_TTL,
+                )
+            artifact.metadata = {"degradation_level": degradation_level}
+            if progressive:
+                artifact.metadata["preliminary"] = False
             await event_queue.enqueue_event(
                 TaskArtifactUpdateEvent(
                     taskId=task.id,
                     contextId=task.contextId,
-                    artifact=new_text_artifact(
-                        name='deep_search_agent_result',
-                        description='딥 서치 에이전트 결과',
-                        text=accumulated_text,
-                    ),
+                    artifact=artifact,
                     append=False,
                     lastChunk=True,
                 )
@@ -145,7 +358,8 @@ class DeepSearchAgentExecutor(AgentExecutor):
                     taskId=task.id,
                     contextId=task.contextId,
                     status=TaskStatus(state=TaskState.completed),
-                    final=True
+                    final=True,
+                    metadata={"trace_id": current_trace_id(), "degradation_level": degradation_level},
                 )
             )
             
@@ -153,5 +367,139 @@ class DeepSearchAgentExecutor(AgentExecutor):
             traceback.print_exc()
             raise ServerError(f"Error executing deep_search_agent: {e}")
 
+    async def _replay_step_memo(self, metadata: dict, event_queue: EventQueue, task) -> bool:
+        """memo 된 단계 결과가 있으면 artifact 로 보내고 True (metadata bypass_step_memo 로 건너뜀)"""
+        memo_key = step_memo_key(metadata)
+        if memo_key is None:
+            return False
+        if str(metadata.get("bypass_step_memo", "")).lower() in ("1", "true"):
+            STEP_MEMO_LOOKUPS.labels(result="bypass").inc()
+            return False
+        memo = cache_manager.get(memo_key, STEP_MEMO_TTL)
+        if memo is None:
+            STEP_MEMO_LOOKUPS.labels(result="miss").inc()
+            return False
+        STEP_MEMO_LOOKUPS.labels(result="hit").inc()
+        logger.info(f"단계 결과 memo 적중: {memo_key} (이전 step_index={memo['step_index']})")
+        trace.get_current_span().set_attribute("research.path", "memo")
+        memoized_at = datetime.datetime.fromtimestamp(memo["stored_at"]).isoformat(timespec="seconds")
+        text = memo["result"]
+        try:
+            # 이번 요청에는 사용료가 들지 않았으므로 비용을 0 으로 바꿔 중복 집계를 막는다
+            data = json.loads(text)
+            calculator = PerplexityCostCalculator(data["cost_info"].get("model", "sonar-deep-research"))
+            data["cost_info"] = calculator.calculate_cost({})
+            data["cost_summary"] = calculator.format_cost_summary(data["cost_info"])
+            data["memoized_at"] = memoized_at
+            text = json.dumps(data, ensure_ascii=False)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            pass
+        artifact = new_text_artifact(
+            name='deep_search_agent_result',
+            description='딥 서치 에이전트 결과 (이전 단계 결과 재사용)',
+            text=text,
+        )
+        artifact.metadata = {"memoized": True, "memoized_at": memoized_at, "memoized_step_index": memo["step_index"]}
+        await event_queue.enqueue_event(
+            TaskArtifactUpdateEvent(
+                taskId=task.id,
+                contextId=task.contextId,
+                artifact=artifact,
+                append=False,
+                lastChunk=True,
+            )
+        )
+        await event_queue.enqueue_event(
+            TaskStatusUpdateEvent(
+                taskId=task.id,
+                contextId=task.contextId,
+                status=TaskStatus(state=TaskState.completed),
+                final=True,
+                metadata={"trace_id": current_trace_id(), "memoized": True, "memoized_at": memoized_at},
+            )
+        )
+        return True
+
+    async def _stream_chunks(self, chunks, event_queue: EventQueue, task, text_chunks: list, statuses: list):
+        """에이전트 chunk 를 모으면서 진행 상황을 실시간으로 전달 (이벤트의 도구 status 는 statuses 에 모음)"""
+        accumulated_length = 0
+        async for text_chunk in chunks:
+            logger.info(f"[DeepSearchAgent] text_chunk: {log_preview(text_chunk)}")
+            if hasattr(text_chunk, "dict"):
+                statuses.extend(tool_statuses(text_chunk.dict()))
+            if isinstance(text_chunk, str):
+                text_chunks.append(text_chunk)
+                accumulated_length += len(text_chunk)
+                await event_queue.enqueue_event(
+                    TaskStatusUpdateEvent(
+                        taskId=task.id,
+                        contextId=task.contextId,
+                        status=TaskStatus(
+                            state=TaskState.working,
+                            message=new_agent_text_message(
+                                f"뉴스 검색 중... {accumulated_length}자",
+                                task.id,
+                                task.contextId,
+                            ),
+                        ),
+                        final=False,
+                    )
+                )
+
+    async def _deliver_preliminary(self, event_queue: EventQueue, task, artifact_id: str, query: str):
+        """빠른 검색 요약을 최종 리포트와 같은 artifact id 로 먼저 전달하고 그 사용료 반환
+
+        검색이 끝나기 전에 취소되면(최종 리포트가 먼저 끝난 경우) 사용료를 알 수 없으므로 합산하지 않는다.
+        """
+        start = time.perf_counter()
+        with start_span("deep_search.preliminary"):
+            result = await perplexity_quick_search(research_prompt(query))
+        if result.get("status") != "success":
+            logger.warning(f"예비 요약 생략: {result.get('error')}")
+            return None
+        cost_info = PerplexityCostCalculator(result["model"]).calculate_cost(result.get("usage", {}))
+        artifact = new_text_artifact(
+            name='deep_search_agent_result',
+            description='예비 요약 (상세 리포트 작성 중)',
+            text=json.dumps(
+                {"answer": result["response"], "cost_info": cost_info, "preliminary": True},
+                ensure_ascii=False,
+            ),
+        )
+        artifact.artifactId = artifact_id
+        artifact.metadata = {"preliminary": True, "model": result["model"]}
+        await event_queue.enqueue_event(
+            TaskArtifactUpdateEvent(
+                taskId=task.id,
+                contextId=task.contextId,
+                artifact=artifact,
+                append=False,
+                lastChunk=False,
+            )
+        )
+        TASK_PHASE_SECONDS.labels(phase="preliminary").observe(time.perf_counter() - start)
+        return cost_info
+
+    @staticmethod
+    def _with_preliminary_cost(result_text: str, preliminary_cost: dict) -> str:
+        """최종 응답 JSON 의 cost_info/cost_summary 에 예비 요약 사용료 추가"""
+        try:
+            response = json.loads(result_text)
+        except json.JSONDecodeError:
+            return result_text
+        if not isinstance(response, dict) or "cost_info" not in response:
+            return result_text
+        response["cost_info"] = add_preliminary_cost(response["cost_info"], preliminary_cost)
+        if "cost_summary" in response:
+            response["cost_summary"] += (
+                f"\n• 예비 요약 ({preliminary_cost.get('model')}): ${preliminary_cost.get('total_cost', 0.0):.6f}"
+                f"\n🎯 **예비 요약 포함 총 비용: {response['cost_info']['total_cost_usd']}**"
+            )
+        return json.dumps(response, ensure_ascii=False)
+
+    @staticmethod
+    async def _direct_chunks(query: str, session_id: str, user_id: str, app_name: str):
+        yield await direct_research(query, session_id, user_id, app_name)
+
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
             raise ServerError(error=UnsupportedOperationError())        
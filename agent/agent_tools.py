@@ -5,11 +5,200 @@ import aiohttp
 import ssl
 import json
 import asyncio
+import hashlib
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
 from typing import Dict, Any, Optional, List
-from google.adk.tools import ToolContext
+
+from agent.cost_calculator import PerplexityCostCalculator
+from agent import incremental_report
+from agent.entities import extract_entities, strip_entities
+from agent.usage_ledger import usage_ledger
+from shared.cassette import cassette
+from shared.compression import log_preview
+from shared.database.cache_manager import cache_manager
+from shared.database.report_store import report_archive, report_store
+from shared.metrics import (
+    PERPLEXITY_COST_USD,
+    PERPLEXITY_REQUEST_SECONDS,
+    PERPLEXITY_RETRIES,
+    PERPLEXITY_TOKENS,
+    RESEARCH_CACHE_LOOKUPS,
+)
+from shared.near_duplicate import NearDuplicateIndex
+from shared.tracing import start_span
 
 logger = logging.getLogger(__name__)
 
+# 연구 결과 캐시 유지 시간 (초, 0 이면 캐시 사용 안 함)
+RESEARCH_CACHE_DURATION = int(os.getenv("RESEARCH_CACHE_DURATION", "1800"))
+# 다른 사용자가 만든 같은 종목/주제 리포트를 재사용할 최대 경과 시간 (초, 0 이면 사용 안 함)
+REPORT_REUSE_MAX_AGE = int(os.getenv("REPORT_REUSE_MAX_AGE", "3600"))
+# 표현만 다른 질의를 같은 질의로 볼 유사도 기준 (0 이면 정확히 같은 요청만 캐시 적중)
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+# 예약 사전 조사(agent/precompute.py) 결과를 캐시에서 제공할 최대 경과 시간 (초)
+PRECOMPUTE_MAX_AGE = int(os.getenv("PRECOMPUTE_MAX_AGE", "14400"))
+# Gemini 에는 결과 digest 와 handle 만 돌려주고 최종 answer 는 로컬에서 조립 (agent/tool_results.py)
+TOOL_RESULT_COMPACTION = os.getenv("TOOL_RESULT_COMPACTION", "0") == "1"
+
+# 최근 연구 질의 색인 (질의 -> 연구 결과 캐시 키)
+research_query_index = NearDuplicateIndex(
+    threshold=NEAR_DUPLICATE_THRESHOLD or 1.0,
+    max_entries=int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "100000")),
+)
+
+
+@dataclass(frozen=True)
+class ResearchOptions:
+    """요청 단위 Perplexity 호출 설정 (executor 가 요청마다 research_options 에 지정)"""
+    app_name: str = "default-app"
+    user_id: str = "default-user"
+    model: str = "sonar-deep-research"
+    reasoning_effort: str = "high"
+    max_tokens: int = 12000
+    search_recency_filter: str = "month"
+    # 리포트를 저장할 대상 (종목 코드 등), incremental 이면 이전 리포트 이후 변경분만 조사
+    report_entity: str = ""
+    incremental: bool = False
+    compact_tool_results: bool = TOOL_RESULT_COMPACTION
+    # 부하로 적용된 축소 단계 (agent/degradation.py, 0 이면 축소 없음)
+    degradation_level: int = 0
+    # budget 한도 근접으로 BUDGET_DOWNGRADE_* 설정이 적용되었는지
+    budget_downgraded: bool = False
+    # 예약 사전 조사: 캐시/보관 리포트를 쓰지 않고 새로 조사해 PRECOMPUTE_MAX_AGE 동안 캐시에 보관
+    precompute: bool = False
+
+
+# 도구는 ADK 가 호출하므로 요청 정보는 contextvar 로 전달한다
+research_options: ContextVar[ResearchOptions] = ContextVar(
+    "research_options", default=ResearchOptions()
+)
+
+
+def _record_usage(options: ResearchOptions, model: str, usage: Dict[str, Any]):
+    """Perplexity usage 를 토큰/비용 메트릭과 tenant 사용량 원장에 누적"""
+    cost_info = PerplexityCostCalculator(model).calculate_cost(usage)
+    for token_type, count in cost_info.get("usage", {}).items():
+        if count:
+            PERPLEXITY_TOKENS.labels(model=model, type=token_type).inc(count)
+    PERPLEXITY_COST_USD.labels(model=model).inc(cost_info["total_cost"])
+    usage_ledger.record(options.app_name, options.user_id, model, cost_info)
+
+
+def _research_cache_key(request_data: Dict[str, Any]) -> str:
+    """요청 본문(모델, 파라미터, 메시지) 기준 캐시 키"""
+    normalized = dict(request_data)
+    normalized["messages"] = [
+        {**m, "content": " ".join(m["content"].split())} for m in request_data["messages"]
+    ]
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return f"research:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def _research_namespace(request_data: Dict[str, Any]) -> str:
+    """질의를 제외한 요청 설정 (모델, 파라미터, 시스템 프롬프트) 기준 구분값"""
+    settings = {k: v for k, v in request_data.items() if k != "messages"}
+    settings["system"] = [m["content"] for m in request_data["messages"] if m["role"] == "system"]
+    payload = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _freshness(cached: Dict[str, Any]) -> Dict[str, Any]:
+    """캐시된 결과의 조사 시각과 경과 시간 (응답의 staleness 표시용)"""
+    researched_at = cached.get("researched_at", 0)
+    return {
+        "researched_at": datetime.datetime.fromtimestamp(researched_at).isoformat(timespec="seconds"),
+        "age_seconds": int(time.time() - researched_at),
+        "precomputed": bool(cached.get("precomputed")),
+    }
+
+
+def _get_research_result(cache_key: str) -> Optional[Dict[str, Any]]:
+    """캐시된 연구 결과 (사전 조사 결과는 PRECOMPUTE_MAX_AGE, 그 외는 RESEARCH_CACHE_DURATION 이내)"""
+    cached = cache_manager.get(cache_key, max(RESEARCH_CACHE_DURATION, PRECOMPUTE_MAX_AGE))
+    if cached is None:
+        return None
+    max_age = PRECOMPUTE_MAX_AGE if cached.get("precomputed") else RESEARCH_CACHE_DURATION
+    if time.time() - cached.get("researched_at", 0) >= max_age:
+        return None
+    return cached
+
+
+def _lookup_research_cache(cache_key: str, namespace: str, query: str) -> Optional[Dict[str, Any]]:
+    """같은 요청 또는 표현만 다른 최근 요청의 연구 결과 조회"""
+    cached = _get_research_result(cache_key)
+    if cached is not None:
+        RESEARCH_CACHE_LOOKUPS.labels(result="exact").inc()
+        logger.info(f"연구 결과 캐시 적중: {cache_key}")
+        # 다른 worker 가 만든 결과일 수 있으므로 이 worker 의 색인에도 등록
+        research_query_index.add(namespace, query, (cache_key, query))
+        return {**cached, "cached": True, "freshness": _freshness(cached)}
+
+    if NEAR_DUPLICATE_THRESHOLD > 0:
+        match = research_query_index.lookup(namespace, query)
+        if match is not None:
+            (similar_key, similar_query), similarity = match
+            cached = _get_research_result(similar_key)
+            if cached is not None:
+                RESEARCH_CACHE_LOOKUPS.labels(result="near").inc()
+                logger.info(f"유사 질의 캐시 적중 ({similarity:.2f}): '{query}' ~ '{similar_query}'")
+                return {
+                    **cached,
+                    "cached": True,
+                    "freshness": _freshness(cached),
+                    "similar_query": similar_query,
+                    "similarity": round(similarity, 3),
+                }
+            # 결과가 만료된 항목은 색인에서도 제거
+            research_query_index.discard(namespace, similar_query)
+
+    RESEARCH_CACHE_LOOKUPS.labels(result="miss").inc()
+    return None
+
+
+async def _find_archived_report(query: str, request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """같은 종목에 대해 같은 주제, 같은 요청 설정으로 최근 완료된 리포트(다른 사용자 포함) 조회
+
+    모델만 비교하면 축소(degradation, budget)되었거나 증분 갱신으로 만든 리포트가 전체 조사 요청에
+    재사용되므로 _research_namespace 가 같은 리포트만 고른다.
+    """
+    entities = extract_entities(query)
+    if REPORT_REUSE_MAX_AGE <= 0 or not entities:
+        return None
+    try:
+        matches = await report_archive.search(
+            strip_entities(query),
+            entities,
+            since=time.time() - REPORT_REUSE_MAX_AGE,
+            namespace=_research_namespace(request_data),
+            query_only=True,
+            limit=1,
+        )
+    except Exception as e:
+        logger.warning(f"리포트 보관소 조회 실패: {e}")
+        return None
+    if not matches:
+        return None
+    archived = matches[0]
+    RESEARCH_CACHE_LOOKUPS.labels(result="archive").inc()
+    logger.info(f"보관된 리포트 재사용 (report_id={archived.report_id}): '{query}' ~ '{archived.query}'")
+    return {
+        "status": "success",
+        "query": query,
+        "response": archived.report,
+        "reasoning_effort": request_data["reasoning_effort"],
+        "stream": request_data["stream"],
+        "response_length": len(archived.report),
+        "message": "최근 완료된 리포트를 재사용했습니다.",
+        "cached": True,
+        "reused_report_id": archived.report_id,
+        "reused_report_at": datetime.datetime.fromtimestamp(archived.created_at).isoformat(),
+        "reused_query": archived.query,
+        "freshness": _freshness({"researched_at": archived.created_at}),
+    }
+
+
 async def perplexity_deep_research_tool(
     query: str, 
     tool_context: None = None
@@ -27,6 +216,7 @@ async def perplexity_deep_research_tool(
     print(f"=== perplexity_deep_research_tool called with query: {query} ===")
     logger.info(f"=== perplexity_deep_research_tool called with query: {query} ===")
     
+    options = research_options.get()
     try:
         # 환경 변수에서 Perplexity API 키 가져오기
         api_key = os.getenv('PERPLEXITY_API_KEY')
@@ -50,6 +240,8 @@ async def perplexity_deep_research_tool(
         timeout = aiohttp.ClientTimeout(total=1800, connect=1800)
         
         async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            # CASSETTE_MODE 가 설정되면 요청/응답을 기록하거나 기록된 응답으로 재생
+            session = cassette.wrap_session(session)
             # Perplexity API 엔드포인트
             api_url = "https://api.perplexity.ai/chat/completions"
             
@@ -62,7 +254,7 @@ async def perplexity_deep_research_tool(
             
             # 요청 데이터 준비 (시스템 프롬프트 보강)
             request_data = {
-                "model": "sonar-deep-research",
+                "model": options.model,
                 "messages": [
                     {
                         "role": "system",
@@ -78,17 +270,39 @@ async def perplexity_deep_research_tool(
                     }
                 ],
                 "stream": False,
-                "reasoning_effort": "high",
-                "max_tokens": 12000,  # 최대 토큰 수 대폭 증가
+                "reasoning_effort": options.reasoning_effort,
+                "max_tokens": options.max_tokens,  # 최대 토큰 수 (기본 12000)
                 "temperature": 0.3,  # 창의성과 정확성의 균형
                 "top_p": 0.9,
                 "return_citations": True,  # 인용문 포함
-                "search_recency_filter": "month"  # 최신 정보 우선
+                "search_recency_filter": options.search_recency_filter  # 최신 정보 우선
             }
             
-            print(f"=== Perplexity API 요청 ===\nURL: {api_url}\nHeaders: {headers}\nData: {json.dumps(request_data, indent=2, ensure_ascii=False)}")
+            # 증분 모드: 최근 리포트가 있으면 짧은 기간의 변경분만 조사해 합친다
+            previous = None
+            if options.report_entity and options.incremental:
+                previous = await report_store.get(options.app_name, options.report_entity)
+                if previous is not None and not incremental_report.is_fresh(previous):
+                    logger.info(f"이전 리포트가 오래되어 전체 조사: {options.report_entity}")
+                    previous = None
+                if previous is not None:
+                    incremental_report.apply_incremental(request_data, query, previous)
+
+            # 같은(또는 표현만 다른) 요청의 결과가 캐시(다른 worker 포함)에 있으면 바로 반환
+            cache_key = _research_cache_key(request_data)
+            namespace = _research_namespace(request_data)
+            if RESEARCH_CACHE_DURATION > 0 and not options.precompute:
+                cached = _lookup_research_cache(cache_key, namespace, query)
+                if cached is not None:
+                    return cached
+            if previous is None and not options.precompute:
+                archived = await _find_archived_report(query, request_data)
+                if archived is not None:
+                    return archived
+
+            print(f"=== Perplexity API 요청 ===\nURL: {api_url}\nHeaders: {headers}\nData: {log_preview(json.dumps(request_data, indent=2, ensure_ascii=False))}")
             logger.info(f"Perplexity API 요청: {api_url}")
-            logger.info(f"요청 데이터: {json.dumps(request_data, indent=2, ensure_ascii=False)}")
+            logger.info(f"요청 데이터: {log_preview(json.dumps(request_data, indent=2, ensure_ascii=False))}")
             
             # API 호출 (재시도 로직 포함)
             max_retries = 3  # 재시도 횟수 증가
@@ -97,90 +311,152 @@ async def perplexity_deep_research_tool(
             while retry_count < max_retries:
                 try:
                     print(f"=== Perplexity API 호출 시도 {retry_count + 1}/{max_retries} ===")
-                    async with session.post(api_url, json=request_data, headers=headers) as response:
-                        if response.status == 200:
-                            if request_data['stream']:
-                                # 스트리밍 응답 처리
-                                result_text = ""
-                                async for line in response.content:
-                                    line_text = line.decode('utf-8').strip()
-                                    if line_text.startswith('data: '):
-                                        data_text = line_text[6:]  # 'data: ' 제거
-                                        if data_text == '[DONE]':
-                                            break
-                                        try:
-                                            data = json.loads(data_text)
-                                            if 'choices' in data and len(data['choices']) > 0:
-                                                delta = data['choices'][0].get('delta', {})
-                                                if 'content' in delta:
-                                                    result_text += delta['content']
-                                        except json.JSONDecodeError:
-                                            continue
+                    with start_span(
+                        "perplexity.attempt",
+                        {"attempt": retry_count + 1, "model": request_data["model"]},
+                    ) as attempt_span:
+                        attempt_start = time.perf_counter()
+                        async with session.post(api_url, json=request_data, headers=headers) as response:
+                            attempt_span.set_attribute("http.status_code", response.status)
+                            if response.status == 200:
+                                if request_data['stream']:
+                                    # 스트리밍 응답 처리
+                                    result_text = ""
+                                    async for line in response.content:
+                                        line_text = line.decode('utf-8').strip()
+                                        if line_text.startswith('data: '):
+                                            data_text = line_text[6:]  # 'data: ' 제거
+                                            if data_text == '[DONE]':
+                                                break
+                                            try:
+                                                data = json.loads(data_text)
+                                                if 'choices' in data and len(data['choices']) > 0:
+                                                    delta = data['choices'][0].get('delta', {})
+                                                    if 'content' in delta:
+                                                        result_text += delta['content']
+                                            except json.JSONDecodeError:
+                                                continue
                                 
-                                return {
-                                    "status": "success",
-                                    "query": query,
-                                    "response": result_text,
-                                    "reasoning_effort": 'high',
-                                    "stream": request_data['stream'],
-                                    "message": "Deep research가 완료되었습니다."
-                                }
-                            else:
-                                # 일반 응답 처리
-                                response_data = await response.json()
-                                print(f"=== Perplexity API 성공 응답 ===\n{json.dumps(response_data, indent=2, ensure_ascii=False)}")
-                                logger.info(f"Perplexity API 성공 응답: {json.dumps(response_data, indent=2, ensure_ascii=False)}")
-                                
-                                # 응답에서 내용 추출
-                                if 'choices' in response_data and len(response_data['choices']) > 0:
-                                    content = response_data['choices'][0].get('message', {}).get('content', '')
-                                    usage = response_data.get('usage', {})
-                                    
-                                    # 응답 길이 확인 및 로깅
-                                    content_length = len(content)
-                                    print(f"=== 응답 길이: {content_length} 문자 ===")
-                                    logger.info(f"응답 길이: {content_length} 문자")
-                                    
-                                    if content_length < 1000:
-                                        print(f"=== 경고: 응답이 너무 짧습니다 ({content_length} 문자) ===")
-                                        logger.warning(f"응답이 너무 짧음: {content_length} 문자")
-                                    
+                                    PERPLEXITY_REQUEST_SECONDS.labels(
+                                        model=request_data["model"], outcome="success"
+                                    ).observe(time.perf_counter() - attempt_start)
                                     return {
                                         "status": "success",
                                         "query": query,
-                                        "response": content,
-                                        "reasoning_effort": 'high',
+                                        "response": result_text,
+                                        "reasoning_effort": request_data['reasoning_effort'],
                                         "stream": request_data['stream'],
-                                        "usage": {
-                                            "prompt_tokens": usage.get('prompt_tokens', 0),
-                                            "completion_tokens": usage.get('completion_tokens', 0),
-                                            "total_tokens": usage.get('total_tokens', 0)
-                                        },
-                                        "response_length": content_length,
                                         "message": "Deep research가 완료되었습니다."
                                     }
                                 else:
-                                    print(f"=== 응답 내용 없음 ===\n응답 데이터: {json.dumps(response_data, indent=2, ensure_ascii=False)}")
-                                    logger.error(f"Perplexity API 응답에서 내용을 찾을 수 없음: {response_data}")
-                                    return {
-                                        "error": "응답에서 내용을 찾을 수 없습니다.",
-                                        "error_details": f"응답 데이터: {json.dumps(response_data, indent=2, ensure_ascii=False)}",
-                                        "response": response_data,
-                                        "status": "error"
-                                    }
-                        else:
-                            error_text = await response.text()
-                            print(f"=== HTTP 에러 응답 ===\nStatus: {response.status}\nHeaders: {dict(response.headers)}\nBody: {error_text}")
-                            logger.error(f"Perplexity API HTTP 에러: {response.status} - {error_text}")
-                            return {
-                                "error": f"Perplexity API 호출 실패: HTTP {response.status}",
-                                "error_details": f"응답 헤더: {dict(response.headers)}\n응답 본문: {error_text}",
-                                "response": error_text,
-                                "status": "error"
-                            }
+                                    # 일반 응답 처리
+                                    response_data = await response.json()
+                                    PERPLEXITY_REQUEST_SECONDS.labels(
+                                        model=request_data["model"], outcome="success"
+                                    ).observe(time.perf_counter() - attempt_start)
+                                    print(f"=== Perplexity API 성공 응답 ===\n{log_preview(json.dumps(response_data, indent=2, ensure_ascii=False))}")
+                                    logger.info(f"Perplexity API 성공 응답: {log_preview(json.dumps(response_data, indent=2, ensure_ascii=False))}")
+                                
+                                    # 응답에서 내용 추출
+                                    if 'choices' in response_data and len(response_data['choices']) > 0:
+                                        content = response_data['choices'][0].get('message', {}).get('content', '')
+                                        usage = response_data.get('usage', {})
+                                    
+                                        # 응답 길이 확인 및 로깅
+                                        content_length = len(content)
+                                        _record_usage(options, request_data["model"], usage)
+                                        print(f"=== 응답 길이: {content_length} 문자 ===")
+                                        logger.info(f"응답 길이: {content_length} 문자")
+                                    
+                                        if content_length < 1000 and previous is None:
+                                            print(f"=== 경고: 응답이 너무 짧습니다 ({content_length} 문자) ===")
+                                            logger.warning(f"응답이 너무 짧음: {content_length} 문자")
+                                    
+                                        result = {
+                                            "status": "success",
+                                            "query": query,
+                                            "response": content,
+                                            "reasoning_effort": request_data['reasoning_effort'],
+                                            "stream": request_data['stream'],
+                                            "usage": {
+                                                "prompt_tokens": usage.get('prompt_tokens', 0),
+                                                "completion_tokens": usage.get('completion_tokens', 0),
+                                                "total_tokens": usage.get('total_tokens', 0),
+                                                "citation_tokens": usage.get('citation_tokens', 0),
+                                                "num_search_queries": usage.get('num_search_queries', 0),
+                                                "reasoning_tokens": usage.get('reasoning_tokens', 0)
+                                            },
+                                            "response_length": content_length,
+                                            "message": "Deep research가 완료되었습니다."
+                                        }
+                                        if previous is not None:
+                                            result.update(
+                                                response=incremental_report.merge_report(
+                                                    previous.report,
+                                                    content,
+                                                    datetime.datetime.now().strftime("%Y-%m-%d"),
+                                                ),
+                                                delta=content,
+                                                incremental=True,
+                                                base_report_at=datetime.datetime.fromtimestamp(previous.updated_at).isoformat(),
+                                            )
+                                            result["response_length"] = len(result["response"])
+                                        if options.report_entity:
+                                            try:
+                                                await report_store.save(options.app_name, options.report_entity, result["response"])
+                                            except Exception as e:
+                                                logger.warning(f"리포트 저장 실패 ({options.report_entity}): {e}")
+                                        try:
+                                            entities = extract_entities(query)
+                                            if options.report_entity:
+                                                entities.append(options.report_entity)
+                                            await report_archive.add(
+                                                options.app_name,
+                                                options.user_id,
+                                                query,
+                                                request_data["model"],
+                                                entities,
+                                                result["response"],
+                                                namespace,
+                                            )
+                                        except Exception as e:
+                                            logger.warning(f"리포트 보관 실패: {e}")
+                                        if RESEARCH_CACHE_DURATION > 0:
+                                            cache_manager.set(
+                                                cache_key,
+                                                {**result, "researched_at": time.time(), "precomputed": options.precompute},
+                                                PRECOMPUTE_MAX_AGE if options.precompute else RESEARCH_CACHE_DURATION,
+                                            )
+                                            research_query_index.add(namespace, query, (cache_key, query))
+                                        return result
+                                    else:
+                                        print(f"=== 응답 내용 없음 ===\n응답 데이터: {json.dumps(response_data, indent=2, ensure_ascii=False)}")
+                                        logger.error(f"Perplexity API 응답에서 내용을 찾을 수 없음: {response_data}")
+                                        return {
+                                            "error": "응답에서 내용을 찾을 수 없습니다.",
+                                            "error_details": f"응답 데이터: {json.dumps(response_data, indent=2, ensure_ascii=False)}",
+                                            "response": response_data,
+                                            "status": "error"
+                                        }
+                            else:
+                                error_text = await response.text()
+                                PERPLEXITY_REQUEST_SECONDS.labels(
+                                    model=request_data["model"], outcome="http_error"
+                                ).observe(time.perf_counter() - attempt_start)
+                                print(f"=== HTTP 에러 응답 ===\nStatus: {response.status}\nHeaders: {dict(response.headers)}\nBody: {error_text}")
+                                logger.error(f"Perplexity API HTTP 에러: {response.status} - {error_text}")
+                                return {
+                                    "error": f"Perplexity API 호출 실패: HTTP {response.status}",
+                                    "error_details": f"응답 헤더: {dict(response.headers)}\n응답 본문: {error_text}",
+                                    "response": error_text,
+                                    "status": "error"
+                                }
                             
                 except asyncio.TimeoutError as e:
                     retry_count += 1
+                    PERPLEXITY_REQUEST_SECONDS.labels(
+                        model=request_data["model"], outcome="timeout"
+                    ).observe(time.perf_counter() - attempt_start)
                     print(f"=== 타임아웃 에러 (시도 {retry_count}/{max_retries}) ===\n{str(e)}")
                     logger.warning(f"Perplexity API 타임아웃 (시도 {retry_count}/{max_retries}): {str(e)}")
                     
@@ -192,10 +468,15 @@ async def perplexity_deep_research_tool(
                         }
                     
                     # 재시도 전 잠시 대기
-                    await asyncio.sleep(2 ** retry_count)  # 지수 백오프
+                    PERPLEXITY_RETRIES.labels(reason="timeout").inc()
+                    with start_span("perplexity.backoff", {"seconds": 2 ** retry_count}):
+                        await asyncio.sleep(2 ** retry_count)  # 지수 백오프
                     
                 except Exception as e:
                     retry_count += 1
+                    PERPLEXITY_REQUEST_SECONDS.labels(
+                        model=request_data["model"], outcome="error"
+                    ).observe(time.perf_counter() - attempt_start)
                     print(f"=== 기타 에러 (시도 {retry_count}/{max_retries}) ===\n{str(e)}")
                     logger.warning(f"Perplexity API 기타 에러 (시도 {retry_count}/{max_retries}): {str(e)}")
                     
@@ -212,7 +493,9 @@ async def perplexity_deep_research_tool(
                         }
                     
                     # 재시도 전 잠시 대기
-                    await asyncio.sleep(2 ** retry_count)  # 지수 백오프
+                    PERPLEXITY_RETRIES.labels(reason="error").inc()
+                    with start_span("perplexity.backoff", {"seconds": 2 ** retry_count}):
+                        await asyncio.sleep(2 ** retry_count)  # 지수 백오프
                     
     except Exception as e:
         import traceback
@@ -224,4 +507,78 @@ async def perplexity_deep_research_tool(
             "error": f"Perplexity API 호출 중 오류가 발생했습니다: {str(e)}",
             "error_details": error_details,
             "status": "error"
-        }
\ No newline at end of file
+        }
+
+# 단계적 전달용 빠른 검색 (deep research 와 동시에 실행해 먼저 보여줄 요약)
+PRELIMINARY_MODEL = os.getenv("PRELIMINARY_MODEL", "sonar")
+PRELIMINARY_MAX_TOKENS = int(os.getenv("PRELIMINARY_MAX_TOKENS", "1000"))
+PRELIMINARY_TIMEOUT = float(os.getenv("PRELIMINARY_TIMEOUT", "30"))
+
+PRELIMINARY_SYSTEM_PROMPT = """당신은 투자 분석가입니다. 상세 리포트를 작성하기 전에 먼저 보여줄 짧은 요약을 작성합니다.
+
+- 핵심 내용을 5개 이내의 bullet 로 정리하고, 확인된 최신 수치와 날짜를 포함하세요.
+- 추측은 하지 말고, 상세 분석은 이어지는 리포트에서 다룬다고 가정하세요."""
+
+
+async def perplexity_quick_search(query: str) -> Dict[str, Any]:
+    """빠른 모델(sonar)로 짧은 예비 요약 조회 (실패해도 본 조사에는 영향 없음)"""
+    options = research_options.get()
+    api_key = os.getenv('PERPLEXITY_API_KEY')
+    if not api_key:
+        return {"status": "error", "error": "PERPLEXITY_API_KEY 환경 변수가 설정되지 않았습니다."}
+
+    request_data = {
+        "model": PRELIMINARY_MODEL,
+        "messages": [
+            {"role": "system", "content": PRELIMINARY_SYSTEM_PROMPT},
+            {"role": "user", "content": query},
+        ],
+        "stream": False,
+        "max_tokens": PRELIMINARY_MAX_TOKENS,
+        "temperature": 0.2,
+        "search_recency_filter": options.search_recency_filter,
+    }
+    headers = {
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json',
+        'Accept': 'application/json'
+    }
+    timeout = aiohttp.ClientTimeout(total=PRELIMINARY_TIMEOUT)
+    start = time.perf_counter()
+    try:
+        with start_span("perplexity.quick_search", {"model": PRELIMINARY_MODEL}):
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                session = cassette.wrap_session(session)
+                async with session.post(
+                    "https://api.perplexity.ai/chat/completions", json=request_data, headers=headers
+                ) as response:
+                    if response.status != 200:
+                        PERPLEXITY_REQUEST_SECONDS.labels(
+                            model=PRELIMINARY_MODEL, outcome="http_error"
+                        ).observe(time.perf_counter() - start)
+                        return {"status": "error", "error": f"HTTP {response.status}"}
+                    response_data = await response.json()
+    except Exception as e:
+        PERPLEXITY_REQUEST_SECONDS.labels(model=PRELIMINARY_MODEL, outcome="error").observe(
+            time.perf_counter() - start
+        )
+        logger.warning(f"빠른 검색 실패: {e}")
+        return {"status": "error", "error": str(e)}
+
+    PERPLEXITY_REQUEST_SECONDS.labels(model=PRELIMINARY_MODEL, outcome="success").observe(
+        time.perf_counter() - start
+    )
+    choices = response_data.get("choices") or []
+    content = choices[0].get("message", {}).get("content", "") if choices else ""
+    usage = response_data.get("usage", {})
+    _record_usage(options, PRELIMINARY_MODEL, usage)
+    if not content:
+        return {"status": "error", "error": "응답에서 내용을 찾을 수 없습니다."}
+    return {
+        "status": "success",
+        "query": query,
+        "response": content,
+        "model": PRELIMINARY_MODEL,
+        "usage": usage,
+        "citations": response_data.get("citations", []),
+    }
@@ -0,0 +1,251 @@
+"""
+리서치 일괄 실행 CLI
+
+JSONL 입력(한 줄에 하나의 질의)을 동시 실행 수와 분당 요청 수를 제한해 실행하고,
+완료되는 순서대로 결과와 사용료를 JSONL 로 기록한다.
+출력 파일이 checkpoint 역할을 하므로, 중단 후 같은 명령으로 다시 실행하면
+이미 성공한 항목은 건너뛴다.
+
+    python -m agent.batch_runner queries.jsonl -o results.jsonl --concurrency 4 --rate 20
+
+입력 예시:
+    {"id": "005930", "query": "삼성전자 실적 전망", "entity": "005930", "incremental": true}
+
+- id 가 없으면 query 로 만든 hash 를 사용
+- app_name, user_id 는 항목별로 지정하거나 --app-name, --user-id 기본값 사용
+- --mode tool 은 Perplexity 도구를 바로 호출하고, agent 는 DeepSearchAgent(Gemini) 를 거친다
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+from dotenv import load_dotenv
+
+from agent.agent_tools import ResearchOptions, perplexity_deep_research_tool, research_options
+from agent.cost_calculator import PerplexityCostCalculator
+from agent.usage_ledger import apply_budget_decision, usage_ledger
+
+logger = logging.getLogger("deep_search_agent.batch_runner")
+
+
+def item_id(item: Dict[str, Any]) -> str:
+    if item.get("id") is not None:
+        return str(item["id"])
+    key = json.dumps([item.get("query"), item.get("entity")], ensure_ascii=False)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def load_items(path: Path) -> List[Dict[str, Any]]:
+    items = []
+    with path.open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SystemExit(f"{path}:{line_no} JSON 파싱 실패: {e}")
+            if not item.get("query"):
+                raise SystemExit(f"{path}:{line_no} query 가 없습니다.")
+            item["id"] = item_id(item)
+            items.append(item)
+    return items
+
+
+def load_completed(path: Path) -> Set[str]:
+    """출력 파일에서 이미 성공한 id 목록 (중단 시 잘린 마지막 줄은 무시)"""
+    completed = set()
+    if not path.exists():
+        return completed
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "success":
+                completed.add(str(record.get("id")))
+    return completed
+
+
+class RateLimiter:
+    """분당 시작 횟수 제한 (요청 시작 간격을 균등하게 유지)"""
+
+    def __init__(self, per_minute: float):
+        self._interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self._interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+                now = self._next_at
+            self._next_at = now + self._interval
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        output: Path,
+        mode: str = "tool",
+        concurrency: int = 4,
+        rate_per_minute: float = 0,
+        app_name: str = "batch",
+        user_id: str = "batch",
+    ):
+        self.output = output
+        self.mode = mode
+        self.concurrency = concurrency
+        self.app_name = app_name
+        self.user_id = user_id
+        self._limiter = RateLimiter(rate_per_minute)
+        self._write_lock = asyncio.Lock()
+        self._agents: Dict[str, Any] = {}
+        self.stats = {"success": 0, "error": 0, "skipped": 0, "total_cost": 0.0}
+
+    async def _run_tool(self, item: Dict[str, Any], options: ResearchOptions) -> Dict[str, Any]:
+        result = await perplexity_deep_research_tool(item["query"])
+        if result.get("status") != "success":
+            return {"status": "error", "error": result.get("error", "unknown error")}
+        if result.get("cached"):
+            cost_info = {"total_cost": 0.0, "total_cost_usd": "$0.000000", "cached": True}
+        else:
+            cost_info = PerplexityCostCalculator(options.model).calculate_cost(result.get("usage", {}))
+        return {
+            "status": "success",
+            "answer": result.get("response", ""),
+            "cost_info": cost_info,
+            "cached": bool(result.get("cached")),
+            "incremental": bool(result.get("incremental")),
+        }
+
+    async def _run_agent(self, item: Dict[str, Any], options: ResearchOptions) -> Dict[str, Any]:
+        # google.adk 는 agent 모드에서만 로드
+        from agent.agent import DeepSearchAgent
+
+        agent = self._agents.get(options.app_name)
+        if agent is None:
+            agent = self._agents[options.app_name] = DeepSearchAgent(options.app_name)
+        final = None
+        async for chunk in agent.invoke(
+            item["query"],
+            f"batch-{item['id']}",
+            f"batch-{item['id']}",
+            options.user_id,
+            options.app_name,
+        ):
+            if isinstance(chunk, str):
+                final = json.loads(chunk)
+        if final is None:
+            return {"status": "error", "error": "에이전트 응답이 없습니다."}
+        return {"status": "success", "answer": final["answer"], "cost_info": final["cost_info"]}
+
+    async def _write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        async with self._write_lock:
+            with self.output.open("a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+
+    async def _run_item(self, item: Dict[str, Any], semaphore: asyncio.Semaphore):
+        async with semaphore:
+            await self._limiter.wait()
+            options = ResearchOptions(
+                app_name=item.get("app_name", self.app_name),
+                user_id=item.get("user_id", self.user_id),
+                report_entity=str(item.get("entity") or item.get("ticker") or ""),
+                incremental=bool(item.get("incremental", False)),
+            )
+            started = time.time()
+            try:
+                decision = usage_ledger.check_budget(options.app_name, options.user_id)
+                # 서버 경로(executor)와 같이 한도 근접 시 축소 설정으로 실행
+                options = apply_budget_decision(options, decision)
+                # 각 항목은 별도 task 이므로 contextvar 설정이 서로 섞이지 않는다
+                research_options.set(options)
+                if decision.action == "refuse":
+                    outcome = {"status": "error", "error": "budget_exceeded"}
+                elif self.mode == "agent":
+                    outcome = await self._run_agent(item, options)
+                else:
+                    outcome = await self._run_tool(item, options)
+            except Exception as e:
+                logger.exception(f"[{item['id']}] 실행 실패")
+                outcome = {"status": "error", "error": str(e)}
+
+            record = {
+                "id": item["id"],
+                "query": item["query"],
+                **outcome,
+                "budget_downgraded": options.budget_downgraded,
+                "started_at": started,
+                "elapsed_seconds": round(time.time() - started, 3),
+            }
+            await self._write(record)
+            self.stats[record["status"]] += 1
+            self.stats["total_cost"] += record.get("cost_info", {}).get("total_cost", 0.0)
+            print(
+                f"[{record['status']}] {item['id']} ({record['elapsed_seconds']}s) "
+                f"success={self.stats['success']} error={self.stats['error']}",
+                file=sys.stderr,
+            )
+
+    async def run(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        completed = load_completed(self.output)
+        pending = [item for item in items if item["id"] not in completed]
+        self.stats["skipped"] = len(items) - len(pending)
+        if self.stats["skipped"]:
+            print(f"이미 완료된 {self.stats['skipped']}건은 건너뜁니다.", file=sys.stderr)
+
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        usage_ledger.start()
+        try:
+            await asyncio.gather(*(self._run_item(item, semaphore) for item in pending))
+        finally:
+            await usage_ledger.stop()
+        self.stats["total_cost"] = round(self.stats["total_cost"], 6)
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="리서치 일괄 실행")
+    parser.add_argument("input", type=Path, help="질의 JSONL 파일")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="결과 JSONL 파일 (checkpoint 겸용)")
+    parser.add_argument("--mode", choices=("tool", "agent"), default="tool")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 실행 수")
+    parser.add_argument("--rate", type=float, default=0, help="분당 최대 요청 수 (0 이면 제한 없음)")
+    parser.add_argument("--app-name", default="batch")
+    parser.add_argument("--user-id", default="batch")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.WARNING)
+
+    runner = BatchRunner(
+        args.output,
+        mode=args.mode,
+        concurrency=args.concurrency,
+        rate_per_minute=args.rate,
+        app_name=args.app_name,
+        user_id=args.user_id,
+    )
+    stats = asyncio.run(runner.run(load_items(args.input)))
+    print(json.dumps(stats, ensure_ascii=False))
+    if stats["error"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
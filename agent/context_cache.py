@@ -0,0 +1,149 @@
+"""
+Gemini 명시적 context cache (instruction + 도구 선언)
+
+DeepSearchAgent 의 Gemini 호출은 매번 DB 에서 읽은 긴 instruction 과 도구 선언을 다시 보낸다.
+이 고정 prefix 를 (app_name, model, instruction/도구 hash) 별로 Gemini context cache 로 만들어 두고
+요청에는 cached_content 이름만 넣어 입력 토큰 처리 시간과 비용을 줄인다.
+
+- cache 이름은 cache_manager 에 보관하므로 세션 간에, SHARED_CACHE_PATH 가 있으면 worker 간에도 재사용된다
+- instruction 이 바뀌면 hash 가 달라져 새 cache 를 만든다. 이전 cache 는 처리 중인 요청이 쓰고 있을 수 있으므로
+  지우지 않고 TTL(GEMINI_CACHE_TTL) 만료로 정리한다
+- 만료가 GEMINI_CACHE_REFRESH_MARGIN 초 이내로 다가오면 TTL 을 연장한다
+- 최소 토큰 수 미달 등으로 만들 수 없으면 GEMINI_CACHE_RETRY_SECONDS 동안 다시 시도하지 않고 원래 요청을 보낸다
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+from shared.database.cache_manager import cache_manager
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "1") == "1"
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", "3600"))
+GEMINI_CACHE_REFRESH_MARGIN = int(os.getenv("GEMINI_CACHE_REFRESH_MARGIN", "300"))
+GEMINI_CACHE_RETRY_SECONDS = int(os.getenv("GEMINI_CACHE_RETRY_SECONDS", "600"))
+
+GEMINI_CONTEXT_CACHE_EVENTS = metrics.counter(
+    "deep_search_gemini_context_cache",
+    "Gemini context cache 사용 결과 (hit, create, refresh, skip, error)",
+    ["result"],
+)
+
+
+def _dump(value: Any) -> Any:
+    return value.model_dump(mode="json", exclude_none=True) if hasattr(value, "model_dump") else value
+
+
+class GeminiContextCache:
+    def __init__(self, ttl: int = GEMINI_CACHE_TTL, client=None):
+        self.ttl = ttl
+        self._client = client
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # 만들 수 없었던 prefix -> 다시 시도할 시각
+        self._failed: Dict[str, float] = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client()
+        return self._client
+
+    @staticmethod
+    def prefix_key(app_name: str, llm_request) -> Optional[str]:
+        config = llm_request.config
+        if config is None or (not config.system_instruction and not config.tools):
+            return None
+        payload = json.dumps(
+            {
+                "system_instruction": _dump(config.system_instruction),
+                "tools": [_dump(tool) for tool in config.tools or []],
+                "tool_config": _dump(config.tool_config),
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+        return f"gemini_context_cache:{app_name}:{llm_request.model}:{digest}"
+
+    async def _create(self, key: str, llm_request) -> Dict[str, Any]:
+        from google.genai import types
+
+        config = llm_request.config
+        cached = await self.client.aio.caches.create(
+            model=llm_request.model,
+            config=types.CreateCachedContentConfig(
+                display_name=key.split(":", 1)[1][:128],
+                system_instruction=config.system_instruction,
+                tools=config.tools,
+                tool_config=config.tool_config,
+                ttl=f"{self.ttl}s",
+            ),
+        )
+        return {"name": cached.name, "expires_at": time.time() + self.ttl}
+
+    async def _refresh(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        from google.genai import types
+
+        await self.client.aio.caches.update(
+            name=entry["name"], config=types.UpdateCachedContentConfig(ttl=f"{self.ttl}s")
+        )
+        return {"name": entry["name"], "expires_at": time.time() + self.ttl}
+
+    async def cached_content(self, app_name: str, llm_request) -> Optional[str]:
+        """요청의 고정 prefix 에 해당하는 cache 이름 (만들 수 없으면 None)"""
+        key = self.prefix_key(app_name, llm_request)
+        if key is None or self._failed.get(key, 0) > time.time():
+            GEMINI_CONTEXT_CACHE_EVENTS.labels(result="skip").inc()
+            return None
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = cache_manager.get(key, self.ttl)
+            try:
+                if entry and entry["expires_at"] - time.time() > GEMINI_CACHE_REFRESH_MARGIN:
+                    result = "hit"
+                elif entry and entry["expires_at"] > time.time():
+                    entry = await self._refresh(entry)
+                    result = "refresh"
+                else:
+                    entry = await self._create(key, llm_request)
+                    result = "create"
+            except Exception as e:
+                # 최소 토큰 수 미달, 권한 없음 등: 한동안 원래 요청을 그대로 보낸다
+                logger.warning(f"Gemini context cache 사용 불가 ({key}): {e}")
+                self._failed[key] = time.time() + GEMINI_CACHE_RETRY_SECONDS
+                cache_manager.invalidate_cache(key)
+                GEMINI_CONTEXT_CACHE_EVENTS.labels(result="error").inc()
+                return None
+            if result != "hit":
+                # 갱신/재생성한 entry 로 다른 worker 의 L1 도 교체해 중복 생성을 막는다
+                cache_manager.set(key, entry, self.ttl, propagate=True)
+        GEMINI_CONTEXT_CACHE_EVENTS.labels(result=result).inc()
+        return entry["name"]
+
+    def model_callback(self, app_name: str):
+        """app_name 별 ADK before_model_callback: instruction/도구 선언을 cached_content 로 대체"""
+
+        async def before_model_callback(callback_context, llm_request):
+            name = await self.cached_content(app_name, llm_request)
+            if name:
+                # cache 에 포함된 항목은 요청에 함께 보낼 수 없다 (도구 실행용 tools_dict 는 그대로 유지)
+                llm_request.config.cached_content = name
+                llm_request.config.system_instruction = None
+                llm_request.config.tools = None
+                llm_request.config.tool_config = None
+            return None
+
+        return before_model_callback
+
+
+# 글로벌 인스턴스
+gemini_context_cache = GeminiContextCache()
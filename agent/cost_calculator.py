@@ -150,3 +150,18 @@ class PerplexityCostCalculator:
 🎯 **총 비용: {cost_info['total_cost_usd']}**
 """
         return summary.strip()
+
+
+def add_preliminary_cost(cost_info: Dict[str, Any], preliminary: Dict[str, Any]) -> Dict[str, Any]:
+    """예비 요약(빠른 모델) 사용료를 최종 사용료에 합산 (세부 내역은 preliminary 항목에 별도 기록)"""
+    total_cost = cost_info.get("total_cost", 0.0) + preliminary.get("total_cost", 0.0)
+    return {
+        **cost_info,
+        "preliminary": {
+            "model": preliminary.get("model"),
+            "usage": preliminary.get("usage", {}),
+            "total_cost": preliminary.get("total_cost", 0.0),
+        },
+        "total_cost": round(total_cost, 6),
+        "total_cost_usd": f"${total_cost:.6f}",
+    }
@@ -0,0 +1,163 @@
+"""
+SLO 기반 단계적 품질 축소 (graceful degradation)
+
+대기열이 길어져도 모든 요청이 reasoning_effort high / max_tokens 12000 으로 실행되면 모두의 지연이 함께 늘어난다.
+최근 대기 시간과 처리 시간(p95)을 SLO 와 비교해 축소 단계를 정하고, 새로 실행되는 낮은 우선순위 요청에
+단계별 축소 설정(reasoning_effort, max_tokens, 모델)을 적용한다. 적용된 단계는 응답 metadata 에 기록한다.
+
+- 단계는 압력(측정값 / SLO 중 큰 값)이 커지면 바로 올리고, 대기열이 비고 압력이 줄면
+  DEGRADATION_COOLDOWN_SECONDS 마다 한 단계씩 내린다
+- metadata priority 가 DEGRADATION_PRIORITIES(기본 low) 에 없는 요청(normal, high 등)은 축소하지 않는다
+- 단계별 설정은 DEGRADATION_LEVELS(JSON 배열) 로 바꿀 수 있다
+한도와 마찬가지로 프로세스(worker) 단위로 동작한다.
+"""
+import os
+import json
+import time
+import logging
+import dataclasses
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEGRADATION_ENABLED = os.getenv("DEGRADATION_ENABLED", "1") == "1"
+SLO_QUEUE_WAIT_SECONDS = float(os.getenv("SLO_QUEUE_WAIT_SECONDS", "60"))
+SLO_LATENCY_P95_SECONDS = float(os.getenv("SLO_LATENCY_P95_SECONDS", "900"))
+DEGRADATION_WINDOW = int(os.getenv("DEGRADATION_WINDOW", "50"))
+DEGRADATION_WINDOW_SECONDS = float(os.getenv("DEGRADATION_WINDOW_SECONDS", "900"))
+DEGRADATION_COOLDOWN_SECONDS = float(os.getenv("DEGRADATION_COOLDOWN_SECONDS", "120"))
+DEGRADATION_PRIORITIES = {
+    p.strip() for p in os.getenv("DEGRADATION_PRIORITIES", "low").split(",") if p.strip()
+}
+DEFAULT_PRIORITY = os.getenv("DEFAULT_PRIORITY", "normal")
+
+# 단계 1 부터의 축소 설정과 그 단계로 올라가는 압력 기준
+DEFAULT_LEVELS: List[Dict[str, Any]] = [
+    {"pressure": 1.0, "reasoning_effort": "medium", "max_tokens": 8000},
+    {"pressure": 1.5, "reasoning_effort": "low", "max_tokens": 4000},
+    {"pressure": 2.0, "reasoning_effort": "low", "max_tokens": 4000, "model": "sonar-reasoning-pro"},
+]
+
+_EFFORT_RANK = {"low": 0, "medium": 1, "high": 2}
+
+DEGRADATION_LEVEL = metrics.gauge(
+    "deep_search_degradation_level", "현재 적용 중인 축소 단계 (0 이면 축소 없음)"
+)
+DEGRADATION_PRESSURE = metrics.gauge(
+    "deep_search_degradation_pressure", "최근 대기/처리 시간의 SLO 대비 비율 중 큰 값"
+)
+DEGRADED_TASKS = metrics.counter(
+    "deep_search_degraded_tasks", "축소 단계별 실행된 task 수", ["level"]
+)
+
+
+def _p95(samples: List[float]) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+class DegradationController:
+    """최근 task 의 대기/처리 시간으로 새 요청의 축소 단계를 결정"""
+
+    def __init__(
+        self,
+        levels: Optional[List[Dict[str, Any]]] = None,
+        queue_wait_slo: float = SLO_QUEUE_WAIT_SECONDS,
+        latency_slo: float = SLO_LATENCY_P95_SECONDS,
+        window: int = DEGRADATION_WINDOW,
+        window_seconds: float = DEGRADATION_WINDOW_SECONDS,
+        cooldown: float = DEGRADATION_COOLDOWN_SECONDS,
+        enabled: bool = DEGRADATION_ENABLED,
+    ):
+        self.levels = levels if levels is not None else DEFAULT_LEVELS
+        self.queue_wait_slo = queue_wait_slo
+        self.latency_slo = latency_slo
+        self.window_seconds = window_seconds
+        self.cooldown = cooldown
+        self.enabled = enabled
+        # (기록 시각, 초)
+        self._queue_waits: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._latencies: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._level = 0
+        self._changed_at = 0.0
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    def observe_queue_wait(self, seconds: float):
+        self._queue_waits.append((time.monotonic(), seconds))
+
+    def observe_latency(self, seconds: float):
+        self._latencies.append((time.monotonic(), seconds))
+
+    def _recent(self, samples: Deque[Tuple[float, float]], now: float) -> List[float]:
+        while samples and now - samples[0][0] > self.window_seconds:
+            samples.popleft()
+        return [seconds for _, seconds in samples]
+
+    def pressure(self, queue_depth: int = 0, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        queue_p95 = _p95(self._recent(self._queue_waits, now))
+        latency_p95 = _p95(self._recent(self._latencies, now))
+        if not queue_depth:
+            # 대기열이 비었으면 대기 시간 기록은 이미 해소된 적체이므로 처리 시간만 본다
+            return latency_p95 / self.latency_slo
+        return max(queue_p95 / self.queue_wait_slo, latency_p95 / self.latency_slo)
+
+    def update(self, queue_depth: int) -> int:
+        """현재 축소 단계 (올릴 때는 바로, 내릴 때는 cooldown 마다 한 단계씩)"""
+        if not self.enabled:
+            return 0
+        now = time.monotonic()
+        pressure = self.pressure(queue_depth, now)
+        target = sum(1 for level in self.levels if pressure >= level["pressure"])
+        if target > self._level:
+            logger.warning(f"축소 단계 상향: {self._level} -> {target} (pressure={pressure:.2f}, queue={queue_depth})")
+            self._level, self._changed_at = target, now
+        elif target < self._level and now - self._changed_at >= self.cooldown:
+            logger.info(f"축소 단계 하향: {self._level} -> {self._level - 1} (pressure={pressure:.2f}, queue={queue_depth})")
+            self._level, self._changed_at = self._level - 1, now
+        DEGRADATION_PRESSURE.set(pressure)
+        DEGRADATION_LEVEL.set(self._level)
+        return self._level
+
+    def apply(self, options, priority: str, queue_depth: int):
+        """요청 설정에 현재 단계를 적용 (budget 축소 등 이미 더 낮은 설정은 유지)"""
+        level = self.update(queue_depth)
+        if priority not in DEGRADATION_PRIORITIES:
+            level = 0
+        DEGRADED_TASKS.labels(level=str(level)).inc()
+        if level == 0:
+            return options
+        profile = self.levels[level - 1]
+        changes: Dict[str, Any] = {"degradation_level": level}
+        if "max_tokens" in profile:
+            changes["max_tokens"] = min(options.max_tokens, profile["max_tokens"])
+        effort = profile.get("reasoning_effort")
+        if effort and _EFFORT_RANK.get(effort, 2) < _EFFORT_RANK.get(options.reasoning_effort, 2):
+            changes["reasoning_effort"] = effort
+        if profile.get("model"):
+            changes["model"] = profile["model"]
+        return dataclasses.replace(options, **changes)
+
+
+def _load_levels() -> Optional[List[Dict[str, Any]]]:
+    raw = os.getenv("DEGRADATION_LEVELS", "")
+    if not raw:
+        return None
+    try:
+        levels = json.loads(raw)
+        return sorted(levels, key=lambda level: level["pressure"])
+    except Exception as e:
+        logger.warning(f"DEGRADATION_LEVELS 파싱 실패: {e}")
+        return None
+
+
+# 글로벌 인스턴스
+degradation_controller = DegradationController(levels=_load_levels())
@@ -0,0 +1,164 @@
+"""
+Gemini 를 거치지 않는 직접 리서치 경로
+
+plan 단계 요청처럼 Perplexity 조사 결과를 그대로 돌려주면 되는 요청은
+LlmAgent(Gemini) 가 도구 호출을 결정하고 결과를 JSON 으로 감싸는 왕복이 필요 없으므로,
+도구를 바로 호출하고 answer/cost_info 응답을 여기서 만든다.
+
+- metadata 의 direct_research (true/false) 가 있으면 그대로 따른다
+- DIRECT_RESEARCH=auto(기본) 이면 plan 단계 요청과 리서치 질의로 분류된 요청만 직접 실행한다
+- DIRECT_RESEARCH=always 는 항상, off 는 항상 Gemini 경유
+- 질의와 리포트는 ADK 세션에도 기록하므로, 이어지는 대화형 요청이 Gemini 로 가도 앞의 리포트를 참조할 수 있다
+"""
+import os
+import re
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from agent.agent_tools import perplexity_deep_research_tool, research_options
+from agent.cost_calculator import PerplexityCostCalculator
+from agent.entities import extract_entities
+from shared.metrics import TASK_COST_USD, TASK_TOKENS
+
+logger = logging.getLogger(__name__)
+
+DIRECT_RESEARCH = os.getenv("DIRECT_RESEARCH", "auto").lower()
+
+# Perplexity 응답 usage 필드 -> 사용료 계산기 필드
+TOOL_USAGE_FIELDS = {
+    "prompt_tokens": "input_tokens",
+    "completion_tokens": "output_tokens",
+    "citation_tokens": "citation_tokens",
+    "num_search_queries": "search_queries",
+    "reasoning_tokens": "reasoning_tokens",
+}
+
+# 이전 대화를 참조하거나 리서치가 아닌 요청 (Gemini 가 대화 맥락으로 처리해야 함)
+_CONVERSATIONAL_RE = re.compile(
+    r"위\s*(?:내용|답변|리포트)|앞(?:의|에서)|방금|이전\s*(?:답변|결과)|요약해|번역|다시\s*(?:써|작성)|"
+    r"고마|감사|안녕|^\s*(?:네|응|좋아|ok)\s*[.!?]*\s*$",
+    re.IGNORECASE,
+)
+_RESEARCH_RE = re.compile(
+    r"분석|전망|리포트|보고서|조사|동향|실적|주가|시장|산업|투자|밸류에이션|리스크|경쟁|뉴스|공시|"
+    r"research|analy[sz]|outlook|earnings|market|report",
+    re.IGNORECASE,
+)
+
+
+def empty_usage() -> Dict[str, int]:
+    return {key: 0 for key in TOOL_USAGE_FIELDS.values()}
+
+
+def accumulate_usage(total_usage: Dict[str, int], tool_response: Dict[str, Any]):
+    """도구(Perplexity) 결과의 usage 를 누적 (캐시 적중 결과는 제외)"""
+    usage = tool_response.get("usage")
+    if not usage or tool_response.get("cached"):
+        return
+    for source_key, target_key in TOOL_USAGE_FIELDS.items():
+        total_usage[target_key] += usage.get(source_key, 0) or 0
+
+
+def build_final_response(
+    answer: str,
+    cost_calculator: PerplexityCostCalculator,
+    total_usage: dict,
+    freshness: Optional[Dict[str, Any]] = None,
+) -> dict:
+    """최종 응답 생성 (사용료 계산 및 task 단위 메트릭 기록, 캐시된 결과면 조사 시각 포함)"""
+    cost_info = cost_calculator.calculate_cost(total_usage)
+    cost_summary = cost_calculator.format_cost_summary(cost_info)
+    TASK_COST_USD.observe(cost_info["total_cost"])
+    for token_type, count in total_usage.items():
+        if token_type.endswith("_tokens"):
+            TASK_TOKENS.labels(type=token_type).observe(count)
+    final_response = {
+        "answer": answer,
+        "cost_info": cost_info,
+        "cost_summary": cost_summary,
+    }
+    if freshness:
+        final_response["freshness"] = freshness
+    return final_response
+
+
+def use_direct_research(query: str, metadata: Dict[str, Any]) -> bool:
+    """요청을 Gemini 없이 바로 조사할지 결정"""
+    explicit = metadata.get("direct_research")
+    if explicit is not None:
+        return str(explicit).lower() in ("1", "true", "yes")
+    if DIRECT_RESEARCH in ("always", "off"):
+        return DIRECT_RESEARCH == "always"
+    if metadata.get("plan") or metadata.get("next_steps") or metadata.get("current_step"):
+        return True
+    if _CONVERSATIONAL_RE.search(query):
+        return False
+    return bool(_RESEARCH_RE.search(query) or extract_entities(query))
+
+
+def research_prompt(query: str) -> str:
+    """executor 가 만든 계획 문맥의 들여쓰기를 제거하고, Gemini 경로처럼 오늘 날짜를 알려준다"""
+    lines = [line.strip() for line in query.strip().splitlines()]
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    return f"(시스템 정보) 오늘 날짜는 {today_str} 입니다.\n" + "\n".join(lines)
+
+
+async def _append_session_turn(app_name: str, user_id: str, session_id: str, prompt: str, answer: str):
+    """Gemini 경로의 Runner 처럼 사용자 질의와 응답을 ADK 세션 이력에 추가"""
+    # google.adk 는 import 비용이 커서 직접 경로가 처음 세션을 기록할 때 로드한다
+    from google.adk.agents.invocation_context import new_invocation_context_id
+    from google.adk.events import Event
+    from google.genai import types
+
+    from agent.agent import get_session_service
+
+    session_service = get_session_service()
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is None:
+        session = await session_service.create_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, state={}
+        )
+    invocation_id = new_invocation_context_id()
+    for author, role, text in (("user", "user", prompt), ("deep_search_agent", "model", answer)):
+        await session_service.append_event(
+            session,
+            Event(
+                invocation_id=invocation_id,
+                author=author,
+                content=types.Content(role=role, parts=[types.Part.from_text(text=text)]),
+            ),
+        )
+
+
+async def direct_research(
+    query: str,
+    session_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    app_name: Optional[str] = None,
+) -> str:
+    """리서치 도구를 바로 호출하고 DeepSearchAgent 와 같은 형식의 최종 응답(JSON 문자열) 반환
+
+    session_id 가 있으면 질의와 리포트를 해당 ADK 세션에 기록한다.
+    """
+    prompt = research_prompt(query)
+    result = await perplexity_deep_research_tool(prompt)
+    if result.get("status") != "success":
+        raise RuntimeError(result.get("error", "Perplexity 리서치 실패"))
+
+    if session_id:
+        try:
+            await _append_session_turn(
+                app_name or "default-app", user_id or "default-user", session_id, prompt, result.get("response", "")
+            )
+        except Exception as e:
+            logger.warning(f"직접 리서치 결과를 세션에 기록하지 못했습니다 (session_id={session_id}): {e}")
+
+    total_usage = empty_usage()
+    accumulate_usage(total_usage, result)
+    calculator = PerplexityCostCalculator(research_options.get().model)
+    final_response = build_final_response(
+        result.get("response", ""), calculator, total_usage, result.get("freshness")
+    )
+    return json.dumps(final_response, ensure_ascii=False)
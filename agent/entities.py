@@ -0,0 +1,99 @@
+import os
+import re
+import json
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# 대표 종목 (ticker -> 이름/별칭), ENTITY_ALIASES_PATH 의 JSON 으로 추가/덮어쓰기 가능
+DEFAULT_ENTITY_ALIASES: Dict[str, List[str]] = {
+    "005930": ["삼성전자", "Samsung Electronics"],
+    "000660": ["SK하이닉스", "에스케이하이닉스", "SK Hynix"],
+    "005380": ["현대차", "현대자동차", "Hyundai Motor"],
+    "000270": ["기아", "기아차", "Kia"],
+    "012330": ["현대모비스", "Hyundai Mobis"],
+    "373220": ["LG에너지솔루션", "LG엔솔", "LG Energy Solution"],
+    "051910": ["LG화학", "LG Chem"],
+    "006400": ["삼성SDI", "Samsung SDI"],
+    "207940": ["삼성바이오로직스", "삼성바이오", "Samsung Biologics"],
+    "068270": ["셀트리온", "Celltrion"],
+    "005490": ["POSCO홀딩스", "포스코홀딩스", "POSCO Holdings"],
+    "035420": ["네이버", "NAVER"],
+    "035720": ["카카오", "Kakao"],
+    "105560": ["KB금융", "KB Financial"],
+    "055550": ["신한지주", "신한금융지주", "Shinhan Financial"],
+    "AAPL": ["애플", "Apple"],
+    "MSFT": ["마이크로소프트", "Microsoft"],
+    "NVDA": ["엔비디아", "NVIDIA"],
+    "TSLA": ["테슬라", "Tesla"],
+    "AMZN": ["아마존", "Amazon"],
+    "GOOGL": ["알파벳", "구글", "Alphabet", "Google"],
+    "META": ["메타플랫폼스", "메타", "Meta Platforms"],
+    "TSM": ["TSMC"],
+}
+
+# 한글 별칭 뒤에는 끝, 한글 외 문자, 또는 조사만 올 수 있다 (예: "메타버스" 는 메타가 아님)
+_KOREAN_BOUNDARY = r"(?=$|[^가-힣]|(?:의|은|는|이|가|을|를|와|과|도|에|로|으로|에서|까지|보다)(?:$|[^가-힣]))"
+# 명시적인 종목 코드 표기: 005930.KS, 종목코드 005930, $NVDA, (NASDAQ: NVDA), NYSE:TSM
+_EXPLICIT_TICKER_RE = re.compile(
+    r"(?<!\d)(\d{6})\.(?:KS|KQ)\b"
+    r"|(?:종목\s*코드|티커|ticker)\s*[:：]?\s*(\d{6}|[A-Z]{1,5})\b"
+    r"|\$([A-Z]{1,5})\b"
+    r"|(?:NASDAQ|NYSE|AMEX|KRX|KOSPI|KOSDAQ)\s*[:：]\s*(\d{6}|[A-Z]{1,5})\b",
+    re.IGNORECASE,
+)
+
+
+def _load_aliases() -> Dict[str, List[str]]:
+    aliases = {k: list(v) for k, v in DEFAULT_ENTITY_ALIASES.items()}
+    path = os.getenv("ENTITY_ALIASES_PATH")
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                aliases.update({str(k).upper(): list(v) for k, v in json.load(f).items()})
+        except Exception as e:
+            logger.warning(f"ENTITY_ALIASES_PATH 로드 실패: {e}")
+    return aliases
+
+
+def _build_alias_pattern(aliases: Dict[str, List[str]]):
+    lookup: Dict[str, str] = {}
+    parts = []
+    for ticker, names in aliases.items():
+        # 영문 ticker 자체도 별칭으로 인식 (AAPL, NVDA 등)
+        candidates = names + ([ticker] if not ticker.isdigit() else [])
+        for name in candidates:
+            lookup[name.lower()] = ticker
+    for name in sorted(lookup, key=len, reverse=True):
+        escaped = re.escape(name)
+        if re.search(r"[가-힣]$", name):
+            parts.append(escaped + _KOREAN_BOUNDARY)
+        else:
+            parts.append(r"\b" + escaped + r"\b")
+    return re.compile("|".join(parts), re.IGNORECASE), lookup
+
+
+ENTITY_ALIASES = _load_aliases()
+_ALIAS_RE, _ALIAS_LOOKUP = _build_alias_pattern(ENTITY_ALIASES)
+
+
+def extract_entities(text: str) -> List[str]:
+    """텍스트에 등장하는 종목을 ticker 로 정규화해 반환 (등장 순서, 중복 제거)"""
+    found: Dict[str, None] = {}
+    for match in _ALIAS_RE.finditer(text):
+        found[_ALIAS_LOOKUP[match.group(0).lower()]] = None
+    for match in _EXPLICIT_TICKER_RE.finditer(text):
+        ticker = next(g for g in match.groups() if g)
+        found[ticker.upper()] = None
+    return list(found)
+
+
+def strip_entities(text: str) -> str:
+    """종목 이름/코드를 제거한 나머지 (주제 비교용)"""
+    return _EXPLICIT_TICKER_RE.sub(" ", _ALIAS_RE.sub(" ", text))
+
+
+def entity_name(ticker: str) -> str:
+    names = ENTITY_ALIASES.get(ticker.upper())
+    return names[0] if names else ticker
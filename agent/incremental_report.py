@@ -0,0 +1,106 @@
+import os
+import re
+import time
+import datetime
+from typing import Any, Dict, List, Tuple
+
+from shared.database.report_store import StoredReport
+
+# 이보다 오래된 리포트는 증분 대신 전체를 다시 조사
+INCREMENTAL_MAX_AGE_DAYS = float(os.getenv("INCREMENTAL_MAX_AGE_DAYS", "7"))
+INCREMENTAL_MAX_TOKENS = int(os.getenv("INCREMENTAL_MAX_TOKENS", "4000"))
+INCREMENTAL_REASONING_EFFORT = os.getenv("INCREMENTAL_REASONING_EFFORT", "low")
+
+INCREMENTAL_SYSTEM_PROMPT = """당신은 전문 투자 분석가입니다. 이미 작성된 리포트가 있으며, 그 이후에 나온 새로운 내용만 조사합니다.
+
+- 기준 시점 이후의 새로운 뉴스, 공시, 실적, 수치 변화, 분석가 의견 변화만 다루세요.
+- 이미 알려진 배경 설명은 반복하지 마세요.
+- 아래 제공된 섹션 제목을 그대로 `## 제목` 형식으로 사용하고, 새로운 내용이 없는 섹션은 "변경 없음" 이라고만 적으세요.
+- 어느 섹션에도 맞지 않는 새로운 내용은 `## 기타` 섹션에 적으세요."""
+
+_HEADING_RE = re.compile(r"^(#{1,4})\s+(.+?)\s*#*\s*$")
+_NO_CHANGE_RE = re.compile(r"^\W*(변경\s*없음|변동\s*없음|해당\s*없음|no\s+(?:significant\s+)?changes?)\W*$", re.I)
+_TITLE_PREFIX_RE = re.compile(r"^(?:[0-9]+[.)]|[ivx]+[.)]|[-*•])\s*", re.I)
+
+
+def is_fresh(previous: StoredReport) -> bool:
+    return time.time() - previous.updated_at <= INCREMENTAL_MAX_AGE_DAYS * 86400
+
+
+def recency_window(previous: StoredReport) -> str:
+    """이전 리포트 이후 경과 시간에 맞는 Perplexity search_recency_filter"""
+    return "day" if time.time() - previous.updated_at <= 1.5 * 86400 else "week"
+
+
+def _normalize_title(title: str) -> str:
+    title = _TITLE_PREFIX_RE.sub("", title.strip().strip("*").strip())
+    return re.sub(r"[^0-9a-z가-힣]", "", title.lower())
+
+
+def split_sections(report: str) -> Tuple[str, List[Tuple[str, str, List[str]]]]:
+    """markdown 리포트를 (머리말, [(제목 줄, 정규화 제목, 본문 줄)]) 로 분리 (# ~ #### 제목 기준)"""
+    preamble: List[str] = []
+    sections: List[Tuple[str, str, List[str]]] = []
+    for line in report.splitlines():
+        match = _HEADING_RE.match(line)
+        if match:
+            sections.append((line, _normalize_title(match.group(2)), []))
+        elif sections:
+            sections[-1][2].append(line)
+        else:
+            preamble.append(line)
+    return "\n".join(preamble), sections
+
+
+def section_titles(report: str) -> List[str]:
+    return [_HEADING_RE.match(line).group(2) for line, _, _ in split_sections(report)[1]]
+
+
+def apply_incremental(request_data: Dict[str, Any], query: str, previous: StoredReport):
+    """전체 조사 요청을 이전 리포트 이후 변경분만 묻는 요청으로 변환"""
+    as_of = datetime.datetime.fromtimestamp(previous.updated_at).strftime("%Y-%m-%d %H:%M")
+    titles = section_titles(previous.report)
+    title_lines = "\n".join(f"- {t}" for t in titles) if titles else "- (섹션 없음)"
+    request_data["messages"] = [
+        {"role": "system", "content": INCREMENTAL_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": f"""{query}
+
+기준 시점: {as_of} (이 시점의 리포트가 이미 있습니다)
+기준 시점 이후의 새로운 내용만 아래 섹션별로 정리해주세요.
+{title_lines}""",
+        },
+    ]
+    request_data["search_recency_filter"] = recency_window(previous)
+    request_data["max_tokens"] = min(request_data["max_tokens"], INCREMENTAL_MAX_TOKENS)
+    request_data["reasoning_effort"] = INCREMENTAL_REASONING_EFFORT
+
+
+def merge_report(previous_report: str, delta: str, as_of: str) -> str:
+    """변경분(delta)을 같은 제목의 섹션 끝에 덧붙이고, 맞는 섹션이 없으면 '최근 업데이트' 로 추가"""
+    preamble, sections = split_sections(previous_report)
+    delta_preamble, delta_sections = split_sections(delta)
+    index = {title: i for i, (_, title, _) in enumerate(sections)}
+
+    unmatched: List[str] = []
+    if delta_preamble.strip() and not delta_sections:
+        unmatched.append(delta_preamble.strip())
+    for heading, title, body_lines in delta_sections:
+        body = "\n".join(body_lines).strip()
+        if not body or _NO_CHANGE_RE.match(body):
+            continue
+        if title in index:
+            lines = sections[index[title]][2]
+            while lines and not lines[-1].strip():
+                lines.pop()
+            lines.extend(["", f"**[{as_of} 업데이트]**", body])
+        else:
+            unmatched.append(f"### {_HEADING_RE.match(heading).group(2)}\n{body}")
+
+    parts = [preamble] if preamble.strip() else []
+    for heading, _, body_lines in sections:
+        parts.append("\n".join([heading, *body_lines]).rstrip())
+    if unmatched:
+        parts.append(f"## 최근 업데이트 ({as_of})\n\n" + "\n\n".join(unmatched))
+    return "\n\n".join(p.strip("\n") for p in parts) + "\n"
@@ -0,0 +1,151 @@
+"""
+인기 리포트 예약 사전 조사 (precompute)
+
+관심 종목 리포트 요청은 매일 장 시작 직후에 한꺼번에 몰려 Perplexity 를 가장 바쁠 때 포화시킨다.
+PRECOMPUTE_FILE 의 질의를 장 시작 전(PRECOMPUTE_TIMES, PRECOMPUTE_TIMEZONE 기준)에 일반 경로
+(perplexity_deep_research_tool) 로 미리 조사해 연구 결과 캐시에 PRECOMPUTE_MAX_AGE 동안 넣어 둔다.
+그날 처음 요청한 사용자는 캐시된 결과를 바로 받고, 응답의 freshness 로 조사 시각을 확인할 수 있다.
+
+- 질의 파일 형식은 agent.batch_runner 와 같다 ({"query": ..., "entity": ..., "app_name": ...})
+- 직접 리서치 경로와 같은 프롬프트(research_prompt)로 조사하므로 같은 날 같은(또는 비슷한) 질의가 캐시에 적중한다
+- 여러 worker 가 떠 있어도 cache_manager.claim 으로 예약 시각마다 한 worker 만 실행한다
+  (SHARED_CACHE_PATH 가 없으면 worker 별로 실행됨)
+"""
+import os
+import time
+import asyncio
+import logging
+import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from agent.agent_tools import PRECOMPUTE_MAX_AGE, ResearchOptions, perplexity_deep_research_tool, research_options
+from agent.batch_runner import load_items
+from agent.direct_research import research_prompt
+from shared.database.cache_manager import cache_manager
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_ITEMS = metrics.counter(
+    "deep_search_precompute_items", "예약 사전 조사 항목 수", ["status"]
+)
+PRECOMPUTE_LAST_RUN = metrics.gauge(
+    "deep_search_precompute_last_run_timestamp", "마지막 예약 사전 조사 완료 시각 (unix time)"
+)
+
+
+class PrecomputeScheduler:
+    """지정 시각마다 질의 파일의 리서치를 미리 실행해 캐시에 적재"""
+
+    def __init__(
+        self,
+        path: Optional[str],
+        times: List[str],
+        timezone: str = "Asia/Seoul",
+        weekdays: Optional[List[int]] = None,
+        concurrency: int = 2,
+    ):
+        self.path = Path(path) if path else None
+        self.times = sorted(datetime.time.fromisoformat(t) for t in times)
+        self._tz = ZoneInfo(timezone)
+        self.weekdays = set(weekdays if weekdays is not None else range(5))
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def next_run(self, now: Optional[datetime.datetime] = None) -> datetime.datetime:
+        """now 이후 첫 예약 시각 (PRECOMPUTE_WEEKDAYS 에 해당하는 날만)"""
+        now = now or datetime.datetime.now(self._tz)
+        for days in range(8):
+            day = (now + datetime.timedelta(days=days)).date()
+            if day.weekday() not in self.weekdays:
+                continue
+            for at in self.times:
+                candidate = datetime.datetime.combine(day, at, tzinfo=self._tz)
+                if candidate > now:
+                    return candidate
+        raise ValueError("PRECOMPUTE_WEEKDAYS 에 실행할 요일이 없습니다.")
+
+    async def _run_item(self, item: Dict[str, Any], semaphore: asyncio.Semaphore) -> str:
+        async with semaphore:
+            # 각 항목은 별도 task 이므로 contextvar 설정이 서로 섞이지 않는다
+            research_options.set(
+                ResearchOptions(
+                    app_name=item.get("app_name", "precompute"),
+                    user_id=item.get("user_id", "precompute"),
+                    report_entity=str(item.get("entity") or item.get("ticker") or ""),
+                    precompute=True,
+                )
+            )
+            try:
+                result = await perplexity_deep_research_tool(research_prompt(item["query"]))
+                status = result.get("status", "error")
+                if status != "success":
+                    logger.warning(f"[Precompute] {item['id']} 실패: {result.get('error')}")
+            except Exception as e:
+                logger.exception(f"[Precompute] {item['id']} 실행 실패: {e}")
+                status = "error"
+            PRECOMPUTE_ITEMS.labels(status=status).inc()
+            return status
+
+    async def run_once(self, slot: str) -> Optional[Dict[str, int]]:
+        """예약 시각(slot) 한 번 실행 (다른 worker 가 이미 실행 중이면 None)"""
+        if not cache_manager.claim(f"precompute_run:{slot}", PRECOMPUTE_MAX_AGE):
+            logger.info(f"[Precompute] {slot} 은 다른 worker 가 실행합니다.")
+            return None
+        try:
+            items = load_items(self.path)
+        except (OSError, SystemExit) as e:
+            # load_items 는 CLI 용이라 형식 오류를 SystemExit 로 알린다
+            logger.warning(f"[Precompute] 질의 파일을 읽을 수 없습니다 ({self.path}): {e}")
+            return None
+        started = time.perf_counter()
+        logger.info(f"[Precompute] {slot} 사전 조사 시작 ({len(items)}건)")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        statuses = await asyncio.gather(*(self._run_item(item, semaphore) for item in items))
+        stats = {"success": statuses.count("success"), "error": len(statuses) - statuses.count("success")}
+        PRECOMPUTE_LAST_RUN.set(time.time())
+        logger.info(f"[Precompute] {slot} 완료 {stats} ({time.perf_counter() - started:.1f}s)")
+        return stats
+
+    async def _run(self):
+        while True:
+            next_at = self.next_run()
+            logger.info(f"[Precompute] 다음 실행: {next_at.isoformat()}")
+            await asyncio.sleep((next_at - datetime.datetime.now(self._tz)).total_seconds())
+            try:
+                await self.run_once(next_at.strftime("%Y-%m-%dT%H:%M"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[Precompute] 실행 실패: {e}")
+
+    def start(self):
+        if self.running or self.path is None or not self.times:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"[Precompute] 시작 (file={self.path}, times={[t.isoformat('minutes') for t in self.times]})")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 글로벌 인스턴스 (PRECOMPUTE_FILE 이 없으면 시작하지 않음)
+precompute_scheduler = PrecomputeScheduler(
+    os.getenv("PRECOMPUTE_FILE"),
+    [t.strip() for t in os.getenv("PRECOMPUTE_TIMES", "08:00").split(",") if t.strip()],
+    timezone=os.getenv("PRECOMPUTE_TIMEZONE", "Asia/Seoul"),
+    weekdays=[int(d) for d in os.getenv("PRECOMPUTE_WEEKDAYS", "0,1,2,3,4").split(",") if d.strip()],
+    concurrency=int(os.getenv("PRECOMPUTE_CONCURRENCY", "2")),
+)
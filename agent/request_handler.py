@@ -0,0 +1,150 @@
+import asyncio
+import logging
+
+from a2a.server.context import ServerCallContext
+from a2a.server.events import EventConsumer
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import TaskManager
+from a2a.types import (
+    InternalError,
+    Message,
+    MessageSendParams,
+    Task,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+from a2a.utils import new_agent_text_message
+from a2a.utils.errors import ServerError
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundJobRequestHandler(DefaultRequestHandler):
+    """message/send 를 백그라운드 job 으로 실행할 수 있는 request handler
+
+    configuration.blocking 이 false 이거나 metadata.background 가 true 이면
+    task 를 만든 즉시 (submitted 상태의) Task 를 반환하고, 나머지 파이프라인은
+    백그라운드에서 실행한다. 클라이언트는 tasks/get 으로 조회하거나
+    pushNotificationConfig 로 등록한 URL 에서 상태 변경을 받는다.
+    실행 중 예외로 끝난 job 은 task 를 failed 로 저장하고 마지막 push notification 을 보낸다.
+    동시에 실행되는 job 수는 executor 의 admission control 이 제한한다.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 실행 중인 백그라운드 job (GC 로 사라지지 않도록 참조 유지)
+        self._background_jobs: set[asyncio.Task] = set()
+
+    @staticmethod
+    def is_background_request(params: MessageSendParams) -> bool:
+        if params.configuration and params.configuration.blocking is False:
+            return True
+        metadata = params.message.metadata or {}
+        return bool(metadata.get("background", False))
+
+    async def on_message_send(
+        self,
+        params: MessageSendParams,
+        context: ServerCallContext | None = None,
+    ) -> Message | Task:
+        if not self.is_background_request(params):
+            return await super().on_message_send(params, context)
+
+        (
+            task_manager,
+            task_id,
+            queue,
+            result_aggregator,
+            producer_task,
+        ) = await self._setup_message_execution(params, context)
+
+        consumer = EventConsumer(queue)
+        producer_task.add_done_callback(consumer.agent_task_callback)
+
+        first_result: asyncio.Future = asyncio.get_running_loop().create_future()
+        job = asyncio.create_task(
+            self._run_background_job(
+                params, task_manager, task_id, consumer, result_aggregator, producer_task, first_result
+            )
+        )
+        self._background_jobs.add(job)
+        job.add_done_callback(self._background_jobs.discard)
+
+        # 첫 이벤트(task 생성)까지만 기다렸다가 반환
+        return await first_result
+
+    async def _run_background_job(
+        self,
+        params: MessageSendParams,
+        task_manager: TaskManager,
+        task_id: str,
+        consumer: EventConsumer,
+        result_aggregator,
+        producer_task: asyncio.Task,
+        first_result: asyncio.Future,
+    ):
+        failed = False
+        try:
+            async for _event in result_aggregator.consume_and_emit(consumer):
+                if not first_result.done():
+                    result = await result_aggregator.current_result
+                    if (
+                        isinstance(result, Task)
+                        and self._push_notifier
+                        and params.configuration
+                        and params.configuration.pushNotificationConfig
+                    ):
+                        await self._push_notifier.set_info(
+                            result.id, params.configuration.pushNotificationConfig
+                        )
+                    first_result.set_result(result)
+                await self._send_push_notification_if_needed(task_id, result_aggregator)
+        except Exception as e:
+            logger.error(f"Background job failed (task_id={task_id}): {e}")
+            failed = True
+            if not first_result.done():
+                first_result.set_exception(e)
+            await self._mark_failed(task_manager, task_id, result_aggregator)
+        finally:
+            if not first_result.done():
+                first_result.set_exception(ServerError(error=InternalError()))
+            try:
+                await self._cleanup_producer(producer_task, task_id)
+            except Exception as e:
+                # executor 예외는 consumer 보다 먼저 여기서 (producer task 를 기다릴 때) 드러날 수 있다
+                if not failed:
+                    logger.error(f"Background job failed (task_id={task_id}): {e}")
+                    await self._mark_failed(task_manager, task_id, result_aggregator)
+
+    async def _mark_failed(self, task_manager: TaskManager, task_id: str, result_aggregator):
+        """예외로 끝난 job 의 task 를 failed 로 저장하고 알림 (tasks/get 조회자가 종료 상태를 볼 수 있도록)"""
+        try:
+            task = await task_manager.get_task()
+            if task is None or task.status.state in (
+                TaskState.completed,
+                TaskState.canceled,
+                TaskState.failed,
+                TaskState.rejected,
+            ):
+                return
+            await task_manager.save_task_event(
+                TaskStatusUpdateEvent(
+                    taskId=task.id,
+                    contextId=task.contextId,
+                    status=TaskStatus(
+                        state=TaskState.failed,
+                        message=new_agent_text_message(
+                            "작업 실행 중 오류가 발생했습니다.", task.contextId, task.id
+                        ),
+                    ),
+                    final=True,
+                )
+            )
+            await self._send_push_notification_if_needed(task_id, result_aggregator)
+        except Exception as e:
+            logger.error(f"Background job failure status update failed (task_id={task_id}): {e}")
+
+    @property
+    def background_job_count(self) -> int:
+        return len(self._background_jobs)
@@ -0,0 +1,125 @@
+"""
+도구 결과 압축 (Gemini 에 전체 리포트를 다시 보내지 않기)
+
+perplexity_deep_research_tool 의 결과(12k 토큰 리포트 등)를 그대로 function response 로 돌려주면
+Gemini 가 이를 다시 읽고 최종 JSON 답변으로 복사하는 두 번째 왕복이 생긴다.
+압축 모드에서는 전체 결과를 handle 로 보관하고, 모델에는 요약(digest)과 handle 만 전달하며
+요약 단계를 건너뛰도록(skip_summarization) 표시한다. 최종 answer 는 DeepSearchAgent 가 handle 로 조립한다.
+
+- ResearchOptions.compact_tool_results (metadata compact_tool_results, 기본값은 TOOL_RESULT_COMPACTION) 로 켠다
+- usage/cached 는 사용료 계산에 필요하므로 digest 에 그대로 남긴다
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from agent.agent_tools import research_options
+from agent.incremental_report import section_titles
+
+logger = logging.getLogger(__name__)
+
+TOOL_DIGEST_CHARS = int(os.getenv("TOOL_DIGEST_CHARS", "800"))
+TOOL_RESULT_TTL = int(os.getenv("TOOL_RESULT_TTL", "1800"))
+TOOL_RESULT_MAX_ENTRIES = int(os.getenv("TOOL_RESULT_MAX_ENTRIES", "256"))
+
+
+class ToolResultRegistry:
+    """handle -> 전체 도구 결과 (프로세스 메모리, 오래된 항목부터 정리)"""
+
+    def __init__(self, ttl: int = TOOL_RESULT_TTL, max_entries: int = TOOL_RESULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, result: Dict[str, Any]) -> str:
+        handle = f"report-{uuid.uuid4().hex[:12]}"
+        now = time.time()
+        with self._lock:
+            self._entries[handle] = (now, result)
+            while self._entries:
+                oldest_handle, (stored_at, _) = next(iter(self._entries.items()))
+                if len(self._entries) <= self.max_entries and now - stored_at <= self.ttl:
+                    break
+                del self._entries[oldest_handle]
+        return handle
+
+    def pop(self, handle: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.pop(handle, None)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+
+def compact_tool_result(result: Dict[str, Any], handle: str) -> Dict[str, Any]:
+    """모델에 돌려줄 digest (전체 리포트 대신 목차, 앞부분, handle)"""
+    report = result.get("response") or ""
+    return {
+        "status": result.get("status"),
+        "report_handle": handle,
+        "report_chars": len(report),
+        "sections": section_titles(report)[:20],
+        "excerpt": report[:TOOL_DIGEST_CHARS],
+        "citations": len(result.get("citations") or []),
+        "usage": result.get("usage"),
+        "cached": result.get("cached", False),
+        "freshness": result.get("freshness"),
+        "message": "전체 리포트는 report_handle 로 보관되어 최종 응답에 그대로 포함됩니다. 리포트를 다시 작성하지 마세요.",
+    }
+
+
+async def after_tool_callback(tool, args, tool_context, tool_response):
+    """ADK after_tool_callback: 성공한 리서치 결과를 digest 로 바꾸고 요약 단계를 건너뜀"""
+    if not research_options.get().compact_tool_results:
+        return None
+    if not isinstance(tool_response, dict) or tool_response.get("status") != "success":
+        return None
+    if not tool_response.get("response"):
+        return None
+    handle = tool_result_registry.put(tool_response)
+    tool_context.actions.skip_summarization = True
+    logger.info(f"도구 결과 압축: {tool.name} -> {handle} ({len(tool_response['response'])}자)")
+    return compact_tool_result(tool_response, handle)
+
+
+def report_handles(event_dict: Dict[str, Any]) -> List[str]:
+    """이벤트의 function response 에 포함된 report handle 목록"""
+    handles = []
+    content = event_dict.get("content") or {}
+    for part in content.get("parts") or []:
+        response = (part.get("function_response") or {}).get("response") or {}
+        if response.get("report_handle"):
+            handles.append(response["report_handle"])
+    return handles
+
+
+def tool_statuses(event_dict: Dict[str, Any]) -> List[str]:
+    """이벤트의 function response 에 포함된 도구 실행 status 목록"""
+    statuses = []
+    content = event_dict.get("content") or {}
+    for part in content.get("parts") or []:
+        function_response = part.get("function_response")
+        if function_response:
+            statuses.append((function_response.get("response") or {}).get("status"))
+    return statuses
+
+
+def assemble_answer(handles: List[str]) -> Optional[str]:
+    """보관된 전체 리포트로 최종 answer 조립 (모두 만료되었으면 None)"""
+    reports = []
+    for handle in handles:
+        result = tool_result_registry.pop(handle)
+        if result is None:
+            logger.warning(f"보관된 도구 결과가 없습니다: {handle}")
+            continue
+        reports.append(result["response"])
+    return "\n\n---\n\n".join(reports) if reports else None
+
+
+# 글로벌 인스턴스
+tool_result_registry = ToolResultRegistry()
@@ -0,0 +1,351 @@
+import os
+import json
+import asyncio
+import datetime
+import logging
+import threading
+import dataclasses
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from shared.database.connection import db_manager
+from shared.database.queries import DatabaseQueries
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+USAGE_LEDGER_FLUSHES = metrics.counter(
+    "deep_search_usage_ledger_flushes", "사용량 원장 DB flush 횟수", ["outcome"]
+)
+USAGE_BUDGET_DECISIONS = metrics.counter(
+    "deep_search_usage_budget_decisions", "사전 budget 확인 결과", ["action"]
+)
+
+# 원장에 누적하는 항목 (tenant_usage_daily 컬럼 순서와 동일)
+_USAGE_FIELDS = (
+    "requests",
+    "input_tokens",
+    "output_tokens",
+    "citation_tokens",
+    "search_queries",
+    "reasoning_tokens",
+    "cost_usd",
+)
+_ROLLUP_COLUMNS = ("usage_date", "app_name", "user_id", "model")
+
+# budget 한도에 가까워진(downgrade) 요청에 적용할 축소 설정
+BUDGET_DOWNGRADE_MODEL = os.getenv("BUDGET_DOWNGRADE_MODEL", "sonar-deep-research")
+BUDGET_DOWNGRADE_REASONING_EFFORT = os.getenv("BUDGET_DOWNGRADE_REASONING_EFFORT", "low")
+BUDGET_DOWNGRADE_MAX_TOKENS = int(os.getenv("BUDGET_DOWNGRADE_MAX_TOKENS", "4000"))
+
+
+@dataclass(frozen=True)
+class BudgetDecision:
+    """요청 실행 전 budget 확인 결과"""
+    action: str  # allow | downgrade | refuse
+    scope: str = ""  # 한도에 걸린 범위 (tenant | user)
+    spent: float = 0.0
+    budget: float = 0.0
+    retry_after: int = 0
+
+
+def apply_budget_decision(options, decision: BudgetDecision):
+    """downgrade 결정이면 요청 설정(ResearchOptions)을 BUDGET_DOWNGRADE_* 로 축소 (그 외에는 그대로)"""
+    if decision.action != "downgrade":
+        return options
+    return dataclasses.replace(
+        options,
+        model=BUDGET_DOWNGRADE_MODEL,
+        reasoning_effort=BUDGET_DOWNGRADE_REASONING_EFFORT,
+        max_tokens=BUDGET_DOWNGRADE_MAX_TOKENS,
+        budget_downgraded=True,
+    )
+
+
+class UsageLedger:
+    """tenant(app_name) / 사용자별 일일 사용량 원장
+
+    - record() 는 lock 안에서 dict 카운터만 갱신한다 (O(1), I/O 없음)
+    - 누적분은 flush_interval 초마다 한 번의 일괄 upsert 로 DB 에 반영하고,
+      같은 주기에 오늘 사용량(다른 worker 포함)을 다시 읽어 기준값으로 삼는다
+    - check_budget() 은 기준값 + 아직 반영되지 않은 로컬 누적분만 보므로 요청 경로에서 DB 를 기다리지 않는다
+    다른 worker 의 사용량은 최대 flush_interval 만큼 늦게 반영된다.
+    """
+
+    def __init__(
+        self,
+        daily_budget: float = 0.0,
+        user_daily_budget: float = 0.0,
+        tenant_budgets: Optional[Dict[str, float]] = None,
+        downgrade_ratio: float = 0.8,
+        flush_interval: float = 10.0,
+        timezone: str = "Asia/Seoul",
+    ):
+        self.daily_budget = daily_budget
+        self.user_daily_budget = user_daily_budget
+        self.tenant_budgets = tenant_budgets or {}
+        self.downgrade_ratio = downgrade_ratio
+        self._flush_interval = flush_interval
+        self._tz = ZoneInfo(timezone)
+        self._lock = threading.Lock()
+        # DB 에 아직 쓰지 않은 누적분: (day, app_name, user_id, model) -> [requests, ..., cost_usd]
+        self._pending: Dict[Tuple[str, str, str, str], List[float]] = {}
+        # 기준값 이후 이 worker 에서 발생한 비용: (day, app_name) / (day, app_name, user_id) -> USD
+        self._local_tenant: Dict[Tuple[str, str], float] = {}
+        self._local_user: Dict[Tuple[str, str, str], float] = {}
+        # 마지막으로 DB 에서 읽은 오늘 사용량 (모든 worker 합계)
+        self._baseline_day: Optional[str] = None
+        self._baseline_tenant: Dict[str, float] = {}
+        self._baseline_user: Dict[Tuple[str, str], float] = {}
+        self._table_ready = False
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+
+    def today(self) -> str:
+        return datetime.datetime.now(self._tz).date().isoformat()
+
+    def _seconds_until_reset(self) -> int:
+        now = datetime.datetime.now(self._tz)
+        tomorrow = datetime.datetime.combine(
+            now.date() + datetime.timedelta(days=1), datetime.time(), tzinfo=self._tz
+        )
+        return max(1, int((tomorrow - now).total_seconds()))
+
+    def record(self, app_name: str, user_id: str, model: str, cost_info: Dict[str, Any]):
+        """Perplexity 호출 한 건의 사용량 누적"""
+        usage = cost_info.get("usage", {})
+        cost = float(cost_info.get("total_cost", 0.0) or 0.0)
+        day = self.today()
+        with self._lock:
+            counters = self._pending.get((day, app_name, user_id, model))
+            if counters is None:
+                counters = self._pending[(day, app_name, user_id, model)] = [0] * len(_USAGE_FIELDS)
+            counters[0] += 1
+            for i, field in enumerate(_USAGE_FIELDS[1:-1], start=1):
+                counters[i] += usage.get(field, 0) or 0
+            counters[-1] += cost
+            self._local_tenant[(day, app_name)] = self._local_tenant.get((day, app_name), 0.0) + cost
+            self._local_user[(day, app_name, user_id)] = (
+                self._local_user.get((day, app_name, user_id), 0.0) + cost
+            )
+
+    def spent_today(self, app_name: str, user_id: Optional[str] = None) -> float:
+        """오늘 누적 비용 (USD, user_id 를 주면 해당 사용자만)"""
+        day = self.today()
+        with self._lock:
+            baseline_valid = self._baseline_day == day
+            if user_id is None:
+                base = self._baseline_tenant.get(app_name, 0.0) if baseline_valid else 0.0
+                return base + self._local_tenant.get((day, app_name), 0.0)
+            base = self._baseline_user.get((app_name, user_id), 0.0) if baseline_valid else 0.0
+            return base + self._local_user.get((day, app_name, user_id), 0.0)
+
+    def tenant_budget(self, app_name: str) -> float:
+        return self.tenant_budgets.get(app_name, self.daily_budget)
+
+    def check_budget(self, app_name: str, user_id: str) -> BudgetDecision:
+        """요청 실행 전 budget 확인 (메모리 조회만 수행)"""
+        decision = BudgetDecision("allow")
+        for scope, budget, spent in (
+            ("tenant", self.tenant_budget(app_name), lambda: self.spent_today(app_name)),
+            ("user", self.user_daily_budget, lambda: self.spent_today(app_name, user_id)),
+        ):
+            if budget <= 0:
+                continue
+            used = spent()
+            if used >= budget:
+                decision = BudgetDecision(
+                    "refuse", scope, used, budget, self._seconds_until_reset()
+                )
+                break
+            if used >= budget * self.downgrade_ratio and decision.action == "allow":
+                decision = BudgetDecision("downgrade", scope, used, budget)
+        USAGE_BUDGET_DECISIONS.labels(action=decision.action).inc()
+        return decision
+
+    # ------------------------------------------------------------------
+
+    async def _ensure_table(self):
+        if self._table_ready:
+            return
+        try:
+            await db_manager.execute_async_query(DatabaseQueries.CREATE_TENANT_USAGE_TABLE)
+        except Exception as e:
+            # 권한이 없으면 테이블이 이미 있다고 보고 진행
+            logger.warning(f"[UsageLedger] 사용량 테이블 생성 실패: {e}")
+        self._table_ready = True
+
+    async def _load_baseline(self) -> Tuple[str, Dict[str, float], Dict[Tuple[str, str], float]]:
+        day = self.today()
+        rows = await db_manager.execute_async_query(
+            DatabaseQueries.GET_TENANT_USAGE_BY_DAY, (day,)
+        )
+        tenant: Dict[str, float] = {}
+        user: Dict[Tuple[str, str], float] = {}
+        for app_name, user_id, cost in rows:
+            tenant[app_name] = tenant.get(app_name, 0.0) + float(cost)
+            user[(app_name, user_id)] = float(cost)
+        return day, tenant, user
+
+    async def flush(self) -> int:
+        """누적분을 DB 에 일괄 반영하고 오늘 기준값 갱신, 반영한 행 수 반환"""
+        async with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                # 반영할 비용 (기준값을 다시 읽은 뒤 로컬 누적분에서 뺀다)
+                flushed_tenant: Dict[Tuple[str, str], float] = {}
+                flushed_user: Dict[Tuple[str, str, str], float] = {}
+                for (day, app_name, user_id, _), counters in pending.items():
+                    flushed_tenant[(day, app_name)] = flushed_tenant.get((day, app_name), 0.0) + counters[-1]
+                    flushed_user[(day, app_name, user_id)] = (
+                        flushed_user.get((day, app_name, user_id), 0.0) + counters[-1]
+                    )
+
+            if pending:
+                await self._ensure_table()
+                try:
+                    await db_manager.execute_async_many(
+                        DatabaseQueries.UPSERT_TENANT_USAGE,
+                        [
+                            (day, app_name, user_id, model, *counters)
+                            for (day, app_name, user_id, model), counters in pending.items()
+                        ],
+                    )
+                except Exception:
+                    USAGE_LEDGER_FLUSHES.labels(outcome="error").inc()
+                    # 다음 주기에 다시 시도하도록 되돌린다
+                    with self._lock:
+                        for key, counters in pending.items():
+                            current = self._pending.get(key)
+                            if current is None:
+                                self._pending[key] = counters
+                            else:
+                                for i, value in enumerate(counters):
+                                    current[i] += value
+                    raise
+
+            try:
+                baseline = await self._load_baseline()
+            except Exception as e:
+                logger.warning(f"[UsageLedger] 기준값 조회 실패: {e}")
+                baseline = None
+
+            with self._lock:
+                for key, cost in flushed_tenant.items():
+                    self._local_tenant[key] = self._local_tenant.get(key, 0.0) - cost
+                for key, cost in flushed_user.items():
+                    self._local_user[key] = self._local_user.get(key, 0.0) - cost
+                if baseline is not None:
+                    self._baseline_day, self._baseline_tenant, self._baseline_user = baseline
+                else:
+                    # DB 에는 반영되었으므로 기준값에 직접 더한다
+                    today = self.today()
+                    if self._baseline_day != today:
+                        self._baseline_day, self._baseline_tenant, self._baseline_user = today, {}, {}
+                    for (day, app_name), cost in flushed_tenant.items():
+                        if day == today:
+                            self._baseline_tenant[app_name] = self._baseline_tenant.get(app_name, 0.0) + cost
+                    for (day, app_name, user_id), cost in flushed_user.items():
+                        if day == today:
+                            self._baseline_user[(app_name, user_id)] = (
+                                self._baseline_user.get((app_name, user_id), 0.0) + cost
+                            )
+                # 지난 날짜의 로컬 누적분 정리
+                today = self.today()
+                self._local_tenant = {k: v for k, v in self._local_tenant.items() if k[0] == today}
+                self._local_user = {k: v for k, v in self._local_user.items() if k[0] == today}
+
+            if pending:
+                USAGE_LEDGER_FLUSHES.labels(outcome="success").inc()
+            return len(pending)
+
+    async def rollup(
+        self,
+        start_date: str,
+        end_date: str,
+        group_by: Sequence[str] = ("app_name",),
+    ) -> List[Dict[str, Any]]:
+        """기간별 사용량 집계 (group_by: usage_date, app_name, user_id, model)"""
+        invalid = [c for c in group_by if c not in _ROLLUP_COLUMNS]
+        if invalid or not group_by:
+            raise ValueError(f"group_by 는 {_ROLLUP_COLUMNS} 중에서 선택해야 합니다: {invalid}")
+        await self.flush()
+        rows = await db_manager.execute_async_query(
+            DatabaseQueries.GET_TENANT_USAGE_ROLLUP.format(group_by=", ".join(group_by)),
+            (start_date, end_date),
+            as_dict=True,
+        )
+        result = []
+        for row in rows:
+            item = {}
+            for key, value in row.items():
+                if key == "usage_date":
+                    value = str(value)
+                elif key == "cost_usd":
+                    value = round(float(value or 0), 6)
+                elif key in _USAGE_FIELDS:
+                    value = int(value or 0)
+                item[key] = value
+            result.append(item)
+        return result
+
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[UsageLedger] flush 실패: {e}")
+            await asyncio.sleep(self._flush_interval)
+
+    def start(self):
+        if self.running or self._flush_interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"[UsageLedger] 시작 (flush_interval={self._flush_interval}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # 종료 전 남은 누적분 반영
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"[UsageLedger] 종료 시 flush 실패: {e}")
+
+
+def _load_tenant_budgets() -> Dict[str, float]:
+    raw = os.getenv("TENANT_BUDGETS", "")
+    if not raw:
+        return {}
+    try:
+        return {str(k): float(v) for k, v in json.loads(raw).items()}
+    except Exception as e:
+        logger.warning(f"TENANT_BUDGETS 파싱 실패: {e}")
+        return {}
+
+
+# 글로벌 인스턴스
+usage_ledger = UsageLedger(
+    daily_budget=float(os.getenv("TENANT_DAILY_BUDGET_USD", "0")),
+    user_daily_budget=float(os.getenv("USER_DAILY_BUDGET_USD", "0")),
+    tenant_budgets=_load_tenant_budgets(),
+    downgrade_ratio=float(os.getenv("BUDGET_DOWNGRADE_RATIO", "0.8")),
+    flush_interval=float(os.getenv("USAGE_FLUSH_INTERVAL", "10")),
+    timezone=os.getenv("USAGE_TIMEZONE", "Asia/Seoul"),
+)
@@ -0,0 +1,287 @@
+"""
+요청 경로 순수 함수 마이크로 벤치마크
+
+네트워크/DB 없이 요청마다 실행되는 함수들의 호출당 시간을 측정하고, 리뷰에서 비교할 수 있도록 JSON 으로 남긴다.
+
+- extract_json: extract_json_from_llm_output (약 50KB LLM 출력: json 코드블록 / 코드블록 없음)
+- cost: PerplexityCostCalculator.calculate_cost, format_cost_summary
+- cache: CacheManager.get_or_fetch 를 동시에 여러 task 에서 호출 (적중/미스 혼합)
+- enhanced_query: plan 단계 질의 조립 (큰 accumulated_results)
+- agent_card: refresh_agent_card 의 DB 레코드 -> AgentCard 변환 (_record_to_agent_card)
+
+    python -m benchmarks.hot_path_benchmark --output benchmarks/results/hot_path.json
+    python -m benchmarks.hot_path_benchmark --baseline benchmarks/results/hot_path.json --max-regression 0.2
+
+--baseline 이 있으면 같은 조건(params)으로 측정한 항목끼리 median 을 비교하고,
+--max-regression 을 넘게 느려진 항목이 있으면 실패한다.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 공유 캐시 계층(SQLite) I/O 가 측정에 섞이지 않도록 끈다 (모듈 import 전에 설정)
+os.environ.pop("SHARED_CACHE_PATH", None)
+
+from agent.agent_card import _record_to_agent_card  # noqa: E402
+from agent.agent_executor import build_enhanced_query  # noqa: E402
+from agent.cost_calculator import PerplexityCostCalculator  # noqa: E402
+from shared.database.cache_manager import CacheManager  # noqa: E402
+
+_WORDS = (
+    "매출 영업이익 전년 대비 증가 감소 반도체 메모리 수요 공급 가격 전망 컨센서스 목표주가 "
+    "밸류에이션 배당 환율 금리 리스크 경쟁사 점유율 분기 실적 가이던스 투자의견 유지 상향 하향"
+).split()
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _report(rng: random.Random, size_kb: int) -> str:
+    """한국어 markdown 리포트 (표, 중괄호가 들어간 수식 포함)"""
+    lines, size = [], 0
+    while size < size_kb * 1024:
+        roll = rng.random()
+        if roll < 0.08:
+            line = f"## {rng.choice(_WORDS)} {rng.choice(_WORDS)}"
+        elif roll < 0.15:
+            line = f"| {rng.choice(_WORDS)} | {rng.randint(1, 999)}억 | {rng.uniform(-30, 30):.1f}% |"
+        elif roll < 0.17:
+            line = f"PER = {{주가}} / {{EPS}} = {rng.uniform(5, 40):.1f}배"
+        else:
+            line = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20)))
+            line += f" {rng.randint(1, 999)}.{rng.randint(0, 9)}% ({rng.randint(2020, 2026)}년 {rng.randint(1, 4)}분기)."
+        lines.append(line)
+        size += len(line.encode("utf-8")) + 1
+    return "\n".join(lines)
+
+
+def _time_calls(func: Callable[[], Any], number: int, repeat: int) -> Dict[str, float]:
+    """repeat 회 x number 번 호출의 호출당 시간 (us)"""
+    func()  # warm-up
+    per_call = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - start) / number * 1e6)
+    return {
+        "median_us": round(statistics.median(per_call), 3),
+        "min_us": round(min(per_call), 3),
+        "stdev_us": round(statistics.stdev(per_call), 3) if len(per_call) > 1 else 0.0,
+    }
+
+
+# ----------------------------------------------------------------------
+# 측정 항목
+
+
+def bench_extract_json(args, rng: random.Random) -> Dict[str, Any]:
+    # google.adk 를 함께 로드하므로 이 항목에서만 import
+    from agent.agent import extract_json_from_llm_output
+
+    report = _report(rng, args.output_kb)
+    answer = json.dumps({"answer": report}, ensure_ascii=False)
+    fenced = f"분석 결과입니다.\n\n```json\n{answer}\n```\n"
+    # 중괄호 축소 경로 ({{ }}) 와 코드블록이 없는 경우 (전체를 끝까지 탐색)
+    doubled = fenced.replace("{", "{{").replace("}", "}}")
+    plain = f"분석 결과입니다.\n\n{report}"
+    number = max(1, args.number // 20)
+    return {
+        "params": {"output_kb": args.output_kb, "bytes": len(fenced.encode("utf-8"))},
+        "fenced": _time_calls(lambda: extract_json_from_llm_output(fenced), number, args.repeat),
+        "doubled_braces": _time_calls(lambda: extract_json_from_llm_output(doubled), number, args.repeat),
+        "no_block": _time_calls(lambda: extract_json_from_llm_output(plain), number, args.repeat),
+    }
+
+
+def bench_cost(args, rng: random.Random) -> Dict[str, Any]:
+    calculator = PerplexityCostCalculator("sonar-deep-research")
+    usage = {
+        "input_tokens": 1_820,
+        "output_tokens": 11_950,
+        "citation_tokens": 24_310,
+        "search_queries": 27,
+        "reasoning_tokens": 183_400,
+    }
+    cost_info = calculator.calculate_cost(usage)
+    return {
+        "params": {"model": calculator.model_name},
+        "calculate_cost": _time_calls(lambda: calculator.calculate_cost(usage), args.number, args.repeat),
+        "format_cost_summary": _time_calls(lambda: calculator.format_cost_summary(cost_info), args.number, args.repeat),
+    }
+
+
+def bench_cache(args, rng: random.Random) -> Dict[str, Any]:
+    keys = [f"research:{i:06d}" for i in range(args.cache_keys)]
+    value = {"status": "success", "response": _report(rng, 4)}
+
+    async def fetch():
+        await asyncio.sleep(0)
+        return value
+
+    async def worker(cache: CacheManager, worker_rng: random.Random, calls: int):
+        for _ in range(calls):
+            await cache.get_or_fetch(worker_rng.choice(keys), fetch, 600)
+
+    async def run_round() -> float:
+        cache = CacheManager()
+        calls = args.number // args.concurrency
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker(cache, random.Random(i), calls) for i in range(args.concurrency))
+        )
+        return (time.perf_counter() - start) / (calls * args.concurrency) * 1e6
+
+    per_call = [asyncio.run(run_round()) for _ in range(args.repeat)]
+    return {
+        "params": {"concurrency": args.concurrency, "keys": args.cache_keys, "calls": args.number},
+        "get_or_fetch": {
+            "median_us": round(statistics.median(per_call), 3),
+            "min_us": round(min(per_call), 3),
+            "stdev_us": round(statistics.stdev(per_call), 3) if len(per_call) > 1 else 0.0,
+        },
+    }
+
+
+def bench_enhanced_query(args, rng: random.Random) -> Dict[str, Any]:
+    metadata = {
+        "plan": "\n".join(f"{i + 1}. {rng.choice(_WORDS)} {rng.choice(_WORDS)} 분석" for i in range(8)),
+        "next_steps": [f"{rng.choice(_WORDS)} 분석" for _ in range(5)],
+        "current_step": "경쟁사 대비 밸류에이션 분석",
+        "step_index": 3,
+        "total_steps": 8,
+        "accumulated_results": [_report(rng, args.step_result_kb) for _ in range(args.steps)],
+    }
+    return {
+        "params": {"steps": args.steps, "step_result_kb": args.step_result_kb},
+        "build_enhanced_query": _time_calls(
+            lambda: build_enhanced_query("삼성전자 투자 리포트 작성", metadata),
+            max(1, args.number // 10),
+            args.repeat,
+        ),
+    }
+
+
+def bench_agent_card(args, rng: random.Random) -> Dict[str, Any]:
+    skills = [
+        {
+            "id": f"skill_{i}",
+            "name": f"{rng.choice(_WORDS)} 리서치",
+            "description": " ".join(rng.choice(_WORDS) for _ in range(30)),
+            "tags": rng.sample(_WORDS, 4),
+            "examples": [f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} 알려줘" for _ in range(3)],
+        }
+        for i in range(args.skills)
+    ]
+    record = {
+        "name": "Deep Search Agent",
+        "description": "Perplexity Deep Research 기반으로 심층 리서치 보고서를 제공하는 에이전트입니다.",
+        "base_url": "http://localhost:8003/",
+        "capabilities": json.dumps({"streaming": True, "pushNotifications": False, "stateTransitionHistory": False}),
+        "skills": json.dumps(skills, ensure_ascii=False),
+        "default_input_modes": json.dumps(["text"]),
+        "default_output_modes": json.dumps(["text"]),
+    }
+    return {
+        "params": {"skills": args.skills},
+        "record_to_agent_card": _time_calls(lambda: _record_to_agent_card(record), args.number // 10, args.repeat),
+    }
+
+
+BENCHMARKS = {
+    "extract_json": bench_extract_json,
+    "cost": bench_cost,
+    "cache": bench_cache,
+    "enhanced_query": bench_enhanced_query,
+    "agent_card": bench_agent_card,
+}
+
+
+# ----------------------------------------------------------------------
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """같은 params 로 측정한 항목의 median 변화율"""
+    changes = []
+    for name, measured in result["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or previous.get("params") != measured.get("params"):
+            continue
+        for case, stats in measured.items():
+            if case == "params" or case not in previous:
+                continue
+            change = stats["median_us"] / previous[case]["median_us"] - 1
+            changes.append({"benchmark": f"{name}.{case}", "baseline_us": previous[case]["median_us"],
+                            "median_us": stats["median_us"], "change": round(change, 4)})
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="요청 경로 순수 함수 마이크로 벤치마크")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="실행할 항목 (기본 전체)")
+    parser.add_argument("--number", type=int, default=2_000, help="반복 1회당 호출 수")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-kb", type=int, default=50, help="extract_json 입력 크기")
+    parser.add_argument("--concurrency", type=int, default=50, help="cache 동시 task 수")
+    parser.add_argument("--cache-keys", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=20, help="enhanced_query 의 이전 단계 결과 수")
+    parser.add_argument("--step-result-kb", type=int, default=8)
+    parser.add_argument("--skills", type=int, default=20, help="agent card skill 수")
+    parser.add_argument("--output", type=Path, default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", type=Path, default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--max-regression", type=float, default=None, help="baseline 대비 median 증가 허용 비율")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"[{name}] 측정 중...", file=sys.stderr)
+        results[name] = BENCHMARKS[name](args, random.Random(args.seed))
+
+    result = {
+        "benchmark": "hot_path",
+        "commit": _git_commit(),
+        "measured_at": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "number": args.number,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text("utf-8"))
+        result["baseline_commit"] = baseline.get("commit")
+        result["changes"] = compare(result, baseline)
+        if args.max_regression is not None:
+            regressions = [c for c in result["changes"] if c["change"] > args.max_regression]
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n", "utf-8")
+    if regressions:
+        names = ", ".join(f"{c['benchmark']} {c['change']:+.1%}" for c in regressions)
+        raise SystemExit(f"baseline({result['baseline_commit']}) 대비 느려진 항목: {names}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+유사 질의 색인 벤치마크
+
+NearDuplicateIndex 에 합성 질의를 채운 뒤 정확 일치 / 표현만 다른 질의 / 무관한 질의의 조회 시간을 측정한다.
+
+    python -m benchmarks.near_duplicate_benchmark --entries 100000 --max-ms 1
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from shared.near_duplicate import NearDuplicateIndex
+
+_SYLLABLES = "가나다라마바사아자차카타파하한국삼성현대엘지에스케이네이버카카오전자화학바이오증권은행제약건설통신"
+_TOPICS = [
+    "실적 전망", "주가 전망", "배당 정책", "밸류에이션", "경쟁사 비교", "리스크 요인", "신사업", "수출 동향",
+    "환율 영향", "금리 영향", "점유율", "설비 투자", "목표 주가", "컨센서스", "수주 잔고", "원가 구조",
+    "earnings outlook", "guidance", "margin trend", "capex plan", "market share", "valuation",
+]
+_PARAPHRASE = ["{q}", "{q} 분석", "{q} 관련 정리해줘", "향후 {q}", "{q}에 대해 알려주세요"]
+
+
+def _entity(rng: random.Random) -> str:
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 5)))
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": statistics.median(samples) * 1000,
+        "p99_ms": samples[int(len(samples) * 0.99) - 1] * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+    }
+
+
+def _measure(index: NearDuplicateIndex, queries):
+    timings, hits = [], 0
+    for q in queries:
+        start = time.perf_counter()
+        found = index.lookup("bench", q)
+        timings.append(time.perf_counter() - start)
+        hits += found is not None
+    return {**_percentiles(timings), "hit_rate": hits / len(queries)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="유사 질의 색인 벤치마크")
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=2_000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-ms", type=float, default=None, help="조회 p99 가 이 값을 넘으면 실패")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entities = [_entity(rng) for _ in range(max(args.entries // 20, 1))]
+    index = NearDuplicateIndex(threshold=args.threshold, max_entries=args.entries)
+
+    stored = []
+    start = time.perf_counter()
+    while len(index) < args.entries:
+        q = f"{rng.choice(entities)} {rng.choice(_TOPICS)} {rng.randint(2015, 2030)}"
+        index.add("bench", q, len(stored))
+        stored.append(q)
+    build_seconds = time.perf_counter() - start
+
+    sample = rng.sample(stored, min(args.lookups, len(stored)))
+    result = {
+        "benchmark": "near_duplicate",
+        "entries": len(index),
+        "threshold": args.threshold,
+        "add_ms_mean": build_seconds / len(stored) * 1000,
+        "exact": _measure(index, sample),
+        "paraphrase": _measure(index, [rng.choice(_PARAPHRASE).format(q=q) for q in sample]),
+        "unrelated": _measure(
+            index,
+            [f"{_entity(rng)}{_entity(rng)} {rng.choice(_TOPICS)}" for _ in range(len(sample))],
+        ),
+    }
+    worst = max(result[k]["p99_ms"] for k in ("exact", "paraphrase", "unrelated"))
+    result["passed"] = args.max_ms is None or worst <= args.max_ms
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if not result["passed"]:
+        raise SystemExit(f"조회 p99 {worst:.3f}ms > {args.max_ms}ms")
+
+
+if __name__ == "__main__":
+    main()
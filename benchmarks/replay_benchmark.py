@@ -0,0 +1,180 @@
+"""
+기록된 cassette 재생 성능 벤치마크
+
+CASSETTE_MODE=record 로 한 번 실행해 Perplexity/Gemini 응답을 기록한 뒤,
+같은 질의 파일을 네트워크 없이 반복 재생해 단계별 소요 시간과 메모리 할당을 측정한다.
+
+    # 1) 기록 (실제 API 호출)
+    CASSETTE_MODE=record CASSETTE_PATH=benchmarks/cassettes/daily.jsonl \\
+        python -m agent.batch_runner queries.jsonl -o /tmp/out.jsonl --mode agent
+    # 2) 재생 (--speed 0: 대기 없이 자체 처리 시간만, 1: 기록된 지연 그대로)
+    python -m benchmarks.replay_benchmark queries.jsonl --cassette benchmarks/cassettes/daily.jsonl \\
+        --mode agent --runs 5 --history benchmarks/results/replay.jsonl --max-regression 0.2
+
+- 질의 파일 형식은 agent.batch_runner 와 같다. 재생이 반복 가능하도록 캐시/리포트 재사용/증분 모드는 끈다.
+- --history 에 commit 별 결과를 한 줄씩 추가하고, --max-regression 이 있으면 같은 cassette/mode 의
+  직전 기록보다 p50 이 그 비율 이상 느려졌을 때 실패한다.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 재생이 매번 같은 요청을 만들도록 캐시/재사용을 끈다 (agent 모듈 import 전에 설정)
+os.environ.update({"RESEARCH_CACHE_DURATION": "0", "REPORT_REUSE_MAX_AGE": "0"})
+os.environ.setdefault("PERPLEXITY_API_KEY", "replay")
+os.environ.setdefault("REPORT_STORE_PATH", str(Path(tempfile.mkdtemp()) / "reports.db"))
+
+from agent.agent_tools import ResearchOptions, perplexity_deep_research_tool, research_options  # noqa: E402
+from agent.batch_runner import load_items  # noqa: E402
+from shared.cassette import cassette  # noqa: E402
+from shared.metrics import AGENT_PHASE_SECONDS, PERPLEXITY_REQUEST_SECONDS  # noqa: E402
+
+_PHASE_METRICS = (AGENT_PHASE_SECONDS, PERPLEXITY_REQUEST_SECONDS)
+
+
+def _phase_totals() -> Dict[str, List[float]]:
+    """{'phase 이름': [합계 초, 횟수]} (히스토그램 _sum/_count 기준)"""
+    totals: Dict[str, List[float]] = {}
+    for metric in _PHASE_METRICS:
+        for name, labels, value in metric.samples():
+            if name.endswith("_sum") or name.endswith("_count"):
+                phase = metric.name + "{" + ",".join(f"{k}={v}" for k, v in sorted(labels.items())) + "}"
+                totals.setdefault(phase, [0.0, 0.0])[name.endswith("_count")] += value
+    return totals
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def _run_item(item: Dict[str, Any], mode: str, run: int, agents: Dict[str, Any]):
+    options = ResearchOptions(
+        app_name=item.get("app_name", "batch"),
+        user_id=item.get("user_id", "batch"),
+    )
+    research_options.set(options)
+    if mode == "tool":
+        result = await perplexity_deep_research_tool(item["query"])
+        if result.get("status") != "success":
+            raise RuntimeError(f"[{item['id']}] 재생 실패: {result.get('error')}")
+        return
+    from agent.agent import DeepSearchAgent
+
+    agent = agents.get(options.app_name)
+    if agent is None:
+        agent = agents[options.app_name] = DeepSearchAgent(options.app_name)
+    session_id = f"replay-{run}-{item['id']}"
+    async for _ in agent.invoke(item["query"], session_id, session_id, options.user_id, options.app_name):
+        pass
+
+
+async def run_benchmark(items: List[Dict[str, Any]], mode: str, runs: int) -> Dict[str, Any]:
+    agents: Dict[str, Any] = {}
+    timings: List[float] = []
+    peaks: List[int] = []
+    growth: List[int] = []
+    before_phases = _phase_totals()
+    tracemalloc.start()
+    for run in range(runs):
+        cassette.rewind()
+        for item in items:
+            tracemalloc.reset_peak()
+            current_before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            await _run_item(item, mode, run, agents)
+            timings.append(time.perf_counter() - start)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - current_before)
+            growth.append(current - current_before)
+    tracemalloc.stop()
+
+    phases = {}
+    for phase, (total, count) in _phase_totals().items():
+        previous_total, previous_count = before_phases.get(phase, (0.0, 0.0))
+        if count > previous_count:
+            phases[phase] = round((total - previous_total) / (count - previous_count) * 1000, 3)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(_percentile(timings, 0.95) * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "phase_mean_ms": phases,
+        "alloc_peak_kb_p50": round(statistics.median(peaks) / 1024, 1),
+        "alloc_retained_kb_mean": round(statistics.fmean(growth) / 1024, 1),
+    }
+
+
+def _previous_result(history: Path, cassette_path: str, mode: str, speed: float):
+    if not history.exists():
+        return None
+    previous = None
+    with history.open(encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if (record.get("cassette"), record.get("mode"), record.get("speed")) == (cassette_path, mode, speed):
+                previous = record
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cassette 재생 성능 벤치마크")
+    parser.add_argument("input", type=Path, help="질의 JSONL 파일 (batch_runner 형식)")
+    parser.add_argument("--cassette", required=True, help="기록된 cassette (JSONL)")
+    parser.add_argument("--mode", choices=("tool", "agent"), default="tool")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--speed", type=float, default=0, help="재생 속도 (0 이면 대기 없음, 1 이면 실제 시간)")
+    parser.add_argument("--history", type=Path, default=None, help="commit 별 결과를 추가할 JSONL")
+    parser.add_argument("--max-regression", type=float, default=None, help="직전 기록 대비 p50 증가 허용 비율")
+    args = parser.parse_args()
+
+    cassette.configure(args.cassette, "replay", args.speed)
+    items = load_items(args.input)
+    measured = asyncio.run(run_benchmark(items, args.mode, args.runs))
+    result = {
+        "benchmark": "replay",
+        "commit": _git_commit(),
+        "measured_at": time.time(),
+        "cassette": args.cassette,
+        "mode": args.mode,
+        "speed": args.speed,
+        "items": len(items),
+        "runs": args.runs,
+        **measured,
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    regression = None
+    if args.history:
+        previous = _previous_result(args.history, args.cassette, args.mode, args.speed)
+        if previous and previous.get("p50_ms"):
+            regression = result["p50_ms"] / previous["p50_ms"] - 1
+            print(f"직전 기록({previous['commit']}) 대비 p50 {regression:+.1%}", file=sys.stderr)
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with args.history.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    if args.max_regression is not None and regression is not None and regression > args.max_regression:
+        sys.exit(f"p50 이 직전 기록보다 {regression:.1%} 느려졌습니다 (허용 {args.max_regression:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+공유 캐시 worker 간 전파 확인
+
+두 프로세스(worker A, B)가 같은 SHARED_CACHE_PATH 로 CacheManager 를 만든다.
+B 가 먼저 값을 읽어 L1 에 올려 둔 뒤 A 가 같은 key 를 set(..., propagate=True) 로 덮어쓰거나 invalidate_cache 하면,
+B 가 새 값(또는 미스)을 보게 될 때까지 걸린 시간을 측정한다. --timeout 안에 반영되지 않으면 실패한다.
+
+    python -m benchmarks.shared_cache_benchmark --rounds 20 --timeout 5
+"""
+import os
+import json
+import time
+import argparse
+import statistics
+import tempfile
+import multiprocessing as mp
+from pathlib import Path
+
+# 모듈 전역 cache_manager 가 같은 파일을 열지 않도록 끈다 (각 worker 가 직접 만든다)
+os.environ.pop("SHARED_CACHE_PATH", None)
+
+from shared.database.cache_manager import CacheManager  # noqa: E402
+from shared.database.shared_cache import SharedCacheTier  # noqa: E402
+
+
+def _cache(path: str, poll: float) -> CacheManager:
+    os.environ["SHARED_CACHE_INVALIDATION_POLL"] = str(poll)
+    return CacheManager(SharedCacheTier(path))
+
+
+def _writer(path: str, poll: float, rounds: int, ready, go, done):
+    cache = _cache(path, poll)
+    for i in range(rounds):
+        ready.wait()
+        ready.clear()
+        if i % 2 == 0:
+            cache.set("bench:key", f"v{i + 1}", 3600, propagate=True)
+        else:
+            cache.invalidate_cache("bench:key")
+        go.set()
+        done.wait()
+        done.clear()
+
+
+def _reader(path: str, poll: float, rounds: int, timeout: float, ready, go, done, results):
+    cache = _cache(path, poll)
+    cache.set("bench:key", "v0", 3600)
+    for i in range(rounds):
+        # 이전 값을 L1 에 올려 둔다
+        cache.get("bench:key", 3600)
+        ready.set()
+        go.wait()
+        go.clear()
+        expected = f"v{i + 1}" if i % 2 == 0 else None
+        start = time.perf_counter()
+        seen = cache.get("bench:key", 3600)
+        while seen != expected and time.perf_counter() - start < timeout:
+            time.sleep(0.01)
+            seen = cache.get("bench:key", 3600)
+        results.put({"op": "set" if i % 2 == 0 else "invalidate", "ok": seen == expected,
+                     "seconds": time.perf_counter() - start})
+        if expected is None:
+            # 다음 라운드가 읽을 값을 다시 채운다
+            cache.set("bench:key", f"v{i + 1}", 3600)
+        done.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공유 캐시 worker 간 전파 확인")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--poll", type=float, default=1.0, help="SHARED_CACHE_INVALIDATION_POLL")
+    parser.add_argument("--timeout", type=float, default=5.0, help="이 시간 안에 반영되지 않으면 실패")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    ready, go, done = ctx.Event(), ctx.Event(), ctx.Event()
+    results = ctx.Queue()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "shared_cache.db")
+        # 스키마를 먼저 만들어 두 worker 가 동시에 생성하지 않게 한다
+        SharedCacheTier(path)
+        reader = ctx.Process(
+            target=_reader, args=(path, args.poll, args.rounds, args.timeout, ready, go, done, results)
+        )
+        writer = ctx.Process(target=_writer, args=(path, args.poll, args.rounds, ready, go, done))
+        reader.start()
+        writer.start()
+        rounds = [results.get(timeout=args.timeout + 30) for _ in range(args.rounds)]
+        reader.join()
+        writer.join()
+
+    failed = [r for r in rounds if not r["ok"]]
+    result = {
+        "benchmark": "shared_cache",
+        "rounds": args.rounds,
+        "poll_seconds": args.poll,
+        "failed": len(failed),
+    }
+    for op in ("set", "invalidate"):
+        seconds = sorted(r["seconds"] for r in rounds if r["op"] == op and r["ok"])
+        if seconds:
+            result[op] = {"p50_ms": statistics.median(seconds) * 1000, "max_ms": seconds[-1] * 1000}
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    if failed:
+        raise SystemExit(f"{len(failed)}/{args.rounds} 라운드에서 worker B 가 --timeout 안에 새 값을 보지 못했습니다")
+
+
+if __name__ == "__main__":
+    main()
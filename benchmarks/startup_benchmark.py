@@ -0,0 +1,80 @@
+"""
+서버 기동 시간 벤치마크
+
+`import main` 을 새 프로세스에서 반복 실행해 cold start 시간을 측정한다.
+DB 는 연결이 즉시 거부되는 주소로 지정하므로, 기동 경로가 DB 에 의존하면 바로 드러난다.
+
+    python -m benchmarks.startup_benchmark --runs 5 --max-seconds 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import main
+elapsed = time.perf_counter() - t
+print(json.dumps({
+    "import_seconds": elapsed,
+    "google_adk_loaded": "google.adk" in sys.modules,
+    "agent_card": main.server.agent_card.name,
+}))
+"""
+
+
+def run_once(env: dict) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"기동 실패:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="서버 기동 시간 벤치마크")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None, help="median 이 이 값을 넘으면 실패")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # 연결이 즉시 거부되는 주소 (DB 독립 기동 확인용)
+    env.update({"DB_HOST": "127.0.0.1", "DB_PORT": "9"})
+
+    samples = [run_once(env) for _ in range(args.runs)]
+    timings = [s["import_seconds"] for s in samples]
+    result = {
+        "benchmark": "startup",
+        "runs": args.runs,
+        "median_seconds": round(statistics.median(timings), 4),
+        "min_seconds": round(min(timings), 4),
+        "max_seconds": round(max(timings), 4),
+        "google_adk_loaded": any(s["google_adk_loaded"] for s in samples),
+        "agent_card": samples[-1]["agent_card"],
+    }
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", "utf-8")
+
+    if result["google_adk_loaded"]:
+        sys.exit("google.adk 가 기동 시점에 import 되었습니다.")
+    if args.max_seconds is not None and result["median_seconds"] > args.max_seconds:
+        sys.exit(f"기동 시간 {result['median_seconds']}s 가 기준 {args.max_seconds}s 를 초과했습니다.")
+
+
+if __name__ == "__main__":
+    main()
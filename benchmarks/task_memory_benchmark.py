@@ -0,0 +1,120 @@
+"""
+task 보관 메모리 벤치마크
+
+리포트 artifact(기본 약 40KB 한국어 markdown)가 달린 완료 task 를 N 개 보관했을 때
+TaskStore 별 상주 메모리(RSS) 증가량을 측정한다. 시나리오마다 새 프로세스에서 실행한다.
+
+    python -m benchmarks.task_memory_benchmark --tasks 1000 --artifact-kb 40
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SCENARIOS = ("in_memory", "compressed", "sqlite")
+
+_PROBE = """
+import asyncio, gc, json, os, random, sys
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import Artifact, Task, TaskState, TaskStatus, TextPart
+from shared.database.task_store import CompressedInMemoryTaskStore, SQLiteTaskStore
+
+scenario, count, artifact_kb, path = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+words = ("매출 영업이익 전년 대비 증가 감소 반도체 메모리 수요 공급 가격 전망 컨센서스 목표주가 "
+         "밸류에이션 배당 환율 금리 리스크 경쟁사 점유율 분기 실적 가이던스 투자의견 유지 상향 하향").split()
+
+def report(rng):
+    lines, size = [], 0
+    while size < artifact_kb * 1024:
+        if rng.random() < 0.08:
+            line = f"## {rng.choice(words)} {rng.choice(words)}"
+        else:
+            line = " ".join(rng.choice(words) for _ in range(rng.randint(8, 20)))
+            line += f" {rng.randint(1, 999)}.{rng.randint(0, 9)}% ({rng.randint(2020, 2026)}년 {rng.randint(1, 4)}분기)."
+        lines.append(line)
+        size += len(line.encode("utf-8")) + 1
+    return "\\n".join(lines)
+
+def make_task(i, rng):
+    return Task(
+        id=f"task-{i}",
+        contextId=f"ctx-{i}",
+        status=TaskStatus(state=TaskState.completed),
+        artifacts=[Artifact(artifactId=f"artifact-{i}", name="deep_search_agent_result",
+                            parts=[TextPart(text=report(rng))])],
+    )
+
+async def run():
+    if scenario == "in_memory":
+        store = InMemoryTaskStore()
+    elif scenario == "compressed":
+        store = CompressedInMemoryTaskStore()
+    else:
+        store = SQLiteTaskStore(path)
+    rng = random.Random(0)
+    gc.collect()
+    before = rss_kb()
+    for i in range(count):
+        # 실제 서버처럼 artifact 를 만든 뒤 store 에만 남긴다
+        await store.save(make_task(i, rng))
+    gc.collect()
+    after = rss_kb()
+    sample = await store.get(f"task-{count - 1}")
+    assert sample is not None and sample.artifacts
+    result = {"scenario": scenario, "rss_before_kb": before, "rss_after_kb": after,
+              "rss_delta_mb": round((after - before) / 1024, 1)}
+    if scenario == "sqlite":
+        size = sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+        result["file_mb"] = round(size / 1024 / 1024, 1)
+    print(json.dumps(result))
+
+asyncio.run(run())
+"""
+
+
+def run_scenario(scenario: str, tasks: int, artifact_kb: int, workdir: str) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE, scenario, str(tasks), str(artifact_kb), os.path.join(workdir, "tasks.db")],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"{scenario} 실행 실패:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="task 보관 메모리 벤치마크")
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--artifact-kb", type=int, default=40)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    results = []
+    for scenario in args.scenarios:
+        with tempfile.TemporaryDirectory() as workdir:
+            results.append(run_scenario(scenario, args.tasks, args.artifact_kb, workdir))
+
+    result = {"benchmark": "task_memory", "tasks": args.tasks, "artifact_kb": args.artifact_kb, "results": results}
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,269 @@
 import os
+import socket
+import datetime
+import asyncio
 import logging
 
+import httpx
 from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
+from a2a.server.tasks import InMemoryPushNotifier, InMemoryTaskStore
 from dotenv import load_dotenv
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
 
-from agent.agent_card import build_agent_card
+from agent.agent_card import get_startup_agent_card, refresh_agent_card
 from agent.agent_executor import DeepSearchAgentExecutor
+from agent.entities import extract_entities
+from agent.precompute import precompute_scheduler
+from agent.request_handler import BackgroundJobRequestHandler
+from agent.usage_ledger import usage_ledger
 
 from prompts import prompt as news_prompt_module
+from shared.database.cache_manager import cache_manager
+from shared.database.report_store import report_archive
+from shared.database.task_store import CompressedInMemoryTaskStore, SQLiteTaskStore
+from shared.metrics import CONTENT_TYPE_LATEST, metrics
+from shared.tracing import setup_tracing
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+setup_tracing()
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+WARMUP_RETRY_INTERVAL = float(os.getenv("WARMUP_RETRY_INTERVAL", "30"))
+
+# warm-up 결과 (readiness 판단용)
+readiness = {"ready": False, "instructions": 0, "agent_record": False, "error": None}
+_warmup_task: asyncio.Task | None = None
 
 # ------------------------------------------------------------------
 
-async def on_startup():
-    global request_handler
-    # Executor 재생성 및 교체
-    request_handler.agent_executor = DeepSearchAgentExecutor()
-    # preload prompt
+async def warm_up() -> bool:
+    """instruction 전체는 캐시에, 에이전트 메타데이터(agent card)는 snapshot 에 적재"""
     try:
-        await news_prompt_module.get_system_instruction()
+        instructions = await news_prompt_module.warm_up_instructions()
+        card = await refresh_agent_card()
     except Exception as e:
-        pass
+        logger.error(f"warm-up 실패: {e}")
+        readiness.update(ready=False, error=str(e))
+        return False
+    if card:
+        # snapshot 으로 기동한 card 를 DB 최신 값으로 교체
+        # (/.well-known/agent.json 응답과, streaming/pushNotifications 를 검사하는 JSON-RPC handler 모두)
+        server.agent_card = card
+        server.handler.agent_card = card
+    readiness.update(
+        ready=True,
+        instructions=len(instructions),
+        agent_record=card is not None,
+        error=None,
+    )
+    return True
+
+
+async def _warm_up_until_ready():
+    while not await warm_up():
+        await asyncio.sleep(WARMUP_RETRY_INTERVAL)
+    # 기준 버전은 warm-up 이후에 기록해야 변경 감지가 정확하다
+    news_prompt_module.prompt_watcher.start()
+
+
+def _check_worker_count():
+    """upstream(컨테이너/포트) 하나에 worker 하나만 허용
+
+    message/stream · tasks/resubscribe 의 이벤트 큐, push notification 설정, /metrics 는 worker 메모리에 있고
+    같은 포트를 공유하는 worker 간에는 session affinity 가 없으므로, 확장은 컨테이너(또는 포트) 단위로 하고
+    앞단(deploy/nginx.conf)에서 session_id 기준으로 라우팅한다.
+    스트리밍/push 를 쓰지 않는 배포는 ALLOW_MULTI_WORKER=1 로 여러 worker 를 띄울 수 있다.
+    """
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1 and os.getenv("ALLOW_MULTI_WORKER") != "1":
+        raise RuntimeError(
+            f"WEB_CONCURRENCY={workers}: worker 간 affinity 가 없어 스트리밍/resubscribe/push 가 깨집니다. "
+            "컨테이너(또는 포트)당 worker 1개로 실행하세요 (ALLOW_MULTI_WORKER=1 로 무시 가능)."
+        )
+
+
+async def on_startup():
+    global _warmup_task
+    _check_worker_count()
+    # DB 를 기다리지 않고 바로 기동한다. warm-up 결과는 /ready 로 확인
+    _warmup_task = asyncio.create_task(_warm_up_until_ready())
+    usage_ledger.start()
+    precompute_scheduler.start()
+    cache_manager.start()
+    report_archive.start()
+    if isinstance(task_store, SQLiteTaskStore):
+        task_store.start()
+
+
+async def on_shutdown():
+    if _warmup_task:
+        _warmup_task.cancel()
+    await news_prompt_module.prompt_watcher.stop()
+    await precompute_scheduler.stop()
+    await usage_ledger.stop()
+    await cache_manager.stop()
+    await report_archive.stop()
+    if isinstance(task_store, SQLiteTaskStore):
+        await task_store.stop()
+    await push_http_client.aclose()
+
+
+async def ready(request: Request):
+    """readiness probe: warm-up 성공 여부 반환"""
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+
+async def metrics_endpoint(request: Request):
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+async def invalidate_prompts(request: Request):
+    """instruction 캐시 즉시 무효화 (관리자용)"""
+    if ADMIN_TOKEN and request.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    body = {}
+    if await request.body():
+        body = await request.json()
+    app_name = body.get("app_name") or request.query_params.get("app_name")
+    reloaded = await news_prompt_module.prompt_watcher.invalidate(app_name)
+    return JSONResponse({"status": "ok", "reloaded": reloaded})
+
+
+async def usage_rollup(request: Request):
+    """기간별 tenant 사용량 조회 (관리자용)"""
+    if ADMIN_TOKEN and request.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    today = usage_ledger.today()
+    start_date = request.query_params.get("from", today)
+    end_date = request.query_params.get("to", start_date)
+    group_by = request.query_params.get("group_by", "app_name").split(",")
+    try:
+        rows = await usage_ledger.rollup(start_date, end_date, [c.strip() for c in group_by])
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({"from": start_date, "to": end_date, "rows": rows})
+
+
+async def search_reports(request: Request):
+    """보관된 리포트 검색 (q: 전문 검색어, entity: 종목명/코드, since: YYYY-MM-DD, model, limit)"""
+    if ADMIN_TOKEN and request.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    params = request.query_params
+    entity = params.get("entity", "")
+    entities = extract_entities(entity) or ([entity.upper()] if entity else [])
+    since = None
+    if params.get("since"):
+        try:
+            since = datetime.datetime.fromisoformat(params["since"]).timestamp()
+        except ValueError:
+            return JSONResponse({"error": "since 는 YYYY-MM-DD 형식이어야 합니다."}, status_code=400)
+    try:
+        limit = int(params.get("limit", "5"))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return JSONResponse({"error": "limit 은 1 이상의 정수여야 합니다."}, status_code=400)
+    reports = await report_archive.search(
+        params.get("q", ""),
+        entities,
+        since=since,
+        model=params.get("model"),
+        limit=min(limit, 50),
+    )
+    return JSONResponse(
+        {
+            "entities": entities,
+            "reports": [
+                {
+                    "report_id": r.report_id,
+                    "query": r.query,
+                    "model": r.model,
+                    "entities": r.entities,
+                    "app_name": r.app_name,
+                    "created_at": datetime.datetime.fromtimestamp(r.created_at).isoformat(),
+                    "report": r.report,
+                }
+                for r in reports
+            ],
+        }
+    )
+
+
+def create_task_store():
+    """TASK_STORE_PATH 가 설정되면 worker 간 공유되는 SQLite TaskStore 사용"""
+    path = os.getenv("TASK_STORE_PATH")
+    if path:
+        return SQLiteTaskStore(
+            path,
+            max_age=float(os.getenv("TASK_STORE_MAX_AGE", str(7 * 86400))),
+            cleanup_interval=float(os.getenv("TASK_STORE_CLEANUP_INTERVAL", "3600")),
+        )
+    # 기본은 압축된 메모리 저장 (TASK_STORE_COMPRESSION=0 이면 a2a 기본 InMemoryTaskStore)
+    if os.getenv("TASK_STORE_COMPRESSION", "1") == "1":
+        return CompressedInMemoryTaskStore()
+    return InMemoryTaskStore()
+
+
+# worker 식별자 (session affinity 디버깅용 응답 헤더)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkerHeaderMiddleware:
+    """모든 응답에 처리한 worker 를 X-Served-By 헤더로 표시 (SSE 스트림 포함)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-served-by", WORKER_ID.encode())
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_header)
+
+
+# push notification 전송용 HTTP 클라이언트
+push_http_client = httpx.AsyncClient(timeout=30)
+
+task_store = create_task_store()
 
-# 초기 Executor 세팅 (빈 card 가능)
-request_handler = DefaultRequestHandler(
+request_handler = BackgroundJobRequestHandler(
     agent_executor=DeepSearchAgentExecutor(),
-    task_store=InMemoryTaskStore(),
+    task_store=task_store,
+    push_notifier=InMemoryPushNotifier(push_http_client),
 )
 
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8003"))
 
 server = A2AStarletteApplication(
-    agent_card=build_agent_card(HOST, PORT),
+    agent_card=get_startup_agent_card(HOST, PORT),
     http_handler=request_handler,
 )
 
 app = server.build()
+app.add_route("/admin/prompts/invalidate", invalidate_prompts, methods=["POST"])
+app.add_route("/admin/usage", usage_rollup, methods=["GET"])
+app.add_route("/reports/search", search_reports, methods=["GET"])
+app.add_route("/ready", ready, methods=["GET"])
+app.add_route("/metrics", metrics_endpoint, methods=["GET"])
+app.add_middleware(WorkerHeaderMiddleware)
+# Accept-Encoding: gzip 을 보낸 클라이언트에는 큰 JSON 응답(tasks/get 등)을 압축해 전송 (SSE 는 제외됨)
+app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "1024")))
 
 # Starlette startup 이벤트 등록
 if hasattr(app, "add_event_handler"):
-    app.add_event_handler("startup", on_startup)
\ No newline at end of file
+    app.add_event_handler("startup", on_startup)
+    app.add_event_handler("shutdown", on_shutdown)
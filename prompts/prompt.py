@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import os
+import asyncio
+import logging
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -10,6 +12,15 @@ from shared.database.connection import db_manager
 from shared.database.cache_manager import cache_manager
 from shared.database.queries import DatabaseQueries
 
+logger = logging.getLogger(__name__)
+
+# watcher 가 꺼져 있을 때 사용하는 TTL (기존 동작)
+PROMPT_CACHE_DURATION = int(os.getenv("PROMPT_CACHE_DURATION", "600"))
+# watcher 가 켜져 있을 때의 안전망 TTL. 실제 갱신은 watcher 가 담당한다.
+PROMPT_WATCH_CACHE_DURATION = int(os.getenv("PROMPT_WATCH_CACHE_DURATION", "86400"))
+# 버전 신호(MAX(updated_at)) 폴링 주기 (초)
+PROMPT_WATCH_INTERVAL = float(os.getenv("PROMPT_WATCH_INTERVAL", "5"))
+
 
 # ---------------------------------------------------------------------------
 # DB helpers
@@ -19,24 +30,162 @@ def _snake_to_title(s: str) -> str:
     return " ".join(w.capitalize() for w in s.split("_"))
 
 
+FOLDER_NAME = Path(__file__).resolve().parent.parent.name
+TITLE_NAME = _snake_to_title(FOLDER_NAME)
+
+
+def _instruction_cache_key(app_name: str) -> str:
+    return f"instruction:{FOLDER_NAME}:{app_name}"
+
+
+async def _fetch_instruction(app_name: str) -> str | None:
+    """DB에서 app_name 에 해당하는 instruction 1건 조회"""
+    result = await db_manager.execute_async_query(
+        DatabaseQueries.GET_AGENT_INSTRUCTION,
+        (FOLDER_NAME, TITLE_NAME, str(app_name)),
+    )
+    return result[0][0] if result else None
+
+
 async def _load_prompt_from_db(app_name: str = "default-app") -> str | None:
     """DB에서 instruction 조회 (캐싱 적용)"""
-    folder_name = Path(__file__).resolve().parent.parent.name  # geocode_agent
-    title_name = _snake_to_title(folder_name)
-    
+
     async def fetch_instruction():
-        result = db_manager.execute_sync_query(
-            DatabaseQueries.GET_AGENT_INSTRUCTION, 
-            (folder_name, title_name, str(app_name))
-        )
-        return result[0]["instruction_content"] if result else None
-    
+        return await _fetch_instruction(app_name)
+
+    cache_duration = (
+        PROMPT_WATCH_CACHE_DURATION if prompt_watcher.running else PROMPT_CACHE_DURATION
+    )
     return await cache_manager.get_or_fetch(
-        key=f"instruction:{folder_name}:{app_name}",
+        key=_instruction_cache_key(app_name),
         fetch_func=fetch_instruction,
-        cache_duration=600
+        cache_duration=cache_duration,
     )
 
+
+async def warm_up_instructions() -> dict[str, str | None]:
+    """이 에이전트의 활성 instruction 전체를 한 번의 쿼리로 캐시에 적재"""
+    rows = await db_manager.execute_async_query(
+        DatabaseQueries.GET_ALL_AGENT_INSTRUCTIONS, (FOLDER_NAME, TITLE_NAME)
+    )
+    instructions: dict[str, str | None] = {}
+    for app_name, instruction_content in rows:
+        # 단건 조회와 동일하게 app_name 별 첫 번째 매핑을 사용
+        instructions.setdefault(str(app_name), instruction_content)
+
+    for app_name, instruction_content in instructions.items():
+        if instruction_content is not None:
+            cache_manager.set(
+                _instruction_cache_key(app_name), instruction_content, PROMPT_WATCH_CACHE_DURATION
+            )
+    logger.info(f"[Prompt] instruction warm-up 완료: {len(instructions)}건")
+    return instructions
+
+
+# ---------------------------------------------------------------------------
+# Change watcher
+
+
+class PromptWatcher:
+    """instruction 변경 감지기
+
+    agent_instructions / service_agent_mappings 의 MAX(updated_at) 을 app_name 별로
+    주기적으로 폴링하고, 버전이 바뀐 app_name 의 instruction 만 다시 읽어 캐시에 반영한다.
+    요청 경로에서는 캐시만 읽으므로 DB 를 기다리지 않는다.
+    """
+
+    def __init__(self, interval: float = PROMPT_WATCH_INTERVAL):
+        self._interval = interval
+        self._versions: dict[str, str] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _fetch_versions(self) -> dict[str, str]:
+        rows = await db_manager.execute_async_query(
+            DatabaseQueries.GET_AGENT_INSTRUCTION_VERSIONS, (FOLDER_NAME, TITLE_NAME)
+        )
+        return {str(app_name): str(version) for app_name, version in rows}
+
+    async def _reload(self, app_name: str):
+        instruction = await _fetch_instruction(app_name)
+        if instruction is None:
+            cache_manager.invalidate_cache(_instruction_cache_key(app_name))
+        else:
+            # 다른 worker 의 L1 에 남은 이전 instruction 도 교체되도록 전파한다
+            cache_manager.set(
+                _instruction_cache_key(app_name), instruction, PROMPT_WATCH_CACHE_DURATION, propagate=True
+            )
+
+    async def check_once(self) -> list[str]:
+        """버전 신호를 한 번 확인하고 변경된 app_name 목록 반환"""
+        versions = await self._fetch_versions()
+        changed = [
+            app_name
+            for app_name in set(versions) | set(self._versions)
+            if versions.get(app_name) != self._versions.get(app_name)
+        ]
+        # 최초 실행 시에는 기준 버전만 기록한다 (캐시는 방금 적재된 상태)
+        first_run = not self._versions
+        for app_name in changed:
+            if first_run:
+                continue
+            try:
+                await self._reload(app_name)
+            except Exception as e:
+                logger.warning(f"[PromptWatcher] reload 실패 ({app_name}): {e}")
+                versions.pop(app_name, None)  # 다음 주기에 다시 시도
+        self._versions = versions
+        if changed and not first_run:
+            logger.info(f"[PromptWatcher] instruction 변경 감지: {changed}")
+        return changed
+
+    async def invalidate(self, app_name: str | None = None) -> list[str]:
+        """관리자 요청에 의한 즉시 무효화 (app_name 이 없으면 캐시된 전체)"""
+        if app_name:
+            app_names = [app_name]
+        else:
+            prefix = _instruction_cache_key("")
+            app_names = [
+                k[len(prefix):]
+                for k in cache_manager.get_cache_info()["keys"]
+                if k.startswith(prefix)
+            ]
+        for name in app_names:
+            await self._reload(name)
+        return app_names
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[PromptWatcher] 버전 확인 실패: {e}")
+            await asyncio.sleep(self._interval)
+
+    def start(self):
+        if self.running or self._interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"[PromptWatcher] 시작 (interval={self._interval}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+prompt_watcher = PromptWatcher()
+
+
 # Public API
 async def get_system_instruction(app_name: str = "default-app") -> str:
     """Always fetch latest prompt; fall back to template with current agent list"""
@@ -0,0 +1,281 @@
+"""
+외부 API 기록/재생 (cassette)
+
+CASSETTE_MODE=record 이면 Perplexity HTTP 요청과 Gemini 호출의 요청/응답을 시간 정보와 함께
+CASSETTE_PATH(JSONL) 에 기록하고, replay 이면 네트워크 없이 기록된 응답을 돌려준다.
+성능 회귀 측정(benchmarks/replay_benchmark.py)을 반복 가능하게 만들기 위해 사용한다.
+
+- 요청은 method/url/body(또는 Gemini contents) 의 hash 로 찾는다. 날짜/시각과 호출 id 는 비교에서 제외한다.
+- 같은 요청이 여러 번 기록되면 기록된 순서대로 돌려준다.
+- CASSETTE_SPEED: 1 이면 기록된 시간대로, 10 이면 10배 빠르게, 0 이면 대기 없이 재생한다.
+- Authorization 등 요청 헤더는 기록하지 않는다.
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?")
+# 비교에서 제외하는 필드 (ADK 가 호출마다 새로 만드는 function call id 등)
+_VOLATILE_KEYS = {"id"}
+
+
+class CassetteMiss(LookupError):
+    """replay 중 기록되지 않은 요청"""
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if k not in _VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return _DATE_RE.sub("<date>", value)
+    return value
+
+
+def request_key(kind: str, payload: Dict[str, Any]) -> str:
+    canonical = json.dumps([kind, _normalize(payload)], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path: Optional[str] = None, mode: str = "off", speed: float = 1.0):
+        self._lock = threading.Lock()
+        self._pending_models: Dict[str, Tuple[str, Dict[str, Any], float]] = {}
+        self.configure(path, mode, speed)
+
+    @classmethod
+    def from_env(cls) -> "Cassette":
+        return cls(
+            os.getenv("CASSETTE_PATH"),
+            os.getenv("CASSETTE_MODE", "off").lower(),
+            float(os.getenv("CASSETTE_SPEED", "1")),
+        )
+
+    def configure(self, path: Optional[str], mode: str, speed: float = 1.0):
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"알 수 없는 CASSETTE_MODE: {mode}")
+        if mode != "off" and not path:
+            raise ValueError("CASSETTE_MODE 를 쓰려면 CASSETTE_PATH 가 필요합니다.")
+        self.path = Path(path) if path else None
+        self.mode = mode
+        self.speed = speed
+        self._interactions: Optional[Dict[Tuple[str, str], Deque[Dict[str, Any]]]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    # ------------------------------------------------------------------
+    def _load(self) -> Dict[Tuple[str, str], Deque[Dict[str, Any]]]:
+        interactions: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    interactions[(record["kind"], record["key"])].append(record)
+        logger.info(f"[Cassette] {self.path} 에서 {sum(map(len, interactions.values()))}건 로드")
+        return interactions
+
+    def rewind(self):
+        """재생 위치를 처음으로 (같은 cassette 를 여러 번 재생할 때)"""
+        with self._lock:
+            self._interactions = None
+
+    def take(self, kind: str, key: str) -> Dict[str, Any]:
+        with self._lock:
+            if self._interactions is None:
+                self._interactions = self._load()
+            queue = self._interactions.get((kind, key))
+            if not queue:
+                raise CassetteMiss(f"cassette 에 기록되지 않은 {kind} 요청입니다 (key={key[:12]}).")
+            return queue.popleft()
+
+    def record(self, kind: str, key: str, request: Dict[str, Any], response: Dict[str, Any], timing: Dict[str, Any]):
+        line = json.dumps(
+            {"kind": kind, "key": key, "recorded_at": time.time(), "request": request, "response": response, "timing": timing},
+            ensure_ascii=False,
+        )
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    async def wait(self, seconds: float):
+        if self.speed > 0 and seconds > 0:
+            await asyncio.sleep(seconds / self.speed)
+
+    # ------------------------------------------------------------------
+    # HTTP (aiohttp)
+    def wrap_session(self, session):
+        """aiohttp.ClientSession 을 기록/재생 session 으로 감싼다 (off 이면 그대로 반환)"""
+        return _CassetteSession(self, session) if self.enabled else session
+
+    # ------------------------------------------------------------------
+    # Gemini (ADK model callback)
+    def model_callbacks(self) -> Dict[str, Any]:
+        """LlmAgent 에 넘길 before/after_model_callback (off 이면 빈 dict)"""
+        if self.mode == "replay":
+            return {"before_model_callback": self._replay_model}
+        if self.mode == "record":
+            return {"before_model_callback": self._start_model, "after_model_callback": self._record_model}
+        return {}
+
+    @staticmethod
+    def _model_request(llm_request) -> Dict[str, Any]:
+        config = llm_request.config
+        system_instruction = getattr(config, "system_instruction", None) if config else None
+        return {
+            "model": llm_request.model,
+            "system_instruction": system_instruction if isinstance(system_instruction, str) else None,
+            "contents": [c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents],
+        }
+
+    async def _replay_model(self, callback_context, llm_request):
+        from google.adk.models.llm_response import LlmResponse
+
+        interaction = self.take("gemini", request_key("gemini", self._model_request(llm_request)))
+        await self.wait(interaction["timing"]["elapsed"])
+        return LlmResponse.model_validate(interaction["response"])
+
+    def _start_model(self, callback_context, llm_request):
+        # 한 invocation 안의 LLM 호출은 순차적이므로 invocation_id 로 after 와 짝을 맞춘다
+        request = self._model_request(llm_request)
+        self._pending_models[callback_context.invocation_id] = (
+            request_key("gemini", request),
+            request,
+            time.perf_counter(),
+        )
+        return None
+
+    def _record_model(self, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        pending = self._pending_models.pop(callback_context.invocation_id, None)
+        if pending is not None:
+            key, request, started = pending
+            self.record(
+                "gemini",
+                key,
+                request,
+                llm_response.model_dump(mode="json", exclude_none=True),
+                {"elapsed": time.perf_counter() - started},
+            )
+        return None
+
+
+class _CassetteSession:
+    def __init__(self, cassette: Cassette, session):
+        self._cassette = cassette
+        self._session = session
+
+    def post(self, url: str, json: Any = None, headers: Optional[Dict[str, str]] = None, **kwargs):
+        return _CassetteRequest(self._cassette, self._session, "POST", url, json, headers, kwargs)
+
+
+class _CassetteRequest:
+    def __init__(self, cassette: Cassette, session, method: str, url: str, body: Any, headers, kwargs):
+        self._cassette = cassette
+        self._session = session
+        self._method = method
+        self._url = url
+        self._body = body
+        self._headers = headers
+        self._kwargs = kwargs
+
+    async def __aenter__(self) -> "_ReplayResponse":
+        request = {"method": self._method, "url": self._url, "json": self._body}
+        key = request_key("http", request)
+        if self._cassette.mode == "replay":
+            interaction = self._cassette.take("http", key)
+            await self._cassette.wait(interaction["timing"]["headers_at"])
+            return _ReplayResponse(interaction, self._cassette)
+
+        started = time.perf_counter()
+        async with self._session.request(
+            self._method, self._url, json=self._body, headers=self._headers, **self._kwargs
+        ) as response:
+            headers_at = time.perf_counter() - started
+            stream = response.headers.get("Content-Type", "").startswith("text/event-stream")
+            recorded: Dict[str, Any] = {
+                "status": response.status,
+                "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+            }
+            if stream:
+                # SSE 는 줄 단위로 도착 시각과 함께 기록
+                recorded["chunks"] = [
+                    [time.perf_counter() - started, line.decode("utf-8", errors="replace")]
+                    async for line in response.content
+                ]
+            else:
+                recorded["body"] = (await response.read()).decode("utf-8", errors="replace")
+        timing = {"headers_at": headers_at, "elapsed": time.perf_counter() - started}
+        self._cassette.record("http", key, request, recorded, timing)
+        # 이미 실제 시간만큼 기다렸으므로 호출한 쪽에는 대기 없이 전달
+        return _ReplayResponse({"response": recorded, "timing": timing}, None)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class _ReplayResponse:
+    def __init__(self, interaction: Dict[str, Any], cassette: Optional[Cassette]):
+        recorded = interaction["response"]
+        self.status = recorded["status"]
+        self.headers = recorded.get("headers", {})
+        self._body = recorded.get("body")
+        self._chunks = recorded.get("chunks")
+        self._headers_at = interaction["timing"]["headers_at"]
+        self._body_wait = interaction["timing"]["elapsed"] - self._headers_at
+        self._cassette = cassette
+        self.content = _ReplayContent(self)
+
+    async def read(self) -> bytes:
+        if self._cassette is not None and self._body_wait > 0:
+            # 본문 수신 시간 (한 번만 대기)
+            await self._cassette.wait(self._body_wait)
+            self._body_wait = 0
+        if self._body is None:
+            return "".join(text for _, text in self._chunks).encode("utf-8")
+        return self._body.encode("utf-8")
+
+    async def text(self) -> str:
+        return (await self.read()).decode("utf-8")
+
+    async def json(self) -> Any:
+        return json.loads(await self.text())
+
+
+class _ReplayContent:
+    """response.content 처럼 줄 단위 bytes 를 기록된 간격으로 돌려준다"""
+
+    def __init__(self, response: _ReplayResponse):
+        self._response = response
+
+    async def __aiter__(self):
+        response = self._response
+        if response._chunks is None:
+            for line in (await response.read()).splitlines(keepends=True):
+                yield line
+            return
+        response._body_wait = 0
+        previous = response._headers_at
+        for at, text in response._chunks:
+            if response._cassette is not None:
+                await response._cassette.wait(at - previous)
+            previous = at
+            yield text.encode("utf-8")
+
+
+# 글로벌 인스턴스 (CASSETTE_MODE 가 없으면 아무 것도 하지 않음)
+cassette = Cassette.from_env()
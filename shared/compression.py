@@ -0,0 +1,66 @@
+import os
+import zlib
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+try:  # zstandard 는 선택 의존성, 없으면 zlib(gzip 과 같은 deflate) 사용
+    import zstandard
+
+    _ZSTD_COMPRESSOR = zstandard.ZstdCompressor(level=int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")))
+    _ZSTD_DECOMPRESSOR = zstandard.ZstdDecompressor()
+except ImportError:  # pragma: no cover - 설치 환경에 따라 다름
+    zstandard = None
+
+# 이보다 작은 값은 압축하지 않는다 (헤더/CPU 비용이 더 큼)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_ZLIB_LEVEL = int(os.getenv("COMPRESSION_ZLIB_LEVEL", "6"))
+# 로그에 남길 긴 텍스트의 최대 길이
+LOG_PREVIEW_CHARS = int(os.getenv("LOG_PREVIEW_CHARS", "500"))
+
+# 저장 형식: 1 byte codec 표시 + 본문
+_RAW = b"r"
+_ZLIB = b"z"
+_ZSTD = b"s"
+
+
+def compress(data: str | bytes) -> bytes:
+    """문자열/바이트를 저장용 bytes 로 압축 (작은 값은 그대로 저장)"""
+    raw = data.encode("utf-8") if isinstance(data, str) else data
+    if len(raw) < COMPRESSION_MIN_BYTES:
+        return _RAW + raw
+    if zstandard is not None:
+        return _ZSTD + _ZSTD_COMPRESSOR.compress(raw)
+    return _ZLIB + zlib.compress(raw, COMPRESSION_ZLIB_LEVEL)
+
+
+def decompress_bytes(blob: bytes | str) -> bytes:
+    if isinstance(blob, str):
+        # 압축 도입 전에 TEXT 로 저장된 값
+        return blob.encode("utf-8")
+    codec, body = blob[:1], blob[1:]
+    if codec == _RAW:
+        return body
+    if codec == _ZLIB:
+        return zlib.decompress(body)
+    if codec == _ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd 로 압축된 값이지만 zstandard 가 설치되어 있지 않습니다.")
+        return _ZSTD_DECOMPRESSOR.decompress(body)
+    # codec 표시가 없는 bytes 는 압축 전 형식으로 본다
+    return blob
+
+
+def decompress(blob: bytes | str) -> str:
+    """compress() 결과(또는 압축 전 TEXT 값)를 문자열로 복원"""
+    return decompress_bytes(blob).decode("utf-8")
+
+
+def log_preview(value: Any, limit: int | None = None) -> str:
+    """긴 텍스트를 로그용으로 앞부분만 남김"""
+    limit = LOG_PREVIEW_CHARS if limit is None else limit
+    text = value if isinstance(value, str) else str(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text)}자 중 {limit}자)"
@@ -1,74 +1,185 @@
 import time
 import os
+from collections import OrderedDict
 from typing import Any, Callable, Optional, Dict, Tuple
 import logging
 import asyncio
 
+from shared.database.shared_cache import SharedCacheTier
+from shared.metrics import CACHE_REQUESTS
+
 logger = logging.getLogger(__name__)
 
+_L1_HITS = CACHE_REQUESTS.labels(result="l1_hit")
+_L2_HITS = CACHE_REQUESTS.labels(result="l2_hit")
+_MISSES = CACHE_REQUESTS.labels(result="miss")
+
 class CacheManager:
-    def __init__(self):
-        self._cache: Dict[str, Tuple[Any, float]] = {}
+    """2단계 캐시
+
+    L1: 프로세스 내 LRU (GLOBAL_CACHE_MAX_ITEMS 개까지)
+    L2: worker 간 공유 계층 (SHARED_CACHE_PATH 가 설정된 경우, SQLite 파일)
+    """
+
+    def __init__(self, shared_tier: Optional[SharedCacheTier] = None):
+        # key -> (value, 저장 시각, 만료 시각)  만료 시각은 set() 에 지정된 cache_duration 기준
+        self._cache: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
         self._default_duration = int(os.getenv('GLOBAL_CACHE_DURATION', '600'))
-        pass
-    
+        self._max_items = int(os.getenv('GLOBAL_CACHE_MAX_ITEMS', '1024'))
+        self._shared = shared_tier
+        self._invalidation_poll_interval = float(os.getenv('SHARED_CACHE_INVALIDATION_POLL', '1'))
+        self._last_invalidation_id = 0
+        self._last_invalidation_poll = 0.0
+        self._stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0}
+        self._cleanup_interval = float(os.getenv('GLOBAL_CACHE_CLEANUP_INTERVAL', '300'))
+        self._task: Optional[asyncio.Task] = None
+        if self._shared:
+            try:
+                self._last_invalidation_id = self._shared.last_invalidation_id()
+            except Exception as e:
+                logger.warning(f"Shared cache unavailable: {e}")
+                self._shared = None
+
+    # ------------------------------------------------------------------
+    # L1 / L2 helpers
+
+    def _store_local(self, key: str, value: Any, timestamp: float, expires_at: float):
+        self._cache[key] = (value, timestamp, expires_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._max_items:
+            self._cache.popitem(last=False)
+
+    def _drop_local(self, pattern: Optional[str], prefix: bool = False):
+        if not pattern:
+            self._cache.clear()
+        elif prefix:
+            for key in [k for k in self._cache.keys() if k.startswith(pattern)]:
+                del self._cache[key]
+        else:
+            self._cache.pop(pattern, None)
+
+    def _sync_invalidations(self):
+        """다른 worker 가 기록한 무효화를 L1 에 반영 (poll 주기로 제한)"""
+        if not self._shared:
+            return
+        now = time.monotonic()
+        if now - self._last_invalidation_poll < self._invalidation_poll_interval:
+            return
+        self._last_invalidation_poll = now
+        try:
+            rows = self._shared.poll_invalidations(self._last_invalidation_id)
+        except Exception as e:
+            logger.warning(f"Shared cache invalidation poll failed: {e}")
+            return
+        for invalidation_id, pattern, prefix, origin in rows:
+            if origin != self._shared.origin:
+                self._drop_local(pattern or None, prefix)
+            self._last_invalidation_id = invalidation_id
+
+    def _lookup(self, key: str, duration: int) -> Tuple[bool, Any]:
+        self._sync_invalidations()
+        current_time = time.time()
+
+        if key in self._cache:
+            cached_data, timestamp, expires_at = self._cache[key]
+            if current_time < expires_at and current_time - timestamp < duration:
+                self._cache.move_to_end(key)
+                self._stats['l1_hits'] += 1
+                _L1_HITS.inc()
+                return True, cached_data
+
+        if self._shared:
+            try:
+                entry = self._shared.get(key)
+            except Exception as e:
+                logger.warning(f"Shared cache read failed: {e}")
+                entry = None
+            if entry is not None:
+                cached_data, timestamp, expires_at = entry
+                # 원래 저장/만료 시각을 그대로 사용하므로 모든 worker 의 만료 시점이 같다
+                if current_time - timestamp < duration:
+                    self._store_local(key, cached_data, timestamp, expires_at)
+                    self._stats['l2_hits'] += 1
+                    _L2_HITS.inc()
+                    return True, cached_data
+
+        self._stats['misses'] += 1
+        _MISSES.inc()
+        return False, None
+
+    # ------------------------------------------------------------------
+
     async def get_or_fetch(self, key: str, fetch_func: Callable, cache_duration: Optional[int] = None) -> Any:
         """캐시된 값 반환 또는 새로 조회"""
-        current_time = time.time()
         duration = cache_duration or self._default_duration
-        
+
         # 캐시 확인
-        if key in self._cache:
-            cached_data, timestamp = self._cache[key]
-            if current_time - timestamp < duration:
-                return cached_data
-        
+        hit, cached_data = self._lookup(key, duration)
+        if hit:
+            return cached_data
+
         # 캐시 미스 - 새로 조회
-        
-        try:
-            if asyncio.iscoroutinefunction(fetch_func):
-                data = await fetch_func()
-            else:
-                data = fetch_func()
-            
-            # 캐시 저장
-            self._cache[key] = (data, current_time)
-            return data
-            
-        except Exception as e:
-            raise
-    
-    def get(self, key: str) -> Optional[Any]:
+        if asyncio.iscoroutinefunction(fetch_func):
+            data = await fetch_func()
+        else:
+            data = fetch_func()
+
+        # 캐시 저장
+        self.set(key, data, duration)
+        return data
+
+    def get(self, key: str, cache_duration: Optional[int] = None) -> Optional[Any]:
         """캐시된 값 조회 (캐시 미스 시 None 반환)"""
-        if key in self._cache:
-            cached_data, timestamp = self._cache[key]
-            if time.time() - timestamp < self._default_duration:
-                return cached_data
-        return None
-    
-    def set(self, key: str, value: Any, cache_duration: Optional[int] = None):
-        """캐시에 값 저장"""
+        _, cached_data = self._lookup(key, cache_duration or self._default_duration)
+        return cached_data
+
+    def set(self, key: str, value: Any, cache_duration: Optional[int] = None, propagate: bool = False):
+        """캐시에 값 저장
+
+        propagate=True 면 이 key 를 L1 에 들고 있는 다른 worker 도 새 값을 다시 읽는다 (기존 값을 교체할 때 사용).
+        """
         duration = cache_duration or self._default_duration
-        self._cache[key] = (value, time.time())
-    
-    def invalidate_cache(self, pattern: str = None):
-        """캐시 무효화"""
-        if pattern:
-            keys_to_remove = [k for k in self._cache.keys() if pattern in k]
-            for key in keys_to_remove:
-                del self._cache[key]
-        else:
-            count = len(self._cache)
-            self._cache.clear()
-    
+        current_time = time.time()
+        self._store_local(key, value, current_time, current_time + duration)
+        if self._shared:
+            try:
+                self._shared.set(key, value, current_time, duration, propagate=propagate)
+            except Exception as e:
+                logger.warning(f"Shared cache write failed: {e}")
+
+    def claim(self, key: str, cache_duration: Optional[int] = None) -> bool:
+        """key 를 선점 (이미 유효한 값이 있으면 False, 공유 계층이 있으면 worker 간에 한 곳만 True)"""
+        duration = cache_duration or self._default_duration
+        if self._shared:
+            try:
+                return self._shared.claim(key, duration)
+            except Exception as e:
+                logger.warning(f"Shared cache claim failed: {e}")
+        if self.get(key, duration) is not None:
+            return False
+        self.set(key, True, duration)
+        return True
+
+    def invalidate_cache(self, pattern: str = None, prefix: bool = False):
+        """캐시 무효화 (공유 계층이 있으면 다른 worker 에도 전파)
+
+        pattern 과 정확히 같은 key 만 지우고, prefix=True 면 pattern 으로 시작하는 key 전체, None 이면 모두 지운다.
+        """
+        self._drop_local(pattern, prefix)
+        if self._shared:
+            try:
+                self._shared.invalidate(pattern, prefix)
+            except Exception as e:
+                logger.warning(f"Shared cache invalidation failed: {e}")
+
     def get_cache_info(self) -> Dict[str, Any]:
         """캐시 상태 정보"""
         current_time = time.time()
         valid_items = 0
         expired_items = 0
         
-        for key, (_, timestamp) in self._cache.items():
-            if current_time - timestamp < self._default_duration:
+        for key, (_, _, expires_at) in self._cache.items():
+            if current_time < expires_at:
                 valid_items += 1
             else:
                 expired_items += 1
@@ -78,20 +189,74 @@ class CacheManager:
             'valid_items': valid_items,
             'expired_items': expired_items,
             'keys': list(self._cache.keys()),
-            'default_duration': self._default_duration
+            'default_duration': self._default_duration,
+            'max_items': self._max_items,
+            'shared_tier': self._shared is not None,
+            **self._stats,
         }
     
-    def cleanup_expired(self):
-        """만료된 캐시 항목 정리"""
+    def _cleanup_local(self) -> int:
         current_time = time.time()
-        keys_to_remove = []
-        
-        for key, (_, timestamp) in self._cache.items():
-            if current_time - timestamp >= self._default_duration:
-                keys_to_remove.append(key)
-        
+        keys_to_remove = [
+            key for key, (_, _, expires_at) in self._cache.items() if current_time >= expires_at
+        ]
         for key in keys_to_remove:
             del self._cache[key]
+        return len(keys_to_remove)
+
+    def cleanup_expired(self):
+        """만료된 캐시 항목 정리"""
+        self._cleanup_local()
+        if self._shared:
+            try:
+                self._shared.cleanup_expired()
+            except Exception as e:
+                logger.warning(f"Shared cache cleanup failed: {e}")
+
+    # ------------------------------------------------------------------
+    # 주기적 정리 (on_startup 에서 시작)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._cleanup_interval)
+            # L1 은 이벤트 루프에서만 다루고, L2 파일 I/O 는 스레드에서 실행한다
+            removed = self._cleanup_local()
+            if self._shared:
+                try:
+                    await asyncio.to_thread(self._shared.cleanup_expired)
+                except Exception as e:
+                    logger.warning(f"Shared cache cleanup failed: {e}")
+            if removed:
+                logger.debug(f"만료된 L1 캐시 {removed}건 정리")
+
+    def start(self):
+        if self.running or self._cleanup_interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+def _create_shared_tier() -> Optional[SharedCacheTier]:
+    path = os.getenv('SHARED_CACHE_PATH')
+    if not path:
+        return None
+    try:
+        return SharedCacheTier(path, busy_timeout=float(os.getenv('SHARED_CACHE_BUSY_TIMEOUT', '0.5')))
+    except Exception as e:
+        logger.warning(f"Shared cache disabled ({path}): {e}")
+        return None
+
 
 # 글로벌 인스턴스
-cache_manager = CacheManager() 
\ No newline at end of file
+cache_manager = CacheManager(_create_shared_tier())
@@ -1,21 +1,192 @@
 import os
+import time
 import asyncio
+import threading
 import aiomysql
 import pymysql
-from typing import Optional, List, Dict, Any
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Callable, Iterator, Tuple
 import logging
 from dotenv import load_dotenv
 
+from shared.metrics import DB_QUERY_SECONDS, metrics
+from shared.tracing import start_span
+
 logger = logging.getLogger(__name__)
 
 
+class SyncPoolTimeoutError(pymysql.err.OperationalError):
+    """풀에서 제한 시간 안에 연결을 얻지 못함"""
+
+
+class SyncConnectionPool:
+    """스레드 안전한 pymysql 연결 풀
+
+    - max_size 개까지만 연결을 만들고, 모두 사용 중이면 timeout 초까지 대기
+    - checkout 시 recycle 초가 지난 연결은 새로 만들고,
+      ping_after 초 이상 쉬고 있던 연결은 ping 으로 상태 확인
+    - 대기 시간 등 풀 통계를 stats() 로 제공
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], pymysql.Connection],
+        max_size: int = 10,
+        recycle: int = 3600,
+        timeout: float = 30.0,
+        ping_after: float = 30.0,
+    ):
+        self._connect = connect
+        self._max_size = max_size
+        self._recycle = recycle
+        self._timeout = timeout
+        self._ping_after = ping_after
+        # (connection, created_at, last_used_at)
+        self._idle: deque[Tuple[pymysql.Connection, float, float]] = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+            "discarded": 0,
+        }
+
+    def _checkout(self) -> Tuple[pymysql.Connection, float]:
+        start = time.monotonic()
+        deadline = start + self._timeout
+        entry = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self._max_size:
+                    self._size += 1  # 새 연결 자리 예약
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise SyncPoolTimeoutError(
+                        f"sync DB pool exhausted (max_size={self._max_size}, timeout={self._timeout}s)"
+                    )
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - start
+            self._stats["checkouts"] += 1
+            if waited > 0.001:
+                self._stats["waits"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+
+        # 상태 확인과 연결 생성은 lock 밖에서 수행
+        if entry is not None:
+            conn, created_at, last_used_at = entry
+            now = time.monotonic()
+            if now - created_at >= self._recycle:
+                self._stats["recycled"] += 1
+                self._close_quietly(conn)
+            elif now - last_used_at >= self._ping_after and not self._is_healthy(conn):
+                self._stats["health_check_failures"] += 1
+                self._close_quietly(conn)
+            else:
+                return conn, created_at
+
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        return conn, time.monotonic()
+
+    def _checkin(self, conn: pymysql.Connection, created_at: float, discard: bool = False):
+        if discard or not conn.open:
+            self._close_quietly(conn)
+            with self._cond:
+                self._stats["discarded"] += 1
+                self._size -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[pymysql.Connection]:
+        """연결 대여 (with 블록 종료 시 반환, 연결 오류가 나면 폐기)"""
+        conn, created_at = self._checkout()
+        discard = False
+        try:
+            yield conn
+        except pymysql.err.OperationalError:
+            discard = True
+            raise
+        finally:
+            self._checkin(conn, created_at, discard=discard)
+
+    @staticmethod
+    def _is_healthy(conn: pymysql.Connection) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn: pymysql.Connection):
+        try:
+            conn.close()
+        except Exception:
+            pass  # 이미 닫혔거나 문제가 있어도 무시
+
+    def close(self):
+        """대기 중인 연결 모두 종료 (사용 중인 연결은 반환 시점에 풀로 돌아옴)"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 상태 및 대기 시간 통계"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                max_size=self._max_size,
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+            )
+        checkouts = stats["checkouts"] or 1
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / checkouts
+        return stats
+
+
 class DatabaseManager:
     def __init__(self):
         # .env 파일 로드
         load_dotenv()
         self._config = self._load_config()
         self._async_pool: Optional[aiomysql.Pool] = None
-        self._sync_connection: Optional[pymysql.Connection] = None
+        self._sync_pool = SyncConnectionPool(
+            self._create_sync_connection,
+            max_size=self._config["sync_pool_size"],
+            recycle=self._config["pool_recycle"],
+            timeout=self._config["sync_pool_timeout"],
+            ping_after=self._config["sync_pool_ping_after"],
+        )
 
     def _load_config(self) -> Dict[str, Any]:
         """데이터베이스 연결 설정 로드 (pool_recycle 추가)"""
@@ -28,6 +199,10 @@ class DatabaseManager:
             "charset": "utf8mb4",
             # pool_recycle 값을 환경 변수에서 가져오도록 추가 (기본값 3600초 = 1시간)
             "pool_recycle": int(os.getenv("DB_POOL_RECYCLE_SECONDS", 3600)),
+            # 동기 연결 풀 설정
+            "sync_pool_size": int(os.getenv("DB_SYNC_POOL_SIZE", "10")),
+            "sync_pool_timeout": float(os.getenv("DB_SYNC_POOL_TIMEOUT_SECONDS", "30")),
+            "sync_pool_ping_after": float(os.getenv("DB_SYNC_POOL_PING_AFTER_SECONDS", "30")),
         }
 
     async def get_async_connection(self) -> aiomysql.Pool:
@@ -51,61 +226,102 @@ class DatabaseManager:
                 raise
         return self._async_pool
 
-    def get_sync_connection(self) -> pymysql.Connection:
-        """동기 DB 연결 반환 (연결 상태 확인 및 자동 재연결 로직 추가)"""
-        try:
-            # 연결이 없거나, 닫혔을 경우 새로 생성
-            if not self._sync_connection or not self._sync_connection.open:
-                self._sync_connection = pymysql.connect(
-                    host=self._config["host"],
-                    port=self._config["port"],
-                    user=self._config["user"],
-                    password=self._config["password"],
-                    database=self._config["database"],
-                    charset=self._config["charset"],
-                    cursorclass=pymysql.cursors.DictCursor,
-                    autocommit=True,
-                )
-                logger.info("Sync DB connection created.")
-            else:
-                # 연결이 살아있는지 확인하고, 끊겼으면 재연결 시도
-                self._sync_connection.ping(reconnect=True)
-        except pymysql.err.OperationalError as e:
-            logger.error(f"Sync DB connection failed. Attempting to reconnect: {e}")
-            # 재연결 실패 시, 연결 객체를 None으로 만들어 다음 시도에 새로 생성하도록 함
-            self._sync_connection = None
-            raise
-        return self._sync_connection
+    def _create_sync_connection(self) -> pymysql.Connection:
+        conn = pymysql.connect(
+            host=self._config["host"],
+            port=self._config["port"],
+            user=self._config["user"],
+            password=self._config["password"],
+            database=self._config["database"],
+            charset=self._config["charset"],
+            cursorclass=pymysql.cursors.DictCursor,
+            autocommit=True,
+        )
+        logger.info("Sync DB connection created.")
+        return conn
+
+    @contextmanager
+    def sync_connection(self) -> Iterator[pymysql.Connection]:
+        """동기 DB 연결 대여 (스레드 안전, with 블록 종료 시 풀로 반환)"""
+        with self._sync_pool.connection() as conn:
+            yield conn
+
+    def get_sync_pool_stats(self) -> Dict[str, Any]:
+        """동기 연결 풀 통계"""
+        return self._sync_pool.stats()
 
     async def execute_async_query(
-        self, query: str, params: Optional[tuple] = None
+        self, query: str, params: Optional[tuple] = None, as_dict: bool = False
     ) -> List[tuple]:
-        """비동기 쿼리 실행"""
+        """비동기 쿼리 실행 (as_dict=True 이면 dict 행 반환)"""
+        start = time.perf_counter()
         try:
-            pool = await self.get_async_connection()
-            async with pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute(query, params)
-                    return await cursor.fetchall()
+            with start_span("db.query", {"db.system": "mysql", "db.mode": "async", "db.statement": query.strip()[:200]}):
+                pool = await self.get_async_connection()
+                async with pool.acquire() as conn:
+                    cursor_class = aiomysql.DictCursor if as_dict else aiomysql.Cursor
+                    async with conn.cursor(cursor_class) as cursor:
+                        await cursor.execute(query, params)
+                        rows = await cursor.fetchall()
+            DB_QUERY_SECONDS.labels(mode="async", outcome="success").observe(
+                time.perf_counter() - start
+            )
+            return rows
         except Exception as e:
+            DB_QUERY_SECONDS.labels(mode="async", outcome="error").observe(
+                time.perf_counter() - start
+            )
             logger.error(f"Async query failed: {e}")
             raise
 
+    async def execute_async_many(self, query: str, params_list: List[tuple]) -> int:
+        """비동기 일괄 실행 (INSERT ... VALUES 는 한 번의 multi-row 문으로 전송)"""
+        if not params_list:
+            return 0
+        start = time.perf_counter()
+        try:
+            with start_span("db.query", {"db.system": "mysql", "db.mode": "async", "db.statement": query.strip()[:200], "db.rows": len(params_list)}):
+                pool = await self.get_async_connection()
+                async with pool.acquire() as conn:
+                    async with conn.cursor() as cursor:
+                        affected = await cursor.executemany(query, params_list)
+            DB_QUERY_SECONDS.labels(mode="async", outcome="success").observe(
+                time.perf_counter() - start
+            )
+            return affected
+        except Exception as e:
+            DB_QUERY_SECONDS.labels(mode="async", outcome="error").observe(
+                time.perf_counter() - start
+            )
+            logger.error(f"Async batch query failed: {e}")
+            raise
+
     def execute_sync_query(
         self, query: str, params: Optional[tuple] = None, retries=1
     ) -> List[Dict[str, Any]]:
         """동기 쿼리 실행 (연결 오류 시 1회 자동 재시도)"""
+        start = time.perf_counter()
         try:
-            conn = self.get_sync_connection()
-            with conn.cursor() as cursor:
-                cursor.execute(query, params)
-                return cursor.fetchall()
+            with start_span("db.query", {"db.system": "mysql", "db.mode": "sync", "db.statement": query.strip()[:200]}):
+                with self.sync_connection() as conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute(query, params)
+                        rows = cursor.fetchall()
+            DB_QUERY_SECONDS.labels(mode="sync", outcome="success").observe(
+                time.perf_counter() - start
+            )
+            return rows
+        except SyncPoolTimeoutError as e:
+            logger.error(f"Sync query failed: {e}")
+            raise
         except pymysql.err.OperationalError as e:
-            # 연결 관련 문제 발생 시 재시도
+            DB_QUERY_SECONDS.labels(mode="sync", outcome="error").observe(
+                time.perf_counter() - start
+            )
+            # 문제가 된 연결은 풀에서 폐기되었으므로 새 연결로 재시도
             logger.warning(
                 f"Sync query failed due to OperationalError: {e}. Retrying..."
             )
-            self.close_sync_connection()  # 기존 연결 강제 종료
             if retries > 0:
                 return self.execute_sync_query(query, params, retries=retries - 1)
             else:
@@ -124,15 +340,34 @@ class DatabaseManager:
             logger.info("Async DB connection pool closed.")
 
     def close_sync_connection(self):
-        """동기 연결 종료"""
-        if self._sync_connection:
-            try:
-                self._sync_connection.close()
-            except Exception:
-                pass  # 이미 닫혔거나 문제가 있어도 무시
-            self._sync_connection = None
-            logger.info("Sync DB connection closed.")
+        """동기 연결 풀의 유휴 연결 종료"""
+        self._sync_pool.close()
+        logger.info("Sync DB connection pool closed.")
 
 
 # 글로벌 인스턴스
 db_manager = DatabaseManager()
+
+
+def _collect_sync_pool_metrics():
+    """scrape 시점의 동기 연결 풀 상태"""
+    stats = db_manager.get_sync_pool_stats()
+    yield (
+        "db_sync_pool_connections",
+        "gauge",
+        "동기 연결 풀 연결 수",
+        [
+            ("db_sync_pool_connections", {"state": "idle"}, stats["idle"]),
+            ("db_sync_pool_connections", {"state": "in_use"}, stats["in_use"]),
+            ("db_sync_pool_connections", {"state": "max"}, stats["max_size"]),
+        ],
+    )
+    for name, key, documentation in (
+        ("db_sync_pool_checkouts", "checkouts", "동기 연결 풀 checkout 횟수"),
+        ("db_sync_pool_timeouts", "timeouts", "동기 연결 풀 대기 시간 초과 횟수"),
+        ("db_sync_pool_wait_seconds", "wait_seconds_total", "동기 연결 풀 누적 대기 시간"),
+    ):
+        yield name, "counter", documentation, [(f"{name}_total", {}, stats[key])]
+
+
+metrics.register_collector(_collect_sync_pool_metrics)
@@ -12,7 +12,33 @@ class DatabaseQueries:
           AND s.name = %s
           AND sam.is_active = 1;
     """
-    
+
+    # app_name 별 instruction 버전 신호 (변경 감지용)
+    GET_AGENT_INSTRUCTION_VERSIONS = """
+        SELECT s.name AS app_name,
+               GREATEST(
+                   COALESCE(MAX(sam.updated_at), '1970-01-01'),
+                   COALESCE(MAX(ai.updated_at), '1970-01-01')
+               ) AS version
+        FROM service_agent_mappings sam
+        JOIN services s ON sam.service_id = s.service_id
+        JOIN agents a ON sam.agent_id = a.agent_id
+        LEFT JOIN agent_instructions ai ON sam.agent_instruction_id = ai.instruction_id
+        WHERE a.name IN (%s, %s)
+        GROUP BY s.name
+    """
+
+    # 이 에이전트의 활성 instruction 전체 조회 (warm-up 용)
+    GET_ALL_AGENT_INSTRUCTIONS = """
+        SELECT s.name AS app_name, ai.instruction_content
+        FROM service_agent_mappings sam
+        JOIN services s ON sam.service_id = s.service_id
+        JOIN agents a ON sam.agent_id = a.agent_id
+        LEFT JOIN agent_instructions ai ON sam.agent_instruction_id = ai.instruction_id
+        WHERE a.name IN (%s, %s)
+          AND sam.is_active = 1
+    """
+
     # 에이전트 카드 정보 조회
     GET_AGENT_CARD = """
         SELECT * FROM agents WHERE name IN (%s, %s) LIMIT 1
@@ -41,4 +67,63 @@ class DatabaseQueries:
     GET_AGENT_MODES = """
         SELECT default_input_modes, default_output_modes 
         FROM agents WHERE name IN (%s, %s) LIMIT 1
-    """ 
\ No newline at end of file
+    """
+
+    # tenant 일별 사용량 테이블 (없으면 생성)
+    CREATE_TENANT_USAGE_TABLE = """
+        CREATE TABLE IF NOT EXISTS tenant_usage_daily (
+            usage_date DATE NOT NULL,
+            app_name VARCHAR(255) NOT NULL,
+            user_id VARCHAR(255) NOT NULL,
+            model VARCHAR(64) NOT NULL,
+            requests INT NOT NULL DEFAULT 0,
+            input_tokens BIGINT NOT NULL DEFAULT 0,
+            output_tokens BIGINT NOT NULL DEFAULT 0,
+            citation_tokens BIGINT NOT NULL DEFAULT 0,
+            search_queries BIGINT NOT NULL DEFAULT 0,
+            reasoning_tokens BIGINT NOT NULL DEFAULT 0,
+            cost_usd DECIMAL(18, 6) NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (usage_date, app_name, user_id, model)
+        )
+    """
+
+    # tenant 사용량 누적 (flush 단위 upsert)
+    UPSERT_TENANT_USAGE = """
+        INSERT INTO tenant_usage_daily
+            (usage_date, app_name, user_id, model, requests, input_tokens, output_tokens,
+             citation_tokens, search_queries, reasoning_tokens, cost_usd)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            requests = requests + VALUES(requests),
+            input_tokens = input_tokens + VALUES(input_tokens),
+            output_tokens = output_tokens + VALUES(output_tokens),
+            citation_tokens = citation_tokens + VALUES(citation_tokens),
+            search_queries = search_queries + VALUES(search_queries),
+            reasoning_tokens = reasoning_tokens + VALUES(reasoning_tokens),
+            cost_usd = cost_usd + VALUES(cost_usd)
+    """
+
+    # 특정 일자의 app_name / user_id 별 누적 비용 (budget 기준값)
+    GET_TENANT_USAGE_BY_DAY = """
+        SELECT app_name, user_id, SUM(cost_usd) AS cost_usd
+        FROM tenant_usage_daily
+        WHERE usage_date = %s
+        GROUP BY app_name, user_id
+    """
+
+    # 기간별 사용량 rollup ({group_by} 는 허용된 컬럼만 치환)
+    GET_TENANT_USAGE_ROLLUP = """
+        SELECT {group_by},
+               SUM(requests) AS requests,
+               SUM(input_tokens) AS input_tokens,
+               SUM(output_tokens) AS output_tokens,
+               SUM(citation_tokens) AS citation_tokens,
+               SUM(search_queries) AS search_queries,
+               SUM(reasoning_tokens) AS reasoning_tokens,
+               SUM(cost_usd) AS cost_usd
+        FROM tenant_usage_daily
+        WHERE usage_date BETWEEN %s AND %s
+        GROUP BY {group_by}
+        ORDER BY {group_by}
+    """
@@ -0,0 +1,325 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from shared.compression import compress, decompress
+from shared.database.sqlite_store import DEFAULT_STATE_DIR, SQLiteStore
+from shared.near_duplicate import normalize_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredReport:
+    """entity(종목 등) 별 최신 리포트"""
+    app_name: str
+    entity: str
+    report: str
+    created_at: float
+    updated_at: float
+    revision: int
+
+
+class ReportStore:
+    """app_name / entity 별 최신 리포트 저장소 (로컬 SQLite 파일)
+
+    증분 갱신 시 이전 리포트를 기준으로 변경분만 조사해 합치기 위해 사용한다.
+    """
+
+    def __init__(self, path: str | Path):
+        self._store = _ReportTable(path)
+
+    @staticmethod
+    def normalize_entity(entity: str) -> str:
+        return " ".join(entity.split()).upper()
+
+    def _get(self, app_name: str, entity: str) -> Optional[StoredReport]:
+        row = self._store.conn.execute(
+            "SELECT app_name, entity, report, created_at, updated_at, revision "
+            "FROM reports WHERE app_name = ? AND entity = ?",
+            (app_name, self.normalize_entity(entity)),
+        ).fetchone()
+        if row is None:
+            return None
+        app_name, entity, report, created_at, updated_at, revision = row
+        return StoredReport(app_name, entity, decompress(report), created_at, updated_at, revision)
+
+    def _save(self, app_name: str, entity: str, report: str):
+        now = time.time()
+        self._store.conn.execute(
+            """
+            INSERT INTO reports (app_name, entity, report, created_at, updated_at, revision)
+            VALUES (?, ?, ?, ?, ?, 1)
+            ON CONFLICT (app_name, entity) DO UPDATE SET
+                report = excluded.report,
+                updated_at = excluded.updated_at,
+                revision = revision + 1
+            """,
+            (app_name, self.normalize_entity(entity), compress(report), now, now),
+        )
+
+    def _delete(self, app_name: str, entity: str):
+        self._store.conn.execute(
+            "DELETE FROM reports WHERE app_name = ? AND entity = ?",
+            (app_name, self.normalize_entity(entity)),
+        )
+
+    async def get(self, app_name: str, entity: str) -> Optional[StoredReport]:
+        return await asyncio.to_thread(self._get, app_name, entity)
+
+    async def save(self, app_name: str, entity: str, report: str) -> None:
+        await asyncio.to_thread(self._save, app_name, entity, report)
+
+    async def delete(self, app_name: str, entity: str) -> None:
+        await asyncio.to_thread(self._delete, app_name, entity)
+
+
+class _ReportTable(SQLiteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reports (
+            app_name TEXT NOT NULL,
+            entity TEXT NOT NULL,
+            report BLOB NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            revision INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (app_name, entity)
+        );
+    """
+
+
+@dataclass
+class ArchivedReport:
+    """완료된 리서치 리포트 (사용자와 관계없이 재사용 가능)"""
+    report_id: int
+    app_name: str
+    user_id: str
+    query: str
+    model: str
+    entities: List[str]
+    report: str
+    created_at: float
+    namespace: str = ""
+
+
+def fts_match_expression(text: str) -> str:
+    """질의를 FTS5 MATCH 식으로 변환 (정규화 토큰의 prefix AND, 조사가 붙은 형태도 일치)"""
+    terms = []
+    for token in normalize_tokens(text):
+        term = '"' + token.replace('"', '""') + '"*'
+        if term not in terms:
+            terms.append(term)
+    return " AND ".join(terms)
+
+
+class ReportArchive:
+    """완료된 리포트 보관소 (종목, 일자, 모델 색인 + FTS5 전문 검색)
+
+    - 리포트마다 추출된 종목(ticker)을 report_entities 에 색인한다
+    - 질의와 본문은 FTS5(unicode61) 로 색인하고, 검색어는 prefix 로 비교해 한국어 조사를 흡수한다
+    - 본문은 압축해 저장하고 FTS 는 색인만 보관(contentless)하므로 원문을 중복 저장하지 않는다
+    - namespace 는 질의를 제외한 요청 설정의 hash 로, 재사용할 때 같은 설정(축소/증분 여부 포함)의 리포트만 고른다
+    """
+
+    def __init__(self, path: str | Path, max_age: float = 0, cleanup_interval: float = 3600):
+        self._store = _ReportArchiveTable(path)
+        # max_age(초)보다 오래된 리포트는 cleanup_interval 마다 삭제 (0 이면 보관 기간 제한 없음)
+        self.max_age = max_age
+        self.cleanup_interval = cleanup_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _add(
+        self,
+        app_name: str,
+        user_id: str,
+        query: str,
+        model: str,
+        entities: Sequence[str],
+        report: str,
+        namespace: str = "",
+    ) -> int:
+        conn = self._store.conn
+        now = time.time()
+        entities = list(dict.fromkeys(e.upper() for e in entities))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                "INSERT INTO report_archive (app_name, user_id, query, model, entities, report, created_at, namespace) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (app_name, user_id, query, model, " ".join(entities), compress(report), now, namespace),
+            )
+            report_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO report_entities (report_id, entity, created_at) VALUES (?, ?, ?)",
+                [(report_id, entity, now) for entity in entities],
+            )
+            conn.execute(
+                "INSERT INTO report_fts (rowid, query, report) VALUES (?, ?, ?)",
+                (report_id, query, report),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return report_id
+
+    def _search(
+        self,
+        text: str = "",
+        entities: Sequence[str] = (),
+        since: Optional[float] = None,
+        model: Optional[str] = None,
+        app_name: Optional[str] = None,
+        namespace: Optional[str] = None,
+        query_only: bool = False,
+        limit: int = 10,
+    ) -> List[ArchivedReport]:
+        sql = [
+            "SELECT a.id, a.app_name, a.user_id, a.query, a.model, a.entities, a.report, a.created_at, a.namespace "
+            "FROM report_archive a"
+        ]
+        where, params = [], []
+        match = fts_match_expression(text) if text else ""
+        if match:
+            sql.append("JOIN report_fts ON report_fts.rowid = a.id")
+            # query_only 이면 질의 컬럼만 비교 (같은 주제의 리포트인지 확인할 때)
+            where.append("report_fts MATCH ?")
+            params.append(f"query : ({match})" if query_only else match)
+        entities = list(dict.fromkeys(e.upper() for e in entities))
+        if entities:
+            placeholders = ", ".join("?" for _ in entities)
+            where.append(
+                f"a.id IN (SELECT report_id FROM report_entities WHERE entity IN ({placeholders}) "
+                "GROUP BY report_id HAVING COUNT(DISTINCT entity) = ?)"
+            )
+            params.extend([*entities, len(entities)])
+        if since is not None:
+            where.append("a.created_at >= ?")
+            params.append(since)
+        if model:
+            where.append("a.model = ?")
+            params.append(model)
+        if app_name:
+            where.append("a.app_name = ?")
+            params.append(app_name)
+        if namespace:
+            where.append("a.namespace = ?")
+            params.append(namespace)
+        if where:
+            sql.append("WHERE " + " AND ".join(where))
+        # 종목 없이 검색어만 있으면 관련도순, 그 외에는 최신순
+        sql.append("ORDER BY bm25(report_fts)" if match and not entities else "ORDER BY a.created_at DESC")
+        sql.append("LIMIT ?")
+        params.append(limit)
+        rows = self._store.conn.execute(" ".join(sql), params).fetchall()
+        return [
+            ArchivedReport(row[0], row[1], row[2], row[3], row[4], row[5].split(), decompress(row[6]), row[7], row[8])
+            for row in rows
+        ]
+
+    def _cleanup(self, older_than: float) -> int:
+        conn = self._store.conn
+        rows = conn.execute(
+            "SELECT id, query, report FROM report_archive WHERE created_at < ?", (older_than,)
+        ).fetchall()
+        if not rows:
+            return 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for report_id, query, report in rows:
+                # contentless FTS 는 색인했던 원문을 넘겨야 지울 수 있다
+                conn.execute(
+                    "INSERT INTO report_fts (report_fts, rowid, query, report) VALUES ('delete', ?, ?, ?)",
+                    (report_id, query, decompress(report)),
+                )
+                conn.execute("DELETE FROM report_entities WHERE report_id = ?", (report_id,))
+                conn.execute("DELETE FROM report_archive WHERE id = ?", (report_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    async def add(
+        self, app_name: str, user_id: str, query: str, model: str, entities: Sequence[str], report: str, namespace: str = ""
+    ) -> int:
+        return await asyncio.to_thread(self._add, app_name, user_id, query, model, entities, report, namespace)
+
+    async def search(self, text: str = "", entities: Sequence[str] = (), **filters) -> List[ArchivedReport]:
+        return await asyncio.to_thread(self._search, text, entities, **filters)
+
+    async def cleanup(self, older_than: float) -> int:
+        """older_than(epoch) 이전에 보관된 리포트 삭제"""
+        return await asyncio.to_thread(self._cleanup, older_than)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self):
+        while True:
+            try:
+                removed = await self.cleanup(time.time() - self.max_age)
+                if removed:
+                    logger.info(f"보관 기간이 지난 리포트 {removed}건 삭제")
+            except Exception as e:
+                logger.warning(f"리포트 보관소 정리 실패: {e}")
+            await asyncio.sleep(self.cleanup_interval)
+
+    def start(self):
+        if self.running or self.max_age <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class _ReportArchiveTable(SQLiteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS report_archive (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            app_name TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            query TEXT NOT NULL,
+            model TEXT NOT NULL,
+            entities TEXT NOT NULL,
+            report BLOB NOT NULL,
+            created_at REAL NOT NULL,
+            namespace TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_report_archive_created ON report_archive (created_at);
+        CREATE TABLE IF NOT EXISTS report_entities (
+            report_id INTEGER NOT NULL,
+            entity TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_report_entities ON report_entities (entity, created_at);
+        CREATE INDEX IF NOT EXISTS idx_report_entities_report ON report_entities (report_id);
+        CREATE VIRTUAL TABLE IF NOT EXISTS report_fts USING fts5(
+            query, report, content='', tokenize='unicode61'
+        );
+    """
+
+    def migrate(self, conn):
+        self.add_column(conn, "report_archive", "namespace", "TEXT NOT NULL DEFAULT ''")
+
+
+# 글로벌 인스턴스 (파일은 처음 사용할 때 연다)
+_REPORT_STORE_PATH = os.getenv("REPORT_STORE_PATH", str(DEFAULT_STATE_DIR / "reports.db"))
+report_store = ReportStore(_REPORT_STORE_PATH)
+report_archive = ReportArchive(
+    _REPORT_STORE_PATH,
+    max_age=float(os.getenv("REPORT_ARCHIVE_MAX_AGE", str(90 * 86400))),
+    cleanup_interval=float(os.getenv("REPORT_ARCHIVE_CLEANUP_INTERVAL", "3600")),
+)
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Any, Optional, Tuple, List
+
+from shared.compression import compress, decompress
+from shared.database.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCacheTier:
+    """worker 프로세스 간 공유 캐시 계층 (로컬 SQLite 파일)
+
+    - 값은 JSON 으로 직렬화한다. JSON 으로 표현할 수 없는 값은 공유하지 않는다.
+    - 직렬화한 값은 compress() 로 저장한다 (큰 리서치 결과만 실제로 압축됨).
+    - 각 항목은 저장 시각(stored_at)을 함께 보관하므로 모든 worker 가 같은 기준으로 TTL 을 판단한다.
+    - 무효화(정확한 key 또는 명시적인 prefix)와 propagate=True 로 덮어쓴 key 는 invalidations 로그에 기록되고,
+      각 worker 가 poll_invalidations 로 읽어 자신의 L1 에 반영한다. 일반 set 은 기록하지 않는다.
+    - get/set 은 이벤트 루프에서 바로 호출되므로 잠금 대기(busy_timeout)를 짧게 두고,
+      기다리다 실패하면 호출 측(CacheManager)이 캐시 미스로 처리한다.
+    """
+
+    def __init__(self, path: str | Path, busy_timeout: float = 0.5):
+        self._store = _SharedCacheStore(path, busy_timeout=busy_timeout)
+
+    @property
+    def origin(self) -> str:
+        # fork 이후에도 worker 별로 구분되도록 매번 pid 를 읽는다
+        return str(os.getpid())
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """(value, stored_at, expires_at) 반환, 없거나 만료되었으면 None"""
+        row = self._store.conn.execute(
+            "SELECT value, stored_at, expires_at FROM cache_entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        value, stored_at, expires_at = row
+        if expires_at < time.time():
+            return None
+        return json.loads(decompress(value)), stored_at, expires_at
+
+    def set(self, key: str, value: Any, stored_at: float, duration: int, propagate: bool = False) -> bool:
+        """저장 (propagate=True 면 이 key 를 L1 에 들고 있는 다른 worker 가 새 값을 다시 읽도록 무효화도 기록)"""
+        try:
+            serialized = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return False
+        conn = self._store.conn
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, compress(serialized), stored_at, stored_at + duration),
+        )
+        if propagate:
+            # 값을 먼저 쓰므로 무효화를 본 worker 는 항상 새 값을 읽는다
+            self._log_invalidation(key, False)
+        return True
+
+    def claim(self, key: str, duration: int) -> bool:
+        """key 가 없거나 만료되었을 때만 저장하고 True (여러 worker 중 한 곳만 작업하도록 선점)"""
+        now = time.time()
+        conn = self._store.conn
+        conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at < ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO cache_entries (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, compress(json.dumps(self.origin)), now, now + duration),
+        )
+        return cursor.rowcount == 1
+
+    def invalidate(self, pattern: Optional[str] = None, prefix: bool = False):
+        """공유 계층에서 삭제하고, 다른 worker 에 무효화 전파
+
+        pattern 은 정확한 key 이고, prefix=True 면 pattern 으로 시작하는 key 전체다. None 이면 모두 삭제한다.
+        """
+        conn = self._store.conn
+        if not pattern:
+            conn.execute("DELETE FROM cache_entries")
+        elif prefix:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(pattern), pattern)
+            )
+        else:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (pattern,))
+        self._log_invalidation(pattern or "", prefix)
+
+    def _log_invalidation(self, pattern: str, prefix: bool):
+        self._store.conn.execute(
+            "INSERT INTO invalidations (pattern, prefix, origin, created_at) VALUES (?, ?, ?, ?)",
+            (pattern, int(prefix), self.origin, time.time()),
+        )
+
+    def last_invalidation_id(self) -> int:
+        row = self._store.conn.execute("SELECT MAX(id) FROM invalidations").fetchone()
+        return row[0] or 0
+
+    def poll_invalidations(self, since_id: int) -> List[Tuple[int, str, bool, str]]:
+        """since_id 이후의 (id, pattern, prefix, origin) 무효화 기록"""
+        rows = self._store.conn.execute(
+            "SELECT id, pattern, prefix, origin FROM invalidations WHERE id > ? ORDER BY id",
+            (since_id,),
+        ).fetchall()
+        return [(row_id, pattern, bool(prefix), origin) for row_id, pattern, prefix, origin in rows]
+
+    def cleanup_expired(self, keep_invalidations_seconds: int = 3600):
+        now = time.time()
+        conn = self._store.conn
+        conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM invalidations WHERE created_at < ?",
+            (now - keep_invalidations_seconds,),
+        )
+
+
+class _SharedCacheStore(SQLiteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            stored_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS invalidations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pattern TEXT NOT NULL,
+            prefix INTEGER NOT NULL DEFAULT 0,
+            origin TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+    """
+
+    def migrate(self, conn):
+        self.add_column(conn, "invalidations", "prefix", "INTEGER NOT NULL DEFAULT 0")
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# 로컬 상태 파일 기본 위치 (프로젝트 루트의 .cache/)
+DEFAULT_STATE_DIR = Path(
+    os.getenv("LOCAL_STATE_DIR", str(Path(__file__).resolve().parents[2] / ".cache"))
+)
+
+
+class SQLiteStore:
+    """여러 프로세스/스레드가 함께 쓰는 로컬 SQLite 파일 저장소 기반 클래스
+
+    스레드마다 별도 연결을 사용하고, WAL 모드와 busy_timeout 으로
+    여러 uvicorn worker 가 같은 파일을 동시에 읽고 쓸 수 있게 한다.
+    하위 클래스는 SCHEMA 에 테이블 생성 SQL 을, 기존 파일의 스키마 변경은 migrate 에 정의한다.
+    busy_timeout 은 잠금을 기다리는 최대 시간(초)이다. 이벤트 루프에서 바로 호출되는 저장소는 짧게 둔다.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: str | Path, busy_timeout: float = 30):
+        self.path = Path(path)
+        self.busy_timeout = busy_timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(self.SCHEMA)
+                    self.migrate(conn)
+                    self._initialized = True
+        return conn
+
+    def migrate(self, conn: sqlite3.Connection):
+        """SCHEMA 적용 후 기존 파일에 필요한 변경 (컬럼 추가 등)"""
+
+    @staticmethod
+    def add_column(conn: sqlite3.Connection, table: str, column: str, definition: str):
+        """column 이 없을 때만 추가 (이전 버전이 만든 파일 호환)"""
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
@@ -0,0 +1,141 @@
+import asyncio
+import time
+import logging
+from pathlib import Path
+from typing import Optional
+
+from a2a.server.tasks import TaskStore
+from a2a.types import Task, TaskState
+
+from shared.compression import compress, decompress
+from shared.database.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteTaskStore(TaskStore):
+    """A2A Task 를 로컬 SQLite 파일에 저장하는 TaskStore
+
+    여러 uvicorn worker 가 같은 파일을 공유하므로, 어느 worker 로 들어온 tasks/get 도
+    같은 Task 를 볼 수 있다. 다른 저장소(MySQL 등)로 바꿀 때는 같은 인터페이스로 교체한다.
+    끝난(completed/canceled/failed/rejected) task 는 max_age(초)가 지나면 cleanup_interval 마다 삭제한다.
+    """
+
+    # 보관 기간이 지나면 삭제할 상태 (진행 중인 task 는 남겨 둔다)
+    FINISHED_STATES = (TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected)
+
+    def __init__(self, path: str | Path, max_age: float = 0, cleanup_interval: float = 3600):
+        self._store = _TaskTable(path)
+        self.max_age = max_age
+        self.cleanup_interval = cleanup_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _save(self, task: Task):
+        self._store.conn.execute(
+            "INSERT OR REPLACE INTO tasks (task_id, context_id, state, body, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (
+                task.id,
+                task.contextId,
+                task.status.state.value,
+                compress(task.model_dump_json(exclude_none=True)),
+                time.time(),
+            ),
+        )
+
+    def _get(self, task_id: str) -> Task | None:
+        row = self._store.conn.execute(
+            "SELECT body FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        return Task.model_validate_json(decompress(row[0])) if row else None
+
+    def _delete(self, task_id: str):
+        self._store.conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    async def save(self, task: Task) -> None:
+        await asyncio.to_thread(self._save, task)
+
+    async def get(self, task_id: str) -> Task | None:
+        return await asyncio.to_thread(self._get, task_id)
+
+    async def delete(self, task_id: str) -> None:
+        await asyncio.to_thread(self._delete, task_id)
+
+    def _cleanup(self, older_than: float) -> int:
+        states = [state.value for state in self.FINISHED_STATES]
+        placeholders = ", ".join("?" for _ in states)
+        cursor = self._store.conn.execute(
+            f"DELETE FROM tasks WHERE updated_at < ? AND state IN ({placeholders})",
+            (older_than, *states),
+        )
+        return cursor.rowcount
+
+    async def cleanup(self, older_than: float) -> int:
+        """older_than(epoch) 이전에 끝난 task 삭제"""
+        return await asyncio.to_thread(self._cleanup, older_than)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self):
+        while True:
+            try:
+                removed = await self.cleanup(time.time() - self.max_age)
+                if removed:
+                    logger.info(f"보관 기간이 지난 task {removed}건 삭제")
+            except Exception as e:
+                logger.warning(f"task 저장소 정리 실패: {e}")
+            await asyncio.sleep(self.cleanup_interval)
+
+    def start(self):
+        if self.running or self.max_age <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class CompressedInMemoryTaskStore(TaskStore):
+    """Task 를 압축된 JSON 으로 메모리에 보관하는 TaskStore
+
+    리포트 artifact 가 수십 KB 인 task 를 많이 보관해도 상주 메모리를 줄이기 위해 사용한다.
+    get 은 매번 새 Task 객체를 반환한다.
+    """
+
+    def __init__(self):
+        self._tasks: dict[str, bytes] = {}
+        self._lock = asyncio.Lock()
+
+    async def save(self, task: Task) -> None:
+        body = compress(task.model_dump_json(exclude_none=True))
+        async with self._lock:
+            self._tasks[task.id] = body
+
+    async def get(self, task_id: str) -> Task | None:
+        async with self._lock:
+            body = self._tasks.get(task_id)
+        return Task.model_validate_json(decompress(body)) if body is not None else None
+
+    async def delete(self, task_id: str) -> None:
+        async with self._lock:
+            self._tasks.pop(task_id, None)
+
+
+class _TaskTable(SQLiteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id TEXT PRIMARY KEY,
+            context_id TEXT,
+            state TEXT,
+            body BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_updated ON tasks (updated_at);
+    """
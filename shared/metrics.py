@@ -0,0 +1,337 @@
+"""
+Prometheus text format 메트릭 (외부 의존성 없는 경량 구현)
+
+hot path 에서는 미리 만들어 둔 label 자식 객체의 inc/observe 만 호출하며,
+각 호출은 lock 한 번과 정수/실수 덧셈 몇 번으로 끝난다.
+메트릭은 프로세스 단위로 집계되므로 multi-worker 환경에서는 worker 별로 수집된다.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str, **kwargs: str):
+        """label 값에 해당하는 자식 메트릭 (한 번 만들면 재사용)"""
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _iter_children(self) -> Iterable[Tuple[Dict[str, str], object]]:
+        if not self.labelnames:
+            yield {}, self._default
+            return
+        for values, child in list(self._children.items()):
+            yield dict(zip(self.labelnames, values)), child
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def samples(self) -> List[Sample]:
+        return [(f"{self.name}_total", labels, child.value) for labels, child in self._iter_children()]
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float):
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    def samples(self) -> List[Sample]:
+        return [(self.name, labels, child.value) for labels, child in self._iter_children()]
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        self._counts = [0] * (len(upper_bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self._upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self._upper_bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def samples(self) -> List[Sample]:
+        samples: List[Sample] = []
+        for labels, child in self._iter_children():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for upper_bound, count in zip(self._upper_bounds + (float("inf"),), counts):
+                cumulative += count
+                samples.append(
+                    (f"{self.name}_bucket", {**labels, "le": _format_value(upper_bound)}, cumulative)
+                )
+            samples.append((f"{self.name}_count", labels, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]):
+        """scrape 시점에 값을 계산하는 collector 등록
+
+        collector 는 (name, type, documentation, samples) 튜플들을 반환한다.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        lines: List[str] = []
+
+        def _emit(name: str, metric_type: str, documentation: str, samples: List[Sample]):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+        for metric in list(self._metrics.values()):
+            _emit(metric.name, metric.TYPE, metric.documentation, metric.samples())
+        for collector in self._collectors:
+            try:
+                for name, metric_type, documentation, samples in collector():
+                    _emit(name, metric_type, documentation, samples)
+            except Exception:
+                continue
+        return "\n".join(lines) + "\n"
+
+
+# 글로벌 인스턴스
+metrics = MetricsRegistry()
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ---------------------------------------------------------------------------
+# 공용 메트릭 정의
+
+TASKS_IN_PROGRESS = metrics.gauge(
+    "deep_search_tasks_in_progress", "실행 중인 리서치 task 수"
+)
+TASKS = metrics.counter(
+    "deep_search_tasks", "처리한 리서치 task 수", ["status"]
+)
+TASK_PHASE_SECONDS = metrics.histogram(
+    "deep_search_task_phase_seconds", "executor 단계별 소요 시간", ["phase"]
+)
+TASK_PATHS = metrics.counter(
+    "deep_search_task_paths", "task 실행 경로 (direct: Gemini 없이 직접 조사, agent: Gemini 경유)", ["path"]
+)
+STEP_MEMO_LOOKUPS = metrics.counter(
+    "deep_search_step_memo_lookups", "plan 단계 결과 memo 조회 결과 (hit, miss, bypass)", ["result"]
+)
+TASK_COST_USD = metrics.histogram(
+    "deep_search_task_cost_usd",
+    "task 당 Perplexity 사용료 (USD)",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+TASK_TOKENS = metrics.histogram(
+    "deep_search_task_tokens",
+    "task 당 Perplexity 토큰 수",
+    ["type"],
+    buckets=(100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000),
+)
+AGENT_PHASE_SECONDS = metrics.histogram(
+    "deep_search_agent_phase_seconds", "DeepSearchAgent 단계별 소요 시간", ["phase"]
+)
+PERPLEXITY_REQUEST_SECONDS = metrics.histogram(
+    "perplexity_request_seconds", "Perplexity API 호출 시간", ["model", "outcome"]
+)
+PERPLEXITY_RETRIES = metrics.counter(
+    "perplexity_retries", "Perplexity API 재시도 횟수", ["reason"]
+)
+PERPLEXITY_TOKENS = metrics.counter(
+    "perplexity_tokens", "Perplexity 사용 토큰", ["model", "type"]
+)
+PERPLEXITY_COST_USD = metrics.counter(
+    "perplexity_cost_usd", "Perplexity 누적 사용료 (USD)", ["model"]
+)
+CACHE_REQUESTS = metrics.counter(
+    "cache_requests", "CacheManager 조회 결과", ["result"]
+)
+RESEARCH_CACHE_LOOKUPS = metrics.counter(
+    "research_cache_lookups", "연구 결과 캐시 조회 결과 (exact, near, archive, miss)", ["result"]
+)
+DB_QUERY_SECONDS = metrics.histogram(
+    "db_query_seconds",
+    "DatabaseManager 쿼리 시간",
+    ["mode", "outcome"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
@@ -0,0 +1,177 @@
+import re
+import hashlib
+import struct
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+# 조사 (긴 것부터 비교), 토큰 길이가 2 이상 남을 때만 제거
+_KOREAN_PARTICLES = (
+    "에서는", "으로는", "에서", "으로", "에게", "까지", "부터", "이나", "보다", "라는", "에는",
+    "의", "을", "를", "이", "가", "은", "는", "에", "와", "과", "로", "도", "만",
+)
+# 질문 형식만 바꾸는 표현 (의미 비교에서 제외)
+_STOPWORDS = frozenset(
+    """
+    향후 관련 대한 대해 대해서 분석 정리 알려줘 알려주세요 해줘 해주세요 부탁 부탁해 어때 어떤가 어떻게 좀
+    분석해줘 분석해주세요 정리해줘 정리해주세요
+    the a an of for on in about and to is are what how please tell me give analysis analyze report
+    """.split()
+)
+_TOKEN_RE = re.compile(r"[a-z]+|[0-9]+(?:\.[0-9]+)?|[가-힣]+")
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """한글/영문 질의를 비교용 토큰으로 정규화 (소문자, 조사/불용어 제거)"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for token in _TOKEN_RE.findall(text):
+        if "가" <= token[0] <= "힣":
+            for particle in _KOREAN_PARTICLES:
+                if token.endswith(particle) and len(token) - len(particle) >= 2:
+                    token = token[: -len(particle)]
+                    break
+        # 숫자 뒤에 붙은 조사는 단독 토큰으로 남으므로 제외
+        if token not in _STOPWORDS and token not in _KOREAN_PARTICLES:
+            tokens.append(token)
+    return tokens
+
+
+def shingles(tokens: List[str]) -> Set[str]:
+    """토큰 + 띄어쓰기를 무시한 문자 bigram"""
+    joined = "".join(tokens)
+    result = set(tokens)
+    result.update(joined[i : i + 2] for i in range(len(joined) - 1))
+    return result
+
+
+class NearDuplicateIndex:
+    """MinHash + LSH 기반 유사 질의 색인
+
+    - 질의를 정규화한 shingle 집합의 MinHash signature 를 bands 개 구간으로 나눠 bucket 에 넣는다
+    - 조회 시 bucket 이 하나라도 겹치는 후보만 실제 Jaccard 유사도로 확인하므로
+      항목 수와 무관하게 조회 비용이 거의 일정하다
+    - 숫자(연도, 분기 등)가 다른 질의는 유사도와 관계없이 다른 질의로 본다
+    namespace 가 다른 항목끼리는 비교하지 않는다. 항목은 max_entries 개까지 오래된 순으로 제거된다.
+    max_bucket_scan 보다 큰 bucket 은 조회 시 건너뛰어 최악 조회 시간을 제한한다.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 16,
+        max_entries: int = 100_000,
+        max_bucket_scan: int = 64,
+        seed: str = "near-duplicate",
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm 은 bands 의 배수여야 합니다.")
+        self.threshold = threshold
+        self._bands = bands
+        self._rows = num_perm // bands
+        self._max_entries = max_entries
+        self._max_bucket_scan = max_bucket_scan
+        self._num_perm = num_perm
+        self._unpack = struct.Struct(f"<{num_perm}I").unpack
+        self._seed = seed.encode("utf-8")
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # entry_id -> (namespace, 정규화된 질의, shingles, numbers, band_keys, value)
+        self._entries: "OrderedDict[int, Tuple[str, str, FrozenSet[str], FrozenSet[str], Tuple, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[int]] = {}
+        # (namespace, 정규화된 질의) -> entry_id (같은 질의 중복 등록 방지)
+        self._exact: Dict[Tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _signature(self, items: Set[str]) -> List[int]:
+        # shingle 마다 num_perm 개의 독립 hash 를 한 번의 XOF 호출로 만들고 열별 최솟값을 취한다
+        size = self._num_perm * 4
+        rows = [
+            self._unpack(hashlib.shake_128(self._seed + s.encode("utf-8")).digest(size))
+            for s in items
+        ]
+        return list(map(min, zip(*rows)))
+
+    def _band_keys(self, namespace: str, signature: List[int]) -> Tuple:
+        rows = self._rows
+        return tuple(
+            (namespace, i, tuple(signature[i * rows : (i + 1) * rows]))
+            for i in range(self._bands)
+        )
+
+    def _prepare(self, text: str):
+        tokens = normalize_tokens(text)
+        items = shingles(tokens)
+        numbers = frozenset(t for t in tokens if t[0].isdigit())
+        return " ".join(tokens), frozenset(items), numbers
+
+    def _remove(self, entry_id: int):
+        namespace, normalized, _, _, band_keys, _ = self._entries.pop(entry_id)
+        for key in band_keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+        del self._exact[(namespace, normalized)]
+
+    def add(self, namespace: str, text: str, value: Any):
+        """질의 등록 (같은 정규화 질의가 있으면 value 만 갱신)"""
+        normalized, items, numbers = self._prepare(text)
+        if not items:
+            return
+        with self._lock:
+            existing = self._exact.get((namespace, normalized))
+            if existing is not None:
+                entry = self._entries.pop(existing)
+                self._entries[existing] = entry[:5] + (value,)
+                return
+            band_keys = self._band_keys(namespace, self._signature(items))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (namespace, normalized, items, numbers, band_keys, value)
+            self._exact[(namespace, normalized)] = entry_id
+            for key in band_keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self._max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def lookup(self, namespace: str, text: str) -> Optional[Tuple[Any, float]]:
+        """threshold 이상으로 가장 유사한 항목의 (value, 유사도), 없으면 None"""
+        normalized, items, numbers = self._prepare(text)
+        if not items:
+            return None
+        with self._lock:
+            exact = self._exact.get((namespace, normalized))
+            if exact is not None:
+                return self._entries[exact][5], 1.0
+            candidates: Set[int] = set()
+            for key in self._band_keys(namespace, self._signature(items)):
+                bucket = self._buckets.get(key)
+                # 흔한 shingle 로 채워진 큰 bucket 은 건너뛴다 (실제 유사 질의는 다른 band 에서도 겹친다)
+                if bucket and len(bucket) <= self._max_bucket_scan:
+                    candidates.update(bucket)
+            best = None
+            size = len(items)
+            for entry_id in candidates:
+                _, _, entry_items, entry_numbers, _, value = self._entries[entry_id]
+                # 집합 크기 비율이 threshold 보다 작으면 Jaccard 도 threshold 를 넘을 수 없다
+                entry_size = len(entry_items)
+                if entry_numbers != numbers or min(size, entry_size) < self.threshold * max(size, entry_size):
+                    continue
+                similarity = len(items & entry_items) / len(items | entry_items)
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (value, similarity)
+            return best
+
+    def discard(self, namespace: str, text: str):
+        """질의 항목 제거 (값이 만료된 경우 등)"""
+        normalized, _, _ = self._prepare(text)
+        with self._lock:
+            entry_id = self._exact.get((namespace, normalized))
+            if entry_id is not None:
+                self._remove(entry_id)
@@ -0,0 +1,139 @@
+"""
+OpenTelemetry 기반 span tracing
+
+TRACE_EXPORTER 환경 변수로 span 을 내보낼 곳을 정한다.
+- "file"    : TRACE_FILE_PATH (기본 .cache/traces.jsonl) 에 span 을 JSON Lines 로 기록
+- "otlp"    : OTEL_EXPORTER_OTLP_ENDPOINT 로 전송 (opentelemetry-exporter-otlp 설치 필요)
+- "console" : 표준 출력
+설정하지 않으면 span 은 만들어지지만 내보내지지 않는다 (no-op 에 가까운 비용).
+
+google.adk 도 같은 TracerProvider 로 invocation / call_llm / execute_tool span 을 만들기 때문에,
+Gemini 호출 한 번 한 번이 executor span 아래에 함께 기록된다.
+"""
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence
+
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+logger = logging.getLogger(__name__)
+
+_propagator = TraceContextTextMapPropagator()
+_setup_lock = threading.Lock()
+_configured = False
+
+tracer = trace.get_tracer("deep_search_agent")
+
+
+class JsonlFileSpanExporter(SpanExporter):
+    """끝난 span 을 파일에 한 줄씩 JSON 으로 기록하는 exporter (OTLP collector 대용)"""
+
+    def __init__(self, path: str | Path):
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Any]) -> SpanExportResult:
+        lines = [span.to_json(indent=None) for span in spans]
+        try:
+            with self._lock, self._path.open("a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.warning(f"trace 파일 기록 실패: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def _create_exporter(kind: str):
+    if kind == "file":
+        default_path = Path(__file__).resolve().parent.parent / ".cache" / "traces.jsonl"
+        return JsonlFileSpanExporter(os.getenv("TRACE_FILE_PATH", str(default_path)))
+    if kind == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        return ConsoleSpanExporter()
+    if kind == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("opentelemetry-exporter-otlp 가 설치되지 않아 tracing 을 내보내지 않습니다.")
+            return None
+        return OTLPSpanExporter()
+    logger.warning(f"알 수 없는 TRACE_EXPORTER: {kind}")
+    return None
+
+
+def setup_tracing():
+    """TRACE_EXPORTER 설정에 따라 전역 TracerProvider 구성 (한 번만 실행)"""
+    global _configured
+    with _setup_lock:
+        if _configured:
+            return
+        _configured = True
+        kind = os.getenv("TRACE_EXPORTER", "").lower()
+        if not kind:
+            return
+        exporter = _create_exporter(kind)
+        if exporter is None:
+            return
+
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        provider = TracerProvider(
+            resource=Resource.create(
+                {"service.name": os.getenv("OTEL_SERVICE_NAME", "deep_search_agent")}
+            )
+        )
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+        logger.info(f"Tracing 활성화 (exporter={kind})")
+
+
+def extract_context(metadata: Optional[Mapping[str, Any]]) -> Optional[otel_context.Context]:
+    """A2A metadata 의 traceparent / tracestate 로부터 상위 trace context 추출"""
+    if not metadata:
+        return None
+    carrier = {
+        key: str(metadata[key]) for key in ("traceparent", "tracestate") if metadata.get(key)
+    }
+    if not carrier:
+        return None
+    return _propagator.extract(carrier=carrier)
+
+
+@contextmanager
+def start_span(
+    name: str,
+    attributes: Optional[Dict[str, Any]] = None,
+    parent: Optional[otel_context.Context] = None,
+) -> Iterator[trace.Span]:
+    """현재 context 아래에 span 을 열고, 예외가 나면 span 에 기록"""
+    with tracer.start_as_current_span(
+        name,
+        context=parent,
+        attributes={k: v for k, v in (attributes or {}).items() if v is not None},
+    ) as span:
+        yield span
+
+
+def current_trace_id() -> Optional[str]:
+    """현재 span 의 trace id (16진수), 유효한 span 이 없으면 None"""
+    span_context = trace.get_current_span().get_span_context()
+    if not span_context.is_valid:
+        return None
+    return format(span_context.trace_id, "032x")